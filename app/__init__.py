@@ -1,11 +1,35 @@
 from flask import Flask
 from config import Config
+from app.jobs import JobQueue
+from app.simulations import path_bank, shocks
+from app.timing import init_app as init_timing
+from app.memory import init_app as init_memory
+from app.metrics import init_app as init_metrics
+from app.recorder import init_app as init_recorder
+from app.cache import init_app as init_result_cache
+from app.admission import init_app as init_admission
+from app.profiling import init_app as init_profiling
+from app.serialization import init_app as init_serialization
 
 def create_app(config_class=Config):
     app = Flask(__name__, 
                 static_folder='static', 
                 template_folder='templates')
     app.config.from_object(config_class)
+    shocks.load(app.config['SHOCK_BANK_PATH'])
+    if path_bank.load(app.config['SHARED_PATHS_DIR'], app.config['SHARED_PATHS_MAX_BYTES']) is not None:
+        path_bank.preload(app.config['SHARED_PATHS_PRELOAD'])
+    app.extensions['jobs'] = JobQueue(app.config['JOB_DIR'], workers=app.config['JOB_WORKERS'],
+                                      max_queued=app.config['JOB_QUEUE_SIZE'],
+                                      shock_bank_path=app.config['SHOCK_BANK_PATH'])
+    init_timing(app)
+    init_memory(app)
+    init_metrics(app)
+    init_recorder(app)
+    init_result_cache(app)
+    init_admission(app)
+    init_profiling(app)
+    init_serialization(app)
 
     # import & register blueprints
     from app.routes.main import main_bp
@@ -15,6 +39,11 @@ def create_app(config_class=Config):
     from app.routes.tokenomics import tokenomics_bp    
     from app.routes.fund_raising import fund_raising_bp 
     from app.routes.lp_sim import lp_sim_bp 
+    from app.routes.jobs import jobs_bp
+    from app.routes.cache import cache_bp
+    from app.routes.admission import admission_bp
+    from app.routes.batch import batch_bp
+    from app.routes.metrics import metrics_bp
 
 
     app.register_blueprint(main_bp)
@@ -24,5 +53,10 @@ def create_app(config_class=Config):
     app.register_blueprint(tokenomics_bp)
     app.register_blueprint(fund_raising_bp)
     app.register_blueprint(lp_sim_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(cache_bp)
+    app.register_blueprint(admission_bp)
+    app.register_blueprint(batch_bp)
+    app.register_blueprint(metrics_bp)
 
     return app
\ No newline at end of file
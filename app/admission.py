@@ -0,0 +1,222 @@
+# app/admission.py
+
+from flask import current_app, request
+from app import memory
+from app.constants import LP_BANDS, MIN_BATCH_PATHS, NON_STABLE_POOL_BANDS
+from app.models.lp_sim import POOL_MODELS, portfolio_pools
+from app.models.supply import VESTING_HORIZON_DAYS, horizon_days
+from app.serialization import json_response
+from app.simulations.gbm import chunk_days
+from app.streaming import batch_sizes, stream_percentile_bands
+
+FLOAT_BYTES = 8
+BASE_BYTES = 16 * 2**20  # model setup, the percentile outputs and the encoded response of a small run
+
+# float64 working arrays alive per (path, day) element of a day block, and CPU time per path-day,
+# measured on the engines with tracemalloc / perf_counter
+LP_FLOATS_PER_ELEMENT = {'static': 8, 'constant_product': 10, 'concentrated': 12}
+LP_SECONDS_PER_ELEMENT = {'static': 3e-7, 'constant_product': 5e-7, 'concentrated': 4e-7}
+GBM_FLOATS_PER_ELEMENT = 3
+GBM_SECONDS_PER_ELEMENT = 1e-7
+TOKENOMICS_BYTES_PER_STEP = 900
+TOKENOMICS_SECONDS_PER_STEP = 2e-4
+OU_SECONDS_PER_STEP = 3e-6
+
+class AdmissionRejected(Exception):
+    def __init__(self, estimate, status=413):
+        super().__init__(estimate['reason'])
+        self.estimate = estimate
+        self.status = status
+
+def _count(data, key, default=None):
+    value = data.get(key, default)
+    if value is None:
+        raise ValueError(f"'{key}' is a required parameter")
+    value = int(value)
+    if value < 1:
+        raise ValueError(f"'{key}' must be at least 1")
+    return value
+
+def _lp_cost(data, paths):
+    days = _count(data, 'simulationDays')
+    correlation = float(data.get('correlation', 0.0))
+    if not -1 <= correlation <= 1:
+        raise ValueError("'correlation' must be between -1 and 1")
+    if data.get('pools'):
+        models = [pool.get('pool_model', 'static') for pool in portfolio_pools(data['pools'])]
+    else:
+        models = [data.get('poolModel', 'static')]
+    for model in models:
+        if model not in POOL_MODELS:
+            raise ValueError(f"unknown pool model '{model}'; expected {', '.join(POOL_MODELS)}")
+    # day blocks hold ~2^20 elements until a single day of paths is larger than that
+    block = paths * chunk_days(2 * paths, days)
+    floats = max(LP_FLOATS_PER_ELEMENT.get(m, 12) for m in models) + 2 * (len(models) - 1)
+    seconds = paths * days * sum(LP_SECONDS_PER_ELEMENT.get(m, 5e-7) for m in models)
+    return block * floats * FLOAT_BYTES, seconds, paths * days
+
+def _gbm_cost(data, paths):
+    # the full (paths, 365) matrix is materialised
+    return paths * 365 * GBM_FLOATS_PER_ELEMENT * FLOAT_BYTES, paths * 365 * GBM_SECONDS_PER_ELEMENT, paths * 365
+
+def _tokenomics_cost(data, paths=None):
+    steps = _count(data, 'num_simulations') * _count(data, 'num_months')
+    return steps * TOKENOMICS_BYTES_PER_STEP, steps * TOKENOMICS_SECONDS_PER_STEP, steps
+
+def _ou_cost(data, paths=None):
+    days = _count(data, 'days')
+    return days * FLOAT_BYTES * 4, days * OU_SECONDS_PER_STEP, days
+
+def _scenario_grid_cost(data, paths=None):
+    valuations = len(data.get('publicSaleValuations') or [None])
+    supplies = len(data.get('initialTotalSupplies') or [None])
+    allocations = len(data.get('allocationPercentages') or [None])
+    days = VESTING_HORIZON_DAYS + 1
+    if data.get('vestingData'):
+        days = horizon_days(data['vestingData'], data.get('airdropModule'))
+    # circulating market cap (V, S, A, days) dominates; x4 covers its encoded copy in the response
+    elements = (valuations + 1) * supplies * allocations * days
+    return elements * FLOAT_BYTES * 4, elements * 1e-8, elements
+
+def _lending_cost(data, paths=None):
+    # five fixed 365-day boundary scenarios; the three result arrays and the day's temporaries per element
+    return 5 * 365 * 8 * FLOAT_BYTES, 0.1, 5 * 365
+
+def _fixed_cost(data, paths=None):
+    return 0, 0.1, 0
+
+class CostModel:
+    # cost(data, paths) -> (bytes on top of BASE_BYTES, seconds, simulated path-steps); paths_key / band_keys
+    # mark models that can fall back to running in batches of paths and averaging their percentile bands
+    def __init__(self, cost, paths_key=None, band_keys=None):
+        self.cost = cost
+        self.paths_key = paths_key
+        self.band_keys = band_keys
+
+    @property
+    def batchable(self):
+        return self.band_keys is not None
+
+COST_MODELS = {
+    'lp': CostModel(_lp_cost, 'paths', LP_BANDS),
+    'lp_portfolio': CostModel(_lp_cost, 'paths'),
+    'non_stable_pool': CostModel(_gbm_cost, 'paths', NON_STABLE_POOL_BANDS),
+    'tokenomics': CostModel(_tokenomics_cost),
+    'stable_pool': CostModel(_ou_cost),
+    'lending': CostModel(_lending_cost),
+    'fund_raising_charts': CostModel(_fixed_cost),
+    'fund_raising_scenarios': CostModel(_scenario_grid_cost)
+}
+
+def _largest_batch(paths, batch_paths):
+    return None if paths is None else max(batch_sizes(paths, batch_paths))
+
+def estimate(kind, data, max_bytes, max_seconds, batch_paths=None):
+    # plan for one request: 'full', 'batched' (memory over budget, run in batches of paths) or 'rejected'.
+    # batch_paths forces batching, as the streaming routes do
+    model = COST_MODELS[kind]
+    data = data or {}
+    paths = _count(data, model.paths_key) if model.paths_key else None
+
+    # memory is that of the largest batch actually run, see batch_sizes
+    run_paths = paths if batch_paths is None else min(paths, batch_paths)
+    largest = _largest_batch(paths, run_paths)
+    memory, seconds, steps = model.cost(data, largest)
+    if largest is not None:
+        seconds *= paths / largest
+        steps *= paths / largest
+    mode = 'full' if batch_paths is None else 'batched'
+
+    # batches stop halving at MIN_BATCH_PATHS, below that the averaged bands are no longer trustworthy
+    if BASE_BYTES + memory > max_bytes and model.batchable and paths > MIN_BATCH_PATHS:
+        while run_paths > MIN_BATCH_PATHS and BASE_BYTES + memory > max_bytes:
+            run_paths = max(run_paths // 2, MIN_BATCH_PATHS)
+            largest = _largest_batch(paths, run_paths)
+            memory = model.cost(data, largest)[0]
+        mode = 'batched'
+
+    reason = None
+    if BASE_BYTES + memory > max_bytes:
+        reason = f"estimated memory {(BASE_BYTES + memory) / 2**20:.0f} MiB exceeds the {max_bytes / 2**20:.0f} MiB budget"
+        if mode == 'batched':
+            reason += f" even in batches of {largest} paths"
+    elif seconds > max_seconds:
+        reason = f"estimated CPU time {seconds:.0f}s exceeds the {max_seconds:.0f}s budget"
+
+    return {
+        'kind': kind,
+        'mode': 'rejected' if reason else mode,
+        'memory_bytes': int(BASE_BYTES + memory),
+        'cpu_seconds': seconds,
+        'path_steps': int(steps),
+        'batch_paths': run_paths if mode == 'batched' else None,
+        'max_bytes': max_bytes,
+        'max_seconds': max_seconds,
+        'reason': reason
+    }
+
+def limits(job=False):
+    config = current_app.config
+    return config['ADMISSION_MAX_BYTES'], config['ADMISSION_MAX_JOB_SECONDS' if job else 'ADMISSION_MAX_SECONDS']
+
+def admit(kind, data, job=False, batch_paths=None):
+    try:
+        plan = estimate(kind, data, *limits(job), batch_paths=batch_paths)
+    except (KeyError, TypeError, ValueError) as e:
+        raise AdmissionRejected({'kind': kind, 'mode': 'rejected', 'reason': str(e)}, status=400)
+    if plan['mode'] == 'rejected':
+        raise AdmissionRejected(plan)
+    if request:
+        request.admission = plan
+    return plan
+
+def fits_unbatched(kind, data, job=False):
+    # whether a single run over every path is within budget, e.g. for the exact last frame of a stream
+    return estimate(kind, data, *limits(job))['mode'] == 'full'
+
+def fit_headroom(plan, data):
+    # admission sized the run against the static budget; when the worker is short of memory right now (concurrent
+    # requests, a slow leak) a batchable model drops to smaller path batches instead of risking an OOM, and a run
+    # that does not fit even at the smallest batch is turned away as temporarily unavailable
+    available = memory.headroom()
+    if available is None or plan['memory_bytes'] <= available or not COST_MODELS[plan['kind']].batchable:
+        return plan
+    fitted = estimate(plan['kind'], data, available, float('inf'), batch_paths=plan['batch_paths'])
+    fitted.update(max_bytes=plan['max_bytes'], max_seconds=plan['max_seconds'])
+    if fitted['mode'] == 'rejected':
+        fitted['reason'] = f"memory headroom {available / 2**20:.0f} MiB is too low: {fitted['reason']}"
+        raise AdmissionRejected(fitted, status=503)
+    fitted['reason'] = f"memory headroom {available / 2**20:.0f} MiB"
+    if request and getattr(request, 'admission', None) is plan:
+        request.admission = fitted
+    return fitted
+
+def run_planned(runner, data, plan, progress=None):
+    plan = fit_headroom(plan, data)
+    if plan['mode'] != 'batched':
+        return runner(data, progress=progress)
+
+    # same path-weighted band averaging as the streaming routes, only the final snapshot is kept
+    model = COST_MODELS[plan['kind']]
+    total = int(data[model.paths_key])
+    batches = stream_percentile_bands(lambda paths: runner(dict(data, **{model.paths_key: paths})), total,
+                                      plan['batch_paths'], model.band_keys)
+    for done, result in batches:
+        if progress is not None:
+            progress(done / total)
+    return result
+
+def run_admitted(kind, runner, data):
+    return run_planned(runner, data, admit(kind, data))
+
+def init_app(app):
+    @app.errorhandler(AdmissionRejected)
+    def reject(e):
+        return json_response(e.estimate, e.status)
+
+    @app.after_request
+    def admission_header(response):
+        plan = getattr(request, 'admission', None)
+        if plan is not None:
+            response.headers['X-Admission-Mode'] = plan['mode']
+        return response
@@ -0,0 +1,10 @@
+# app/auth.py
+
+import hmac
+from flask import current_app, request
+
+def token_authorized(config_key, header):
+    # operator endpoints: the header must match a configured token, and an unset token disables them
+    token = current_app.config.get(config_key)
+    given = request.headers.get(header, '')
+    return bool(token) and hmac.compare_digest(given.encode(), token.encode())
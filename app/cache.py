@@ -0,0 +1,254 @@
+# app/cache.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from flask import request
+from app.serialization import negotiate
+from app.simulations import shocks
+from app.store import ResultStore
+from app.timing import current as current_timer, stage
+from app.utils import canonical_params
+
+CACHED_BLUEPRINTS = {'lending', 'stable_pool', 'non_stable_pool', 'tokenomics', 'fund_raising', 'lp_sim'}
+# server-sent event routes: a completed stream caches its final 'bands' event, which a hit replays as the whole stream
+STREAMED_ENDPOINTS = {'lp_sim.stream_lp_simulation', 'non_stable_pool.stream_non_stable_pool_simulation'}
+SSE_MIMETYPE = 'text/event-stream'
+BYPASS_FIELDS = ('noCache',)
+
+class ResultCache:
+    # LRU of serialized responses keyed on endpoint + canonical parameters + seed + response format, bounded by count, bytes and age.
+    # an optional ResultStore behind it shares results between workers and survives restarts
+    def __init__(self, max_entries=256, max_bytes=256 * 2**20, ttl=3600, store=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.store = store
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.store_hits = 0
+
+    @staticmethod
+    def key(endpoint, params, mimetype=None):
+        params = {k: v for k, v in (params or {}).items() if k not in BYPASS_FIELDS}
+        seed = params.pop('seed', None)
+        key = {'endpoint': endpoint, 'params': params, 'seed': seed, 'mimetype': mimetype, 'rng': shocks.STREAM_VERSION}
+        if shocks.fingerprint() is not None:
+            # results drawn from a shock bank are only valid for that bank
+            key['shocks'] = shocks.fingerprint()
+        payload = canonical_params(key)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.time():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+
+        stored = self.store.get(key) if self.store is not None else None
+        with self._lock:
+            if stored is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.store_hits += 1
+        arrays, meta = stored
+        body = arrays['body'].tobytes()
+        self._put_memory(key, body, meta['mimetype'])
+        return body, meta['mimetype']
+
+    def put(self, key, body, mimetype):
+        if self.store is not None:
+            self.store.put(key, {'body': np.frombuffer(body, dtype=np.uint8)}, {'mimetype': mimetype}, ttl=self.ttl)
+        self._put_memory(key, body, mimetype)
+
+    def _put_memory(self, key, body, mimetype):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + self.ttl, body, mimetype)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, body, _ = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        stats = {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'store_hits': self.store_hits,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+        if self.store is not None:
+            stats['store'] = self.store.stats()
+        return stats
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+class SingleFlight:
+    # concurrent requests for the same key wait on the first one (the leader) instead of computing again
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def join(self, key):
+        # returns (flight, is_leader)
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+            return flight, True
+
+    def finish(self, key, result=None):
+        # result is (body, mimetype), or None when the leader failed and followers have to compute for themselves
+        with self._lock:
+            flight = self._flights.pop(key, None)
+        if flight is not None:
+            flight.result = result
+            flight.done.set()
+
+    @property
+    def in_flight(self):
+        return len(self._flights)
+
+def _private():
+    # ?timing=1 and ?profile bodies describe this one run, so they are computed fresh and never stored or shared
+    timer = current_timer()
+    return bool(timer and timer.debug) or 'profile' in request.args
+
+def _bypass():
+    return (request.args.get('nocache', '').lower() in ('1', 'true', 'yes')
+            or 'no-cache' in request.headers.get('Cache-Control', '')
+            or _private()
+            or bool((request.get_json(silent=True) or {}).get('noCache')))
+
+def _cache_stream(cache, key, events):
+    # passes the events through and keeps the last 'bands' one; a stream the client abandons is never stored
+    last = None
+    try:
+        for event in events:
+            if event.startswith('event: bands'):
+                last = event
+            yield event
+        if last is not None:
+            cache.put(key, (last + event).encode(), SSE_MIMETYPE)
+    finally:
+        close = getattr(events, 'close', None)
+        if close is not None:
+            close()
+
+def init_app(app):
+    store = None
+    if app.config.get('RESULT_STORE_DIR'):
+        store = ResultStore(app.config['RESULT_STORE_DIR'], max_bytes=app.config['RESULT_STORE_MAX_BYTES'],
+                            ttl=app.config['RESULT_CACHE_TTL'])
+    cache = ResultCache(
+        max_entries=app.config['RESULT_CACHE_MAX_ENTRIES'],
+        max_bytes=app.config['RESULT_CACHE_MAX_BYTES'],
+        ttl=app.config['RESULT_CACHE_TTL'],
+        store=store
+    )
+    app.extensions['result_cache'] = cache
+    flights = SingleFlight()
+    app.extensions['single_flight'] = flights
+
+    @app.before_request
+    def serve_cached_result():
+        if request.method != 'POST' or request.blueprint not in CACHED_BLUEPRINTS:
+            return None
+        params = request.get_json(silent=True)
+        streamed = request.endpoint in STREAMED_ENDPOINTS
+        request.cache_key = cache.key(request.endpoint, params, SSE_MIMETYPE if streamed else negotiate())
+        request.cache_status = 'BYPASS' if _bypass() else 'MISS'
+
+        if request.cache_status == 'MISS':
+            with stage('cache'):
+                cached = cache.get(request.cache_key)
+            if cached is not None:
+                body, mimetype = cached
+                response = app.response_class(body, mimetype=mimetype)
+                if streamed:
+                    response.headers['Cache-Control'] = 'no-cache'
+                else:
+                    response.vary.add('Accept')
+                response.headers['X-Cache'] = 'HIT'
+                request.cache_status = 'HIT'
+                return response
+
+        # a stream's followers would wait out the whole stream, so streams never coalesce
+        if request.cache_status == 'MISS' and not streamed:
+            flight, leader = flights.join(request.cache_key)
+            if leader:
+                request.flight_key = request.cache_key
+            elif flight.done.wait(app.config['RESULT_COALESCE_TIMEOUT']) and flight.result is not None:
+                body, mimetype = flight.result
+                response = app.response_class(body, mimetype=mimetype)
+                response.vary.add('Accept')
+                response.headers['X-Cache'] = 'COALESCED'
+                request.cache_status = 'COALESCED'
+                return response
+
+        # seeded requests are reproducible, so their cached result is the result
+        shocks.seed((params or {}).get('seed'))
+        return None
+
+    @app.after_request
+    def store_result(response):
+        status = getattr(request, 'cache_status', None)
+        if status is None or status in ('HIT', 'COALESCED'):
+            return response
+        result = None
+        if response.status_code == 200 and request.endpoint in STREAMED_ENDPOINTS and not _private():
+            response.response = _cache_stream(cache, request.cache_key, response.response)
+        elif response.status_code == 200 and not response.is_streamed and not _private():
+            result = (response.get_data(), response.mimetype)
+            with stage('cache'):
+                cache.put(request.cache_key, *result)
+        if getattr(request, 'flight_key', None):
+            flights.finish(request.flight_key, result)
+        response.headers['X-Cache'] = status
+        return response
+
+    @app.teardown_request
+    def release_flight(exc=None):
+        # a leader that died before after_request must still wake its followers
+        if getattr(request, 'flight_key', None):
+            flights.finish(request.flight_key)
+        # the next request on this thread starts its own draws
+        shocks.release()
+
+    return cache
@@ -0,0 +1,174 @@
+# app/cli.py
+#
+# headless batch runner: scenario specs in the /batch format, one JSON object per line, run across a process pool
+# straight through the model runners, no HTTP. Every scenario is written to <output>/<id>.npz|.parquet and recorded
+# in <output>/manifest.jsonl; rerunning the same command skips what the manifest already holds.
+#   python -m app.cli run scenarios.jsonl results/ [--workers 4] [--format npz|parquet]
+#   python -m app.cli shocks shocks.npy [--size 16777216] [--seed 0]     # shock bank for SHOCK_BANK_PATH
+#
+#   {"id": "eth-high-vol", "model": "lp", "params": {"tokenLaunchPrice": 0.1, ...}}
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+from config import Config
+from app.serialization import flatten, pa
+from app.simulations import shocks
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - parquet output is optional, npz always works
+    pq = None
+
+FORMATS = ('npz', 'parquet')
+MANIFEST = 'manifest.jsonl'
+
+def read_scenarios(path):
+    scenarios, seen = [], set()
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            scenario = json.loads(line)
+            scenario['id'] = str(scenario.get('id', line_number))
+            if scenario['id'] in seen:
+                raise ValueError(f"duplicate scenario id '{scenario['id']}' on line {line_number}")
+            seen.add(scenario['id'])
+            scenarios.append(scenario)
+    return scenarios
+
+def filename(scenario_id, fmt):
+    # ids that are not already safe file names get a stable hash suffix so two of them never collide
+    safe = re.sub(r'[^A-Za-z0-9._-]', '_', scenario_id)
+    if safe != scenario_id:
+        safe = f"{safe[:64]}-{hashlib.sha1(scenario_id.encode()).hexdigest()[:10]}"
+    return f'{safe}.{fmt}'
+
+def completed(output):
+    # ids whose result file made it to disk; errors are retried on the next run
+    done = set()
+    path = os.path.join(output, MANIFEST)
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interrupted run
+            if entry.get('status') == 'ok' and os.path.exists(os.path.join(output, entry['file'])):
+                done.add(entry['id'])
+    return done
+
+def _write(result, path, fmt):
+    # written under a temporary name and renamed, so an interrupted run never leaves a half file behind
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    if fmt == 'npz':
+        buffer = io.BytesIO()
+        np.savez(buffer, **flatten(result))
+        with open(tmp_path, 'wb') as f:
+            f.write(buffer.getvalue())
+    else:
+        from app.serialization import arrow_batch
+        pq.write_table(pa.Table.from_batches([arrow_batch(result)]), tmp_path)
+    os.replace(tmp_path, path)
+
+def run_scenario(scenario, output, fmt):
+    # runs in a pool process: memory-heavy scenarios fall back to path batches as they do in the app,
+    # the synchronous CPU budget does not apply
+    from app.admission import estimate, run_planned
+    from app.routes.batch import BATCH_RUNNERS
+
+    if Config.SHOCK_BANK_PATH and shocks.bank() is None:
+        shocks.load(Config.SHOCK_BANK_PATH)
+
+    start = time.perf_counter()
+    entry = {'id': scenario['id'], 'model': scenario.get('model')}
+    try:
+        model, params = scenario.get('model'), scenario.get('params') or {}
+        if model not in BATCH_RUNNERS:
+            raise ValueError(f"unknown model '{model}'")
+        plan = estimate(model, params, Config.ADMISSION_MAX_BYTES, float('inf'))
+        if plan['mode'] == 'rejected':
+            raise ValueError(plan['reason'])
+        shocks.seed(params.get('seed'))
+        result = run_planned(BATCH_RUNNERS[model], params, plan)
+        entry['file'] = filename(scenario['id'], fmt)
+        _write(result, os.path.join(output, entry['file']), fmt)
+        entry.update(status='ok', mode=plan['mode'])
+    except Exception as e:
+        entry.update(status='error', error=f"{type(e).__name__}: {e}")
+    entry['seconds'] = round(time.perf_counter() - start, 3)
+    return entry
+
+def run(scenarios, output, fmt='npz', workers=None, out=sys.stderr):
+    if fmt == 'parquet' and pq is None:
+        raise SystemExit('parquet output needs pyarrow; use --format npz or install pyarrow')
+    os.makedirs(output, exist_ok=True)
+    done = completed(output)
+    pending = [s for s in scenarios if s['id'] not in done]
+    print(f"{len(scenarios)} scenarios, {len(done & {s['id'] for s in scenarios})} already done, "
+          f"{len(pending)} to run", file=out)
+
+    errors = 0
+    workers = workers or os.cpu_count() or 1
+    with open(os.path.join(output, MANIFEST), 'a') as manifest, ProcessPoolExecutor(workers) as pool:
+        # a bounded window of submitted scenarios keeps results streaming out in roughly input order
+        queue, running, finished = iter(pending), set(), 0
+        try:
+            while True:
+                for scenario in queue:
+                    running.add(pool.submit(run_scenario, scenario, output, fmt))
+                    if len(running) >= 2 * workers:
+                        break
+                if not running:
+                    break
+                ready, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in ready:
+                    entry = future.result()
+                    manifest.write(json.dumps(entry) + '\n')
+                    manifest.flush()
+                    finished += 1
+                    errors += entry['status'] != 'ok'
+                    detail = entry.get('error') or entry['file']
+                    print(f"[{finished}/{len(pending)}] {entry['id']} {entry['status']} {entry['seconds']:.2f}s {detail}",
+                          file=out)
+        except KeyboardInterrupt:
+            for future in running:
+                future.cancel()
+            print(f"interrupted after {finished} scenarios; rerun the same command to resume", file=out)
+            raise
+    return errors
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.cli', description='simulations without the server')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run a JSONL file of scenarios')
+    run_parser.add_argument('scenarios', help='JSONL file of {"id", "model", "params"} objects')
+    run_parser.add_argument('output', help='directory for the result files and manifest.jsonl')
+    run_parser.add_argument('--format', choices=FORMATS, default='npz')
+    run_parser.add_argument('--workers', type=int, help='pool processes (default: CPU count)')
+
+    shocks_parser = commands.add_parser('shocks', help='generate a shock bank')
+    shocks_parser.add_argument('path')
+    shocks_parser.add_argument('--size', type=int, default=shocks.DEFAULT_BANK_SIZE, help='number of float64 shocks')
+    shocks_parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == 'shocks':
+        shocks.generate(args.path, args.size, args.seed)
+        print(f"{args.size} shocks ({args.size * 8 / 2**20:.0f} MiB) written to {args.path}")
+        return 0
+    errors = run(read_scenarios(args.scenarios), args.output, args.format, args.workers)
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,2 +1,9 @@
 SIMULATION_DAYS = 365
-ORACLE_UPDATE_FREQUENCY = 60
\ No newline at end of file
+ORACLE_UPDATE_FREQUENCY = 60
+CHUNK_ELEMENTS = 2 ** 20  # float64 elements per (paths, days) working buffer
+STREAM_BATCH_PATHS = 1000  # paths per SSE update on the streaming routes
+MIN_BATCH_PATHS = 1000  # fewest paths in a batch whose percentile bands get averaged with others
+
+# percentile bands that stay meaningful when averaged over batches of paths
+LP_BANDS = ['price_percentiles', 'tvl_percentiles', 'il_percentiles', 'median_prices', 'median_tvl', 'median_il']
+NON_STABLE_POOL_BANDS = ['percentile_prices', 'median_prices']
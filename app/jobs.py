@@ -0,0 +1,240 @@
+# app/jobs.py
+#
+# background jobs run in a pool of processes, so the pure-Python engine loops never hold the web workers' GIL, and
+# their state lives in a SQLite table every gunicorn worker on the host shares: any worker can answer a poll, a
+# result or a cancel for a job another one submitted, and finished jobs survive a worker restart. Results are
+# pickled next to the index. Progress and cancellation go through the same table, throttled to PROGRESS_INTERVAL.
+
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from app.simulations import shocks
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner INTEGER NOT NULL,
+    pid INTEGER,
+    cancel INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, finished_at);
+"""
+
+FINISHED = ('done', 'failed', 'cancelled')
+PROGRESS_INTERVAL = 0.5
+
+class JobCancelled(Exception):
+    pass
+
+class QueueFull(Exception):
+    pass
+
+class Job:
+    # a snapshot of one row of the jobs table
+    def __init__(self, row):
+        (self.id, self.kind, self.status, self.progress, self.error, self.created_at, self.started_at,
+         self.finished_at, self.owner, self.pid, self.cancel_requested) = row
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobQueue:
+    # the pool is started on the first submit, so forked gunicorn workers each get their own; at most max_queued
+    # jobs wait across the whole host
+    def __init__(self, directory, workers=2, max_queued=16, keep_finished=256, shock_bank_path=''):
+        self.directory = directory
+        self.workers = workers
+        self.max_queued = max_queued
+        self.keep_finished = keep_finished
+        self.shock_bank_path = shock_bank_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+        os.makedirs(os.path.join(directory, 'results'), exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        # one connection per thread and per process, sqlite handles must not cross a fork
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(os.path.join(self.directory, 'jobs.sqlite'), timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def _result_path(self, job_id):
+        return os.path.join(self.directory, 'results', f'{job_id}.pickle')
+
+    def _executor(self):
+        # spawned rather than forked: a fork of a threaded web worker can inherit locks held by other threads
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def submit(self, kind, params, plan):
+        job_id = uuid.uuid4().hex
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            queued = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_queued:
+                raise QueueFull(f"job queue is full ({self.max_queued} pending)")
+            db.execute("INSERT INTO jobs (id, kind, status, created_at, owner) VALUES (?, ?, 'queued', ?, ?)",
+                       (job_id, kind, time.time(), os.getpid()))
+            stale = self._evict(db)
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        for stale_id in stale:
+            self._remove_result(stale_id)
+        self._executor().submit(run_job, self.directory, job_id, kind, params, plan, self.shock_bank_path)
+        return self.get(job_id)
+
+    def get(self, job_id):
+        row = self._connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = Job(row)
+        # a job whose process (running) or submitting worker (queued) is gone will never finish
+        if job.status == 'running' and job.pid and not _alive(job.pid):
+            self.end(job_id, 'failed', 'job process exited')
+            return self.get(job_id)
+        if job.status == 'queued' and not _alive(job.owner):
+            self.end(job_id, 'failed', 'worker exited before the job ran')
+            return self.get(job_id)
+        return job
+
+    def result(self, job_id):
+        with open(self._result_path(job_id), 'rb') as f:
+            return pickle.load(f)
+
+    def cancel(self, job_id):
+        db = self._connect()
+        now = time.time()
+        db.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                   (now, job_id))
+        db.execute("UPDATE jobs SET cancel = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        return self.get(job_id)
+
+    def _evict(self, db):
+        # keep the newest keep_finished finished jobs
+        ids = [row[0] for row in db.execute(
+            f"SELECT id FROM jobs WHERE status IN {FINISHED} ORDER BY finished_at DESC LIMIT -1 OFFSET ?",
+            (self.keep_finished,))]
+        db.executemany('DELETE FROM jobs WHERE id = ?', [(job_id,) for job_id in ids])
+        return ids
+
+    def _remove_result(self, job_id):
+        try:
+            os.remove(self._result_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    # called from the pool processes
+
+    def start(self, job_id):
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = 'running', started_at = ?, pid = ? WHERE id = ? AND status = 'queued'",
+            (time.time(), os.getpid(), job_id))
+        return cursor.rowcount == 1
+
+    def report(self, job_id, fraction):
+        # stores progress and returns whether the job has been cancelled
+        db = self._connect()
+        db.execute('UPDATE jobs SET progress = ? WHERE id = ?', (min(max(float(fraction), 0.0), 1.0), job_id))
+        return bool(db.execute('SELECT cancel FROM jobs WHERE id = ?', (job_id,)).fetchone()[0])
+
+    def finish(self, job_id, result):
+        # the result file is in place before the row says done
+        path = self._result_path(job_id)
+        with open(f'{path}.{os.getpid()}.tmp', 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f'{path}.{os.getpid()}.tmp', path)
+        self.end(job_id, 'done')
+
+    def end(self, job_id, status, error=None):
+        progress = ', progress = 1' if status == 'done' else ''
+        self._connect().execute(
+            f"UPDATE jobs SET status = ?, error = ?, finished_at = ?{progress} WHERE id = ? AND status NOT IN {FINISHED}",
+            (status, error, time.time(), job_id))
+
+class Progress:
+    # the engines' progress callback inside a job; also the cooperative cancellation point
+    def __init__(self, jobs, job_id):
+        self.jobs = jobs
+        self.job_id = job_id
+        self._last = 0.0
+
+    def __call__(self, fraction):
+        now = time.monotonic()
+        if now - self._last < PROGRESS_INTERVAL:
+            return
+        self._last = now
+        if self.jobs.report(self.job_id, fraction):
+            raise JobCancelled()
+
+_queues = {}
+
+def run_job(directory, job_id, kind, params, plan, shock_bank_path):
+    # runs in a pool process; the job seeds its own streams, so a seeded job gives the synchronous result
+    from app.admission import run_planned
+    from app.routes.jobs import JOB_RUNNERS
+
+    if shock_bank_path and shocks.bank() is None:
+        shocks.load(shock_bank_path)
+    jobs = _queues.get(directory)
+    if jobs is None:
+        jobs = _queues[directory] = JobQueue(directory)
+    if not jobs.start(job_id):
+        return  # cancelled while queued
+    try:
+        shocks.seed((params or {}).get('seed'))
+        jobs.finish(job_id, run_planned(JOB_RUNNERS[kind], params, plan, progress=Progress(jobs, job_id)))
+    except JobCancelled:
+        jobs.end(job_id, 'cancelled')
+    except Exception as e:
+        jobs.end(job_id, 'failed', f"{type(e).__name__}: {e}")
+        traceback.print_exc()
+    finally:
+        shocks.release()
@@ -0,0 +1,167 @@
+# app/memory.py
+
+import json
+import logging
+import os
+import resource
+import threading
+import time
+import tracemalloc
+from flask import request
+
+MEMORY_MODES = ('rss', 'tracemalloc')
+
+_local = threading.local()
+
+def rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # peak rather than current, but the best we have off Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class MemoryMeter:
+    # peak memory of one request over what the process held when it started. Both modes see the whole process,
+    # so with several requests in flight the peak is an upper bound; overlap counts how many ran alongside.
+    # tracemalloc is exact for one request at a time (gunicorn --threads 1) but slows allocation-heavy code
+    def __init__(self, mode, budget, worker_limit):
+        self.mode = mode
+        self.budget = budget
+        self.worker_limit = worker_limit
+        self.start = self._current()
+        self.peak = self.start
+        self.overlap = 0
+
+    def _current(self):
+        if self.mode == 'tracemalloc':
+            return tracemalloc.get_traced_memory()[0]
+        return rss()
+
+    def sample(self, value=None):
+        value = self._current() if value is None else value
+        if value > self.peak:
+            self.peak = value
+        return value
+
+    def finish(self):
+        if self.mode == 'tracemalloc':
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        else:
+            self.sample()
+        return self.peak - self.start
+
+    def headroom(self):
+        # bytes this request may still allocate: its own budget, capped by what keeps the worker under its limit
+        current = self.sample()
+        available = self.budget - max(current - self.start, 0)
+        if self.worker_limit:
+            available = min(available, self.worker_limit - (rss() if self.mode == 'tracemalloc' else current))
+        return max(available, 0)
+
+class Sampler:
+    # one daemon thread per process refreshing the peak of every in-flight meter; RSS mode only, tracemalloc
+    # keeps its own peak
+    def __init__(self, interval):
+        self.interval = interval
+        self.meters = set()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def add(self, meter):
+        with self._lock:
+            for other in self.meters:
+                other.overlap += 1
+                meter.overlap += 1
+            self.meters.add(meter)
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._loop, daemon=True).start()
+
+    def remove(self, meter):
+        with self._lock:
+            self.meters.discard(meter)
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                meters = [m for m in self.meters if m.mode == 'rss']
+            if meters:
+                value = rss()
+                for meter in meters:
+                    meter.sample(value)
+
+def current():
+    return getattr(_local, 'meter', None)
+
+def headroom():
+    # None outside a tracked request, so engines can ask unconditionally
+    meter = getattr(_local, 'meter', None)
+    return None if meter is None else meter.headroom()
+
+def chunk_elements(default, bytes_per_element):
+    # working-buffer size for chunked engines: the default block, or less when the request is short of memory
+    available = headroom()
+    if available is None:
+        return default
+    return max(1, min(default, available // bytes_per_element))
+
+def sample():
+    meter = getattr(_local, 'meter', None)
+    if meter is not None:
+        meter.sample()
+
+def init_app(app):
+    # registered right after the timer so the meter spans the cache, admission and the view
+    mode = app.config.get('MEMORY_TRACKING')
+    if not mode:
+        return None
+    if mode not in MEMORY_MODES:
+        raise ValueError(f"MEMORY_TRACKING must be one of {', '.join(MEMORY_MODES)}, got {mode!r}")
+    if mode == 'tracemalloc' and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if app.logger.level == logging.NOTSET:
+        app.logger.setLevel(logging.INFO)
+    sampler = Sampler(app.config['MEMORY_SAMPLE_INTERVAL'])
+    app.extensions['memory'] = sampler
+
+    @app.before_request
+    def start_meter():
+        if mode == 'tracemalloc':
+            tracemalloc.reset_peak()
+        _local.meter = MemoryMeter(mode, app.config['MEMORY_REQUEST_BUDGET'], app.config['MEMORY_WORKER_LIMIT'])
+        sampler.add(_local.meter)
+
+    @app.after_request
+    def memory_header(response):
+        meter = current()
+        if meter is not None and not response.is_streamed:
+            response.headers['X-Memory-Peak'] = str(meter.finish())
+        return response
+
+    @app.teardown_request
+    def log_memory(exc=None):
+        # streamed responses are logged once the stream has closed, so the peak covers every batch
+        meter = current()
+        _local.meter = None
+        if meter is None:
+            return
+        sampler.remove(meter)
+        if request.method != 'POST':
+            return
+        peak = meter.finish()
+        plan = getattr(request, 'admission', None)
+        entry = {
+            'endpoint': request.endpoint,
+            'peak_bytes': peak,
+            'start_bytes': meter.start,
+            'estimated_bytes': plan['memory_bytes'] if plan else None,
+            'mode': plan['mode'] if plan else None,
+            'overlap': meter.overlap,
+            'params': request.get_json(silent=True)
+        }
+        level = logging.WARNING if peak > meter.budget else logging.INFO
+        app.logger.log(level, 'request memory %s', json.dumps(entry, default=str, separators=(',', ':')))
+
+    return sampler
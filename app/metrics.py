@@ -0,0 +1,198 @@
+# app/metrics.py
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import request
+from app.memory import rss
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float('inf'))
+
+METRICS = {
+    'uzl_requests_total': ('counter', 'Requests handled, by endpoint, method and status.'),
+    'uzl_request_duration_seconds': ('histogram', 'Wall-clock time until the response is returned, by endpoint.'),
+    'uzl_request_cpu_seconds_total': ('counter', 'CPU time of the thread handling the request, by endpoint.'),
+    'uzl_response_bytes_total': ('counter', 'Response body bytes (streamed responses excluded), by endpoint.'),
+    'uzl_path_steps_total': ('counter', 'Simulated path-steps of admitted runs, by endpoint; rate() gives steps/s.'),
+    'uzl_cache_requests_total': ('counter', 'Cacheable requests by X-Cache outcome.'),
+    'uzl_worker_rss_bytes': ('gauge', 'Resident set size of each live worker process.')
+}
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _escape(value):
+    # label values in the text format escape backslash, double quote and line feed
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(labels):
+    return ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+
+def clear(directory):
+    # drops every worker snapshot; the server calls it once at start-up, before any worker runs, so the host totals
+    # start from zero with each deployment instead of summing every earlier one
+    if not directory or not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.endswith('.json') or name.endswith('.tmp'):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+class Metrics:
+    # per-process counters and histograms, updated under one lock. With a directory, a background thread in each
+    # worker snapshots it to <dir>/<pid>.json at most every flush_interval seconds and collect() sums every
+    # worker's snapshot, so a scrape of any worker reports the whole host
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._flusher_pid = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # per-bucket counts, then sum and count
+                histogram = self._histograms[key] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+            histogram[bisect_left(LATENCY_BUCKETS, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'counters': [[name, labels, value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, labels, list(h)] for (name, labels), h in self._histograms.items()],
+                'rss': rss()
+            }
+
+    def touch(self):
+        # the flusher starts lazily so every forked worker gets its own
+        self._dirty = True
+        if self.directory and self._flusher_pid != os.getpid():
+            with self._lock:
+                if self._flusher_pid != os.getpid():
+                    self._flusher_pid = os.getpid()
+                    threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self._dirty:
+                self._dirty = False
+                self.flush()
+
+    def flush(self):
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        snapshots = [self.snapshot()]
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if not name.endswith('.json') or name == f'{os.getpid()}.json':
+                    continue
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+
+        # counters of workers that exited since the server started stay in the totals so they never go backwards;
+        # only live workers report RSS
+        counters, histograms, rss = {}, {}, {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    merged[i] += value
+            if snapshot['pid'] == os.getpid() or _alive(snapshot['pid']):
+                rss[snapshot['pid']] = snapshot['rss']
+        return counters, histograms, rss
+
+    def render(self):
+        # Prometheus text exposition format 0.0.4
+        counters, histograms, rss = self.collect()
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{{{_labels(labels)}}} {value}')
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for le, count in zip(LATENCY_BUCKETS, values):
+                    cumulative += count
+                    bucket = _labels(labels + (('le', '+Inf' if le == float('inf') else le),))
+                    lines.append(f'{name}_bucket{{{bucket}}} {cumulative}')
+                lines.append(f'{name}_sum{{{_labels(labels)}}} {values[-2]}')
+                lines.append(f'{name}_count{{{_labels(labels)}}} {values[-1]}')
+            if name == 'uzl_worker_rss_bytes':
+                lines += [f'{name}{{pid="{pid}"}} {value}' for pid, value in sorted(rss.items())]
+        return '\n'.join(lines) + '\n'
+
+def init_app(app):
+    # registered before the cache so its timer also covers requests the cache answers early
+    metrics = Metrics(app.config.get('METRICS_DIR'), app.config['METRICS_FLUSH_INTERVAL'])
+    app.extensions['metrics'] = metrics
+
+    @app.before_request
+    def start_timer():
+        request.metrics_start = (time.perf_counter(), time.thread_time())
+
+    @app.after_request
+    def record_request(response):
+        start = getattr(request, 'metrics_start', None)
+        if start is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        labels = {'endpoint': endpoint}
+        metrics.inc('uzl_requests_total', {'endpoint': endpoint, 'method': request.method,
+                                           'status': str(response.status_code)})
+        metrics.observe('uzl_request_duration_seconds', labels, time.perf_counter() - start[0])
+        metrics.inc('uzl_request_cpu_seconds_total', labels, time.thread_time() - start[1])
+        if not response.is_streamed:
+            metrics.inc('uzl_response_bytes_total', labels, response.content_length or 0)
+
+        plan = getattr(request, 'admission', None)
+        if plan is not None and response.status_code == 200:
+            metrics.inc('uzl_path_steps_total', labels, plan['path_steps'])
+        if 'X-Cache' in response.headers:
+            metrics.inc('uzl_cache_requests_total', {'endpoint': endpoint, 'status': response.headers['X-Cache']})
+        metrics.touch()
+        return response
+
+    return metrics
@@ -0,0 +1,111 @@
+# app/models/amm.py
+
+import numpy as np
+from app.simulations.shocks import path_normals
+
+def constant_product_formula(x, y, dx):
+    k = x * y
+    dy = y - k / (x + dx)
+    return dy
+
+def calculate_price_impact(x, y, dx):
+    dy = constant_product_formula(x, y, dx)
+    initial_price = y / x
+    final_price = (y - dy) / (x + dx)
+    return (final_price - initial_price) / initial_price
+
+class ConstantProductPool:
+    # x * y = k pool tracked for every path at once; x is the token, y the pair asset, prices are y per x.
+    # fees are taken from the input amount and held outside the reserves, so k only moves on trades.
+    def __init__(self, token_reserve, pair_reserve, paths, fee=0.003):
+        self.x = np.full(paths, token_reserve, dtype=float)
+        self.y = np.full(paths, pair_reserve, dtype=float)
+        self.initial_x = token_reserve
+        self.initial_y = pair_reserve
+        self.fee = fee
+        self.fees_x = np.zeros(paths)
+        self.fees_y = np.zeros(paths)
+        # the noise flow's shocks, reserved on the first run so every later block of days continues the same paths
+        self.flow_shocks = None
+
+    @property
+    def k(self):
+        return self.x * self.y
+
+    @property
+    def price(self):
+        return self.y / self.x
+
+    def _move_to(self, target_price):
+        k = self.k
+        new_x = np.sqrt(k / target_price)
+        new_y = np.sqrt(k * target_price)
+
+        # whichever reserve grows was the input side of the trade
+        dx_in = np.maximum(new_x - self.x, 0)
+        dy_in = np.maximum(new_y - self.y, 0)
+        self.fees_x += dx_in * self.fee / (1 - self.fee)
+        self.fees_y += dy_in * self.fee / (1 - self.fee)
+        self.x, self.y = new_x, new_y
+
+    def arbitrage(self, external_price):
+        # arbitrageurs trade until the pool price is inside the no-arbitrage band around the external price
+        band_low = external_price * (1 - self.fee)
+        band_high = external_price / (1 - self.fee)
+        self._move_to(np.clip(self.price, band_low, band_high))
+
+    def swap(self, flow, external_price):
+        # flow is signed trade size in pair units: > 0 buys the token with y, < 0 sells the token for y
+        buy = flow > 0
+        gross_y = np.where(buy, flow, 0.0)
+        gross_x = np.where(buy, 0.0, -flow / external_price)
+        self.fees_y += gross_y * self.fee
+        self.fees_x += gross_x * self.fee
+
+        # the input side grows by the net amount, the output side comes off the curve
+        k = self.k
+        new_x = self.x + gross_x * (1 - self.fee)
+        new_y = self.y + gross_y * (1 - self.fee)
+        self.x = np.where(buy, k / new_y, new_x)
+        self.y = np.where(buy, new_y, k / new_x)
+
+    def step(self, external_price, flow=None):
+        self.arbitrage(external_price)
+        if flow is not None:
+            # noise flow pushes the pool off price, arbitrage pulls it back and pays fees on the way
+            self.swap(flow, external_price)
+            self.arbitrage(external_price)
+
+    def value(self, external_price):
+        return self.x * external_price + self.y
+
+    def fee_value(self, external_price):
+        return self.fees_x * external_price + self.fees_y
+
+    def hodl_value(self, external_price):
+        return self.initial_x * external_price + self.initial_y
+
+    def impermanent_loss(self, external_price):
+        return self.value(external_price) / self.hodl_value(external_price) - 1
+
+    def run(self, prices, daily_volume=0.0, tvl_out=None, il_out=None):
+        # steps every path through a (paths, days) block of external prices, recording TVL (incl. fees) and IL
+        paths, days = prices.shape
+        tvl_out = np.empty_like(prices) if tvl_out is None else tvl_out
+        il_out = np.empty_like(prices) if il_out is None else il_out
+        shocks = None
+        if daily_volume > 0:
+            if self.flow_shocks is None:
+                self.flow_shocks = path_normals('amm', paths)
+            shocks = self.flow_shocks.normals(days)
+
+        for day in range(days):
+            price = prices[:, day]
+            flow = None
+            if shocks is not None:
+                flow = shocks[:, day] * daily_volume * self.value(price)
+            self.step(price, flow)
+
+            tvl_out[:, day] = self.value(price) + self.fee_value(price)
+            il_out[:, day] = self.impermanent_loss(price)
+        return tvl_out, il_out
@@ -0,0 +1,105 @@
+# app/models/concentrated_liquidity.py
+
+import numpy as np
+
+TICK_BASE = 1.0001
+
+def price_to_tick(price, tick_spacing=1):
+    ticks = np.floor(np.log(price) / np.log(TICK_BASE) / tick_spacing) * tick_spacing
+    return ticks.astype(np.int64)
+
+def tick_to_sqrt_price(tick):
+    return TICK_BASE ** (np.asarray(tick, dtype=float) / 2)
+
+class TickIndex:
+    # sorted sqrt-price boundaries of every position plus a lookup table of which positions are
+    # in range between each pair of neighbouring boundaries, built once per set of positions
+    def __init__(self, lower_ticks, upper_ticks):
+        self.ticks = np.unique(np.concatenate([lower_ticks, upper_ticks]))
+        self.sqrt_boundaries = tick_to_sqrt_price(self.ticks)
+
+        lower_idx = np.searchsorted(self.ticks, lower_ticks)
+        upper_idx = np.searchsorted(self.ticks, upper_ticks)
+        segments = np.arange(len(self.ticks) + 1)[:, None]
+        self.active = (segments > lower_idx) & (segments <= upper_idx)  # (segments, positions)
+
+    def locate(self, sqrt_prices):
+        return np.searchsorted(self.sqrt_boundaries, sqrt_prices, side='right')
+
+    def in_range(self, sqrt_prices):
+        return self.active[self.locate(sqrt_prices)]
+
+class ConcentratedLiquidityPositions:
+    # many range positions valued over (paths, days) price blocks; prices are pair units per token
+    def __init__(self, lower_prices, upper_prices, capital, initial_price, fee=0.003, tick_spacing=60,
+                 external_liquidity=0.0):
+        lower_ticks = price_to_tick(np.atleast_1d(np.asarray(lower_prices, dtype=float)), tick_spacing)
+        upper_ticks = price_to_tick(np.atleast_1d(np.asarray(upper_prices, dtype=float)), tick_spacing)
+        upper_ticks = np.maximum(upper_ticks, lower_ticks + tick_spacing)
+
+        self.index = TickIndex(lower_ticks, upper_ticks)
+        self.sqrt_lower = tick_to_sqrt_price(lower_ticks)
+        self.sqrt_upper = tick_to_sqrt_price(upper_ticks)
+        self.fee = fee
+        self.external_liquidity = external_liquidity
+
+        # liquidity that the given capital buys at the initial price
+        capital = np.broadcast_to(np.asarray(capital, dtype=float), self.sqrt_lower.shape)
+        unit_x, unit_y = self._unit_amounts(np.sqrt(initial_price))
+        self.liquidity = capital / (unit_x * initial_price + unit_y)
+        self.initial_x = self.liquidity * unit_x
+        self.initial_y = self.liquidity * unit_y
+        self.fees = None
+
+    @property
+    def num_positions(self):
+        return len(self.liquidity)
+
+    def _unit_amounts(self, sqrt_price):
+        # token / pair amounts per unit of liquidity, sqrt_price broadcasts against positions on the last axis
+        sqrt_price = np.clip(np.asarray(sqrt_price)[..., None], self.sqrt_lower, self.sqrt_upper)
+        return 1 / sqrt_price - 1 / self.sqrt_upper, sqrt_price - self.sqrt_lower
+
+    def amounts(self, prices):
+        unit_x, unit_y = self._unit_amounts(np.sqrt(prices))
+        return self.liquidity * unit_x, self.liquidity * unit_y
+
+    def value(self, prices):
+        x, y = self.amounts(prices)
+        return x * np.asarray(prices)[..., None] + y
+
+    def hodl_value(self, prices):
+        return self.initial_x * np.asarray(prices)[..., None] + self.initial_y
+
+    def impermanent_loss(self, prices):
+        return self.value(prices) / self.hodl_value(prices) - 1
+
+    def in_range(self, prices):
+        return self.index.in_range(np.sqrt(prices))
+
+    def fee_income(self, prices, volume):
+        # in-range positions split the fees on volume pro rata to liquidity with any outside liquidity
+        active_liquidity = self.in_range(prices) * self.liquidity
+        total_liquidity = active_liquidity.sum(axis=-1, keepdims=True) + self.external_liquidity
+        share = np.divide(active_liquidity, total_liquidity, out=np.zeros_like(active_liquidity),
+                          where=total_liquidity > 0)
+        return np.asarray(volume)[..., None] * self.fee * share
+
+    def run(self, prices, daily_volume=0.0):
+        # (paths, days) price block -> (paths, days, positions) value, IL and cumulative fees;
+        # accrued fees carry over between successive blocks of the same paths
+        paths = prices.shape[0]
+        if self.fees is None:
+            self.fees = np.zeros((paths, self.num_positions))
+
+        volume = daily_volume * (self.initial_x.sum() * prices + self.initial_y.sum())
+        fees = np.cumsum(self.fee_income(prices, volume), axis=1)
+        fees += self.fees[:, None, :]
+        self.fees = fees[:, -1, :].copy()
+
+        value = self.value(prices)
+        return {
+            'value': value,
+            'il': value / self.hodl_value(prices) - 1,
+            'fees': fees
+        }
@@ -1,8 +1,10 @@
 # app/models/fund_raising.py
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from app.models.supply import get_vesting_timeline
 
 class FundRaising:
     def __init__(self, allocation_data, vesting_data, airdrop_module, initial_total_supply, public_sale_valuation):
@@ -30,37 +32,17 @@ class FundRaising:
         return fig
 
     def generate_vesting_chart(self):
-        start_date = self.vesting_data['vestingStart'].min()
-        end_date = (pd.to_datetime(start_date) + pd.Timedelta(days=365*4)).strftime('%Y-%m-%d')
-        date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-        
-        vesting_data = pd.DataFrame(index=date_range)
-        
-        for _, row in self.vesting_data.iterrows():
-            vesting_start = pd.to_datetime(row['vestingStart'])
-            cliff = pd.Timedelta(days=30 * row['cliff'])
-            vesting_period = pd.Timedelta(days=30 * row['vestingPeriod'])
-            vesting_end = vesting_start + cliff + vesting_period
-            
-            if row['tgeUnlock'] > 0:
-                vesting_data.loc[vesting_start, row['allocation']] = row['tokens'] * row['tgeUnlock'] / 100
-            
-            vesting_days = (vesting_end - (vesting_start + cliff)).days
-            daily_vesting = (row['tokens'] * (100 - row['tgeUnlock']) / 100) / vesting_days if vesting_days > 0 else 0
-            
-            for day in range((cliff + pd.Timedelta(days=1)).days, (vesting_period + cliff).days + 1):
-                current_date = vesting_start + pd.Timedelta(days=day)
-                if current_date <= vesting_end:
-                    vesting_data.loc[current_date, row['allocation']] = daily_vesting
-        
-        # add airdrop #2 data
-        airdrop_dates = [self.airdrop_module['date1'], self.airdrop_module['date2'], self.airdrop_module['date3']]
-        airdrop_amounts = [self.airdrop_module['amount1'], self.airdrop_module['amount2'], self.airdrop_module['amount3']]
-        for date, amount in zip(airdrop_dates, airdrop_amounts):
-            if pd.notna(date) and amount > 0:
-                vesting_data.loc[date, 'Airdrop #2'] = self.airdrop_module['tokens'] * amount / 100
-        
-        vesting_data = vesting_data.fillna(0).cumsum()
+        timeline = get_vesting_timeline(self.vesting_data, self.airdrop_module)
+        vesting_data = pd.DataFrame(timeline.increments * timeline.allocation_tokens, index=timeline.dates,
+                                    columns=timeline.allocations)
+        # airdrop #2 unlocks land in the 'Airdrop #2' trace, added after the allocations when there is no such row
+        if timeline.has_airdrops:
+            airdrops = timeline.airdrops * timeline.airdrop_tokens
+            if 'Airdrop #2' in vesting_data:
+                vesting_data['Airdrop #2'] += airdrops
+            else:
+                vesting_data['Airdrop #2'] = airdrops
+        vesting_data = vesting_data.cumsum()
         
         # cap vesting data at initial total supply
         vesting_data = vesting_data.clip(upper=self.initial_total_supply)
@@ -98,6 +80,37 @@ class FundRaising:
         
         return fig
 
+    def run_scenario_grid(self, public_sale_valuations, initial_total_supplies, allocation_percentages=None):
+        # valuations (V,), supplies (S,), allocation percentage sets (A, allocations) -> (V, S, A, ...) tensors
+        timeline = get_vesting_timeline(self.vesting_data, self.airdrop_module)
+        allocations = timeline.allocations
+
+        valuations = np.asarray(public_sale_valuations, dtype=float).reshape(-1)
+        supplies = np.asarray(initial_total_supplies, dtype=float).reshape(-1)
+        if allocation_percentages is None:
+            percentages = self.allocation_data.set_index('allocation')['percentage']
+            allocation_percentages = [[percentages.get(a, 0) for a in allocations]]
+        percentages = np.asarray(allocation_percentages, dtype=float).reshape(-1, len(allocations))
+
+        tokens = supplies[:, None, None] * percentages[None, :, :] / 100  # (S, A, allocations)
+        circulating_supply = timeline.circulating(tokens)  # (S, A, days)
+
+        public_sale_tokens = tokens[:, :, allocations.index('Public Sale')]
+        with np.errstate(divide='ignore'):
+            token_price = valuations[:, None, None] / public_sale_tokens[None, :, :]  # (V, S, A)
+        implied_market_cap = token_price * supplies[None, :, None]
+        circulating_market_cap = token_price[..., None] * circulating_supply[None]  # (V, S, A, days)
+
+        return {
+            'dates': timeline.dates,
+            'allocations': allocations,
+            'unlock_fractions': timeline.fractions,
+            'token_price': token_price,
+            'implied_market_cap': implied_market_cap,
+            'circulating_supply': circulating_supply,
+            'circulating_market_cap': circulating_market_cap
+        }
+
     def generate_charts(self):
         return {
             'pie_chart': self.generate_pie_chart().to_json(),
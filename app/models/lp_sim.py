@@ -1,12 +1,106 @@
 import numpy as np
-from app.simulations.gbm import geometric_brownian_motion
+from app.simulations.gbm import correlated_geometric_brownian_motion_chunks
+from app.models.amm import ConstantProductPool
+from app.models.concentrated_liquidity import ConcentratedLiquidityPositions
+from app.timing import stage
 
-def calculate_il(price_ratio):
-    return 2 * np.sqrt(price_ratio) / (1 + price_ratio) - 1
+PERCENTILES = [5, 25, 50, 75, 95]
+
+def calculate_il(price_ratio, out=None, scratch=None):
+    if out is None:
+        return 2 * np.sqrt(price_ratio) / (1 + price_ratio) - 1
+    # in-place variant for preallocated buffers; out may alias price_ratio
+    scratch = np.sqrt(price_ratio, out=scratch)
+    np.add(price_ratio, 1, out=out)
+    np.divide(scratch, out, out=out)
+    out *= 2
+    out -= 1
+    return out
+
+POOL_MODELS = ('static', 'constant_product', 'concentrated')
+
+# portfolio request keys of one pool -> LPPool arguments
+POOL_FIELDS = {
+    'lpPoolAllocation': 'lp_pool_allocation',
+    'poolModel': 'pool_model',
+    'swapFee': 'swap_fee',
+    'dailyVolume': 'daily_volume',
+    'rangeLower': 'range_lower',
+    'rangeUpper': 'range_upper'
+}
+
+def portfolio_pools(pools, default_model='static'):
+    # per-pool settings of a portfolio request. Unknown keys are an error rather than a silent fallback to the
+    # top-level settings, and static pools value the pair side differently (see LPPool), so they are not summed
+    # with the rebalancing models
+    parsed = []
+    for i, pool in enumerate(pools):
+        unknown = sorted(set(pool) - set(POOL_FIELDS))
+        if unknown:
+            raise ValueError(f"pool {i}: unknown field(s) {', '.join(unknown)}; expected {', '.join(POOL_FIELDS)}")
+        parsed.append({POOL_FIELDS[k]: v for k, v in pool.items()})
+    models = {pool.get('pool_model', default_model) for pool in parsed}
+    if 'static' in models and len(models) > 1:
+        raise ValueError("static pools cannot be combined with constant_product or concentrated pools in one portfolio")
+    return parsed
+
+class LPPool:
+    # one LP position valued against token / pair (ETH) price blocks that may be shared with other pools.
+    # 'static' values fixed token amounts, 'constant_product' rebalances reserves through an x*y=k pool,
+    # 'concentrated' holds a single range position between range_lower and range_upper x launch price
+    def __init__(self, lp_pool_allocation, token_launch_price, pair_price, paths, pool_model='static',
+                 swap_fee=0.003, daily_volume=0.0, range_lower=0.5, range_upper=2.0):
+        if pool_model not in POOL_MODELS:
+            raise ValueError(f"unknown pool model '{pool_model}'")
+        self.lp_pool_allocation = lp_pool_allocation
+        self.token_launch_price = token_launch_price
+        self.pair_price = pair_price
+        self.pool_model = pool_model
+        self.daily_volume = daily_volume
+
+        self.token_amount = lp_pool_allocation / token_launch_price
+        # static keeps the original model's pair side: lp_pool_allocation pair tokens, worth allocation x pair_price,
+        # where the rebalancing pools below hold lp_pool_allocation of value on each side
+        self.pair_amount = lp_pool_allocation
+
+        # rebalancing pools run in pair units (ETH per token) and hold equal value on both sides
+        launch_ratio = token_launch_price / pair_price
+        self.engine = None
+        if pool_model == 'constant_product':
+            self.engine = ConstantProductPool(self.token_amount, lp_pool_allocation / pair_price, paths, swap_fee)
+        elif pool_model == 'concentrated':
+            self.engine = ConcentratedLiquidityPositions(
+                range_lower * launch_ratio, range_upper * launch_ratio,
+                lp_pool_allocation * 2 / pair_price, launch_ratio, fee=swap_fee
+            )
+
+    def value(self, token_prices, pair_prices, tvl_out, il_out, scratch):
+        if self.pool_model == 'static':
+            np.multiply(token_prices, self.token_amount, out=tvl_out)
+            np.multiply(pair_prices, self.pair_amount, out=scratch)
+            tvl_out += scratch
+
+            # IL depends on the token / pair price ratio relative to launch
+            np.divide(token_prices, self.token_launch_price, out=il_out)
+            np.divide(pair_prices, self.pair_price, out=scratch)
+            il_out /= scratch
+            calculate_il(il_out, out=il_out, scratch=scratch)
+            return
+
+        np.divide(token_prices, pair_prices, out=scratch)
+        if self.pool_model == 'constant_product':
+            self.engine.run(scratch, self.daily_volume, tvl_out=tvl_out, il_out=il_out)
+        else:
+            position = self.engine.run(scratch, self.daily_volume)
+            np.add(position['value'][..., 0], position['fees'][..., 0], out=tvl_out)
+            il_out[...] = position['il'][..., 0]
+        tvl_out *= pair_prices
 
 class LPSimulation:
     def __init__(self, token_launch_price, lp_pool_allocation, initial_total_supply, simulation_days, mu, sigma, paths,
-                 token_adoption_velocity, avg_token_utility_allocation, avg_token_holding, avg_token_sell):
+                 token_adoption_velocity, avg_token_utility_allocation, avg_token_holding, avg_token_sell, supply_timeline=None,
+                 pool_model='static', swap_fee=0.003, daily_volume=0.0, range_lower=0.5, range_upper=2.0,
+                 pair_price=3750, pair_mu=0.0, pair_sigma=0.0, correlation=0.0):
         self.token_launch_price = token_launch_price
         self.lp_pool_allocation = lp_pool_allocation
         self.initial_total_supply = initial_total_supply
@@ -15,11 +109,14 @@ class LPSimulation:
         self.sigma = sigma
         self.paths = paths
         
-        # ETH parameters
+        # ETH parameters; the pair follows its own GBM correlated with the token (flat by default)
         self.token_lp_weighting = 0.50
         self.lp_pairing_token2_ticker = "ETH"
-        self.lp_pairing_token2_price = 3750
+        self.lp_pairing_token2_price = pair_price
         self.initial_lp_pairing_token2_amount = self.lp_pairing_token2_price * self.lp_pool_allocation
+        self.pair_mu = pair_mu
+        self.pair_sigma = pair_sigma
+        self.correlation = correlation
         
         # token holder Assumptions
         # also fix holder assumptions
@@ -28,40 +125,109 @@ class LPSimulation:
         self.avg_token_holding = avg_token_holding / 100
         self.avg_token_sell = avg_token_sell / 100
 
-    def simulate(self):
-        initial_market_cap = self.initial_total_supply * self.token_launch_price
-        initial_liquidity = self.lp_pool_allocation * 2  # Assuming equal value of both tokens in the pool
+        # optional shared unlock schedule; without one the full supply is treated as circulating
+        self.supply_timeline = supply_timeline
 
-        prices = geometric_brownian_motion(self.token_launch_price, self.mu, self.sigma, self.simulation_days/365, self.simulation_days, self.paths)
-        
-        initial_token_amount = self.lp_pool_allocation / self.token_launch_price
-        initial_eth_amount = self.initial_lp_pairing_token2_amount / self.lp_pairing_token2_price
-        
-        tvl = prices * initial_token_amount + initial_eth_amount * self.lp_pairing_token2_price
-        il = calculate_il(prices / self.token_launch_price)
-        
+        if pool_model not in POOL_MODELS:
+            raise ValueError(f"unknown pool model '{pool_model}'")
+        self.pool = {
+            'lp_pool_allocation': lp_pool_allocation,
+            'pool_model': pool_model,
+            'swap_fee': swap_fee,
+            'daily_volume': daily_volume,
+            'range_lower': range_lower,
+            'range_upper': range_upper
+        }
+
+    def circulating_supply(self):
+        if self.supply_timeline is None:
+            return np.full(self.simulation_days, self.initial_total_supply)
+        # hold the last scheduled value past the end of the timeline
+        days = np.minimum(np.arange(self.simulation_days), self.supply_timeline.num_days - 1)
+        circulating = self.supply_timeline.circulating()[days]
+        return np.minimum(circulating, self.initial_total_supply)
+
+    def price_factor(self):
         # apply token holder assumptions to adjust prices
         # TO DO: apply LP pool token ratio toggle
         # what other charts do we need here?
         adoption_factor = 1 + (self.token_adoption_velocity * self.simulation_days / 365)
         utility_factor = 1 + self.avg_token_utility_allocation
         holding_factor = 1 + self.avg_token_holding
-        sell_factor = 1 - self.avg_token_sell
-        
-        adjusted_prices = prices * adoption_factor * utility_factor * holding_factor * sell_factor
-        
-        percentiles = [5, 25, 50, 75, 95]
-        price_percentiles = np.percentile(adjusted_prices, percentiles, axis=0)
-        tvl_percentiles = np.percentile(tvl, percentiles, axis=0)
-        il_percentiles = np.percentile(il, percentiles, axis=0)
-        
+        # sell pressure scales with the share of supply that has unlocked
+        sell_factor = 1 - self.avg_token_sell * self.circulating_supply() / self.initial_total_supply
+        return adoption_factor * utility_factor * holding_factor * sell_factor
+
+    def simulate_portfolio(self, pools, progress=None):
+        # every pool is valued against the same jointly drawn token / ETH paths
+        pools = [LPPool(token_launch_price=self.token_launch_price, pair_price=self.lp_pairing_token2_price,
+                        paths=self.paths, **{**self.pool, **pool}) for pool in pools]
+        models = {pool.pool_model for pool in pools}
+        if 'static' in models and len(models) > 1:
+            raise ValueError("static pools cannot be combined with constant_product or concentrated pools in one portfolio")
+        price_factor = self.price_factor()
+
+        # single pass over day blocks: only block-sized buffers live at once, percentiles are exact per day
+        shape = (len(PERCENTILES), self.simulation_days)
+        price_percentiles = np.empty(shape)
+        portfolio_tvl_percentiles = np.empty(shape)
+        tvl_percentiles = [np.empty(shape) for _ in pools]
+        il_percentiles = [np.empty(shape) for _ in pools]
+        buffers = None
+
+        chunks = correlated_geometric_brownian_motion_chunks(
+            [self.token_launch_price, self.lp_pairing_token2_price], [self.mu, self.pair_mu],
+            [self.sigma, self.pair_sigma], [[1.0, self.correlation], [self.correlation, 1.0]],
+            self.simulation_days/365, self.simulation_days, self.paths
+        )
+        for start, stop, prices in chunks:
+            token_prices, pair_prices = prices
+            if buffers is None:
+                buffers = [np.empty_like(token_prices) for _ in range(4)]
+            tvl, il, scratch, total = (b[:, :stop - start] for b in buffers)
+            total[...] = 0
+
+            for i, pool in enumerate(pools):
+                with stage('pool'):
+                    pool.value(token_prices, pair_prices, tvl, il, scratch)
+                with stage('reduce'):
+                    tvl_percentiles[i][:, start:stop] = np.percentile(tvl, PERCENTILES, axis=0)
+                    il_percentiles[i][:, start:stop] = np.percentile(il, PERCENTILES, axis=0)
+                    total += tvl
+            with stage('reduce'):
+                portfolio_tvl_percentiles[:, start:stop] = np.percentile(total, PERCENTILES, axis=0)
+
+                np.multiply(token_prices, price_factor[start:stop], out=tvl)
+                price_percentiles[:, start:stop] = np.percentile(tvl, PERCENTILES, axis=0)
+            if progress is not None:
+                progress(stop / self.simulation_days)
+
         return {
             'price_percentiles': price_percentiles,
-            'tvl_percentiles': tvl_percentiles,
-            'il_percentiles': il_percentiles,
-            'median_prices': price_percentiles[2],
-            'median_tvl': tvl_percentiles[2],
-            'median_il': il_percentiles[2],
-            'initial_market_cap': initial_market_cap,
-            'initial_liquidity': initial_liquidity
+            'portfolio_tvl_percentiles': portfolio_tvl_percentiles,
+            'pools': [{
+                'tvl_percentiles': tvl_p,
+                'il_percentiles': il_p,
+                'median_tvl': tvl_p[2],
+                'median_il': il_p[2],
+                'initial_liquidity': pool.lp_pool_allocation * 2
+            } for pool, tvl_p, il_p in zip(pools, tvl_percentiles, il_percentiles)],
+            'circulating_supply': self.circulating_supply(),
+            'initial_market_cap': self.initial_total_supply * self.token_launch_price
+        }
+
+    def simulate(self, progress=None):
+        results = self.simulate_portfolio([{}], progress=progress)
+        pool = results['pools'][0]
+        
+        return {
+            'price_percentiles': results['price_percentiles'],
+            'tvl_percentiles': pool['tvl_percentiles'],
+            'il_percentiles': pool['il_percentiles'],
+            'median_prices': results['price_percentiles'][2],
+            'median_tvl': pool['median_tvl'],
+            'median_il': pool['median_il'],
+            'circulating_supply': results['circulating_supply'],
+            'initial_market_cap': results['initial_market_cap'],
+            'initial_liquidity': pool['initial_liquidity']  # Assuming equal value of both tokens in the pool
         }
\ No newline at end of file
@@ -0,0 +1,149 @@
+# app/models/supply.py
+
+import json
+import math
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+DAYS_PER_MONTH = 30
+# charts cover at least four years, or up to the end of the longest schedule
+VESTING_HORIZON_DAYS = 365 * 4
+
+class SupplyTimeline:
+    # day-indexed unlock schedule: fractions[d, j] is the share of allocation j unlocked by day d. Airdrop #2 unlocks
+    # are a series of their own, airdrop_fractions[d] of the airdrop module's tokens; on their days they replace the
+    # daily vesting of an 'Airdrop #2' allocation, as the vesting chart has always shown them
+    def __init__(self, start_date, allocations, increments, allocation_tokens=None, airdrops=None, airdrop_tokens=0.0):
+        self.start_date = None if start_date is None else pd.Timestamp(start_date)
+        self.allocations = list(allocations)
+        self.increments = np.asarray(increments, dtype=float)
+        self.fractions = np.cumsum(self.increments, axis=0)
+        self.allocation_tokens = None if allocation_tokens is None else np.asarray(allocation_tokens, dtype=float)
+        self.airdrops = np.zeros(self.increments.shape[0]) if airdrops is None else np.asarray(airdrops, dtype=float)
+        self.airdrop_fractions = np.cumsum(self.airdrops)
+        self.airdrop_tokens = float(airdrop_tokens)
+
+        # timelines are shared through the cache, so keep them read-only
+        for array in (self.fractions, self.increments, self.airdrops, self.airdrop_fractions):
+            array.flags.writeable = False
+
+    @property
+    def num_days(self):
+        return self.fractions.shape[0]
+
+    @property
+    def dates(self):
+        if self.start_date is None:
+            return pd.RangeIndex(self.num_days)
+        return pd.date_range(start=self.start_date, periods=self.num_days, freq='D')
+
+    def with_tokens(self, allocation_tokens):
+        timeline = SupplyTimeline.__new__(SupplyTimeline)
+        timeline.__dict__.update(self.__dict__)
+        timeline.allocation_tokens = np.asarray(allocation_tokens, dtype=float)
+        return timeline
+
+    def _tokens(self, tokens):
+        tokens = self.allocation_tokens if tokens is None else np.asarray(tokens, dtype=float)
+        if tokens is None:
+            raise ValueError("allocation tokens are required to convert unlock fractions to supply")
+        return tokens
+
+    @property
+    def has_airdrops(self):
+        return bool(self.airdrops.any())
+
+    def unlocked(self, tokens=None):
+        # (..., days, allocations) unlocked tokens; tokens may carry leading batch dims. Airdrops not included
+        tokens = self._tokens(tokens)
+        return self.fractions * tokens[..., None, :]
+
+    def airdropped(self):
+        # (days,) airdrop #2 tokens unlocked by each day
+        return self.airdrop_fractions * self.airdrop_tokens
+
+    def circulating(self, tokens=None, days=None):
+        tokens = self._tokens(tokens)
+        fractions = self.fractions if days is None else self.fractions[:days]
+        airdropped = self.airdropped() if days is None else self.airdropped()[:days]
+        return np.einsum('dn,...n->...d', fractions, tokens) + airdropped
+
+def _canonical(params):
+    return json.dumps(params, sort_keys=True, default=lambda o: o.item() if hasattr(o, 'item') else str(o))
+
+def _schedule(vesting_data, airdrop_module):
+    # (offset, cliff days, vesting days) per allocation and (offset, amount) per airdrop #2 unlock, in days from
+    # the earliest vesting start
+    start_date = pd.to_datetime(vesting_data['vestingStart'].min())
+    rows = [((pd.to_datetime(row['vestingStart']) - start_date).days,
+             pd.Timedelta(days=DAYS_PER_MONTH * row['cliff']).days,
+             pd.Timedelta(days=DAYS_PER_MONTH * row['vestingPeriod']).days) for _, row in vesting_data.iterrows()]
+    airdrops = []
+    for key in ('1', '2', '3'):
+        date, amount = airdrop_module.get('date' + key), airdrop_module.get('amount' + key, 0)
+        if pd.notna(date) and date and amount > 0:
+            airdrops.append(((pd.to_datetime(date) - start_date).days, amount))
+    return start_date, rows, airdrops
+
+def _horizon(rows, airdrops):
+    ends = [offset + cliff_days + vesting_days for offset, cliff_days, vesting_days in rows]
+    ends += [offset for offset, _ in airdrops]
+    return max([VESTING_HORIZON_DAYS] + ends) + 1
+
+def horizon_days(vesting_data, airdrop_module=None):
+    # days covered by the timeline: four years, or up to the last scheduled unlock if that is later
+    _, rows, airdrops = _schedule(pd.DataFrame(vesting_data), airdrop_module or {})
+    return _horizon(rows, airdrops)
+
+@lru_cache(maxsize=128)
+def _vesting_timeline(key):
+    params = json.loads(key)
+    vesting_data = pd.DataFrame(params['vesting_data'])
+    airdrop_module = params['airdrop_module']
+
+    start_date, rows, airdrops = _schedule(vesting_data, airdrop_module)
+    num_days = _horizon(rows, airdrops)
+
+    increments = np.zeros((num_days, len(vesting_data)))
+    for j, ((_, row), (offset, cliff_days, vesting_days)) in enumerate(zip(vesting_data.iterrows(), rows)):
+        if row['tgeUnlock'] > 0:
+            increments[offset, j] = row['tgeUnlock'] / 100
+
+        if vesting_days > 0:
+            first = offset + cliff_days + 1
+            increments[first:first + vesting_days, j] = (100 - row['tgeUnlock']) / 100 / vesting_days
+
+    # airdrop #2 unlocks replace the daily vesting of an 'Airdrop #2' allocation on their dates; a later unlock on the
+    # same day wins, as the chart's assignment always did
+    allocations = list(vesting_data['allocation'])
+    airdrop_increments = np.zeros(num_days)
+    for offset, amount in airdrops:
+        if offset >= 0:
+            airdrop_increments[offset] = amount / 100
+            if 'Airdrop #2' in allocations:
+                increments[offset, allocations.index('Airdrop #2')] = 0
+
+    return SupplyTimeline(start_date, allocations, increments, airdrops=airdrop_increments,
+                          airdrop_tokens=float(airdrop_module.get('tokens') or 0))
+
+def get_vesting_timeline(vesting_data, airdrop_module):
+    # keyed on the schedule only, so every supply / valuation shares one timeline
+    vesting_data = pd.DataFrame(vesting_data)
+    columns = ['allocation', 'tgeUnlock', 'cliff', 'vestingPeriod', 'vestingStart']
+    airdrop_keys = ['tokens', 'date1', 'amount1', 'date2', 'amount2', 'date3', 'amount3']
+    timeline = _vesting_timeline(_canonical({
+        'vesting_data': vesting_data[columns].to_dict('records'),
+        'airdrop_module': {k: airdrop_module.get(k) for k in airdrop_keys}
+    }))
+    if 'tokens' in vesting_data:
+        timeline = timeline.with_tokens(vesting_data['tokens'].to_numpy(dtype=float))
+    return timeline
+
+@lru_cache(maxsize=128)
+def team_vesting_timeline(cliff, base_vesting_per_month, num_months):
+    # the tokenomics team allocation, indexed by month: its base share unlocked each month from the cliff on. The
+    # engine scales each month's unlock by its utilisation step-up, which depends on the path
+    increments = np.zeros((num_months, 1))
+    increments[max(0, math.ceil(cliff)):, 0] = base_vesting_per_month
+    return SupplyTimeline(None, ['Team'], increments)
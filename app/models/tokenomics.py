@@ -1,5 +1,9 @@
+import time
 import numpy as np
 from scipy.stats import norm
+from app.models.supply import team_vesting_timeline
+from app.simulations.shocks import stream
+from app.timing import record, stage
 
 class TokenomicsSimulation:
     def __init__(self, **kwargs):
@@ -23,10 +27,15 @@ class TokenomicsSimulation:
         else:
             return self.base_rate + self.multiplier + ((utilization - self.kink) / (1 - self.kink)) * self.jump_multiplier
 
-    def run_simulations(self, num_simulations, num_months):
+    def run_simulations(self, num_simulations, num_months, progress=None):
         results = []
 
-        for _ in range(num_simulations):
+        simulate_start = time.perf_counter()
+        # months with a team unlock and their base share come from the shared timeline, the same for every simulation
+        team_unlocks = team_vesting_timeline(self.cliff, self.base_vesting_per_month, num_months).increments[:, 0]
+        vesting_months = (team_unlocks != 0).tolist()
+        base_vesting = team_unlocks.tolist()
+        for sim in range(num_simulations):
             tvl = self.initial_tvl
             borrow = self.initial_borrow
             token_circulating = self.initial_token_circulating
@@ -35,11 +44,13 @@ class TokenomicsSimulation:
             token_reserves = self.initial_reserves / (2 * self.token_price)  
             stable_reserves = self.initial_reserves / 2 
             monthly_data = []
+            # each simulation draws from its own stream, whatever ran before it
+            rng = stream('tokenomics', sim)
 
             for month in range(num_months):
                 # sim TVL and borrow growth
-                tvl_growth = np.random.normal(self.mom_tvl_growth, self.mom_tvl_growth / 2)
-                borrow_growth = np.random.normal(self.mom_borrow_growth, self.mom_borrow_growth / 2)
+                tvl_growth = rng.normal(self.mom_tvl_growth, self.mom_tvl_growth / 2)
+                borrow_growth = rng.normal(self.mom_borrow_growth, self.mom_borrow_growth / 2)
 
                 tvl *= (1 + tvl_growth)
                 borrow *= (1 + borrow_growth)
@@ -62,11 +73,11 @@ class TokenomicsSimulation:
                 token_emissions = self.total_token_emitted * emissions_rate
 
                 # Team vesting
-                if month >= self.cliff:
-                    vesting_rate = self.base_vesting_per_month * (1 + self.vesting_step_up * (utilization - self.target_utilization))
+                if vesting_months[month]:
+                    vesting_rate = base_vesting[month] * (1 + self.vesting_step_up * (utilization - self.target_utilization))
                     team_tokens_vested += self.total_team_allocation * vesting_rate
                 
-                token_circulating += token_emissions + (team_tokens_vested if month >= self.cliff else 0)
+                token_circulating += token_emissions + (team_tokens_vested if vesting_months[month] else 0)
 
                 # calc expenses and net income
                 expenses = (token_emissions + team_tokens_vested) * self.token_price
@@ -125,26 +136,23 @@ class TokenomicsSimulation:
                 })
 
             results.append(monthly_data)
+            if progress is not None:
+                progress((sim + 1) / num_simulations)
+
+        record('simulate', simulate_start)
 
         # calc percentiles for key metrics
         percentiles = [5, 25, 50, 75, 95]
         final_month_data = [sim[-1] for sim in results]
+        metrics = ['tvl', 'borrow', 'utilization', 'total_revenue', 'protocol_revenue', 'token_holder_revenue',
+                   'net_income', 'token_reserves', 'stable_reserves', 'runway', 'token_circulating',
+                   'cumulative_revenue', 'token_price', 'expenses']
+        final_values = np.array([[d[metric] for d in final_month_data] for metric in metrics])
+        with stage('reduce'):
+            final_percentiles = np.percentile(final_values, percentiles, axis=1)
 
         summary = {
-            'tvl': {p: np.percentile([d['tvl'] for d in final_month_data], p) for p in percentiles},
-            'borrow': {p: np.percentile([d['borrow'] for d in final_month_data], p) for p in percentiles},
-            'utilization': {p: np.percentile([d['utilization'] for d in final_month_data], p) for p in percentiles},
-            'total_revenue': {p: np.percentile([d['total_revenue'] for d in final_month_data], p) for p in percentiles},
-            'protocol_revenue': {p: np.percentile([d['protocol_revenue'] for d in final_month_data], p) for p in percentiles},
-            'token_holder_revenue': {p: np.percentile([d['token_holder_revenue'] for d in final_month_data], p) for p in percentiles},
-            'net_income': {p: np.percentile([d['net_income'] for d in final_month_data], p) for p in percentiles},
-            'token_reserves': {p: np.percentile([d['token_reserves'] for d in final_month_data], p) for p in percentiles},
-            'stable_reserves': {p: np.percentile([d['stable_reserves'] for d in final_month_data], p) for p in percentiles},
-            'runway': {p: np.percentile([d['runway'] for d in final_month_data], p) for p in percentiles},
-            'token_circulating': {p: np.percentile([d['token_circulating'] for d in final_month_data], p) for p in percentiles},
-            'cumulative_revenue': {p: np.percentile([d['cumulative_revenue'] for d in final_month_data], p) for p in percentiles},
-            'token_price': {p: np.percentile([d['token_price'] for d in final_month_data], p) for p in percentiles},
-            'expenses': {p: np.percentile([d['expenses'] for d in final_month_data], p) for p in percentiles}
+            metric: dict(zip(percentiles, final_percentiles[:, i])) for i, metric in enumerate(metrics)
         }
 
         return {
@@ -0,0 +1,88 @@
+# app/profiling.py
+
+import cProfile
+import os
+import pstats
+import threading
+import time
+from flask import request
+from app.auth import token_authorized
+from app.serialization import json_response
+
+PROFILE_MODES = ('top', 'file')
+SORT_KEYS = ('cumulative', 'tottime', 'calls')
+
+# one profiled request per process at a time: cProfile hooks the interpreter, so a second profiler would either
+# fail to start or fold another thread's calls into the first one's numbers
+_lock = threading.Lock()
+
+def requested():
+    return request.args.get('profile') in PROFILE_MODES
+
+def top_functions(profiler, sort='cumulative', limit=30):
+    stats = pstats.Stats(profiler).sort_stats(sort)
+    functions = []
+    for func in stats.fcn_list[:limit]:
+        primitive_calls, calls, tottime, cumtime, _ = stats.stats[func]
+        filename, line, name = func
+        functions.append({
+            'function': name,
+            'file': filename,
+            'line': line,
+            'calls': calls,
+            'primitive_calls': primitive_calls,
+            'tottime': tottime,
+            'cumtime': cumtime
+        })
+    return functions
+
+def init_app(app):
+    # ?profile=top answers with the top functions instead of the result, ?profile=file writes a .prof for
+    # snakeviz / pstats and returns the result as usual. Needs X-Profile-Token to match PROFILE_TOKEN;
+    # registered after the cache (which treats ?profile as a bypass) so only the view and engines are measured
+    @app.before_request
+    def start_profiler():
+        if 'profile' not in request.args:
+            return None
+        if not requested() or not token_authorized('PROFILE_TOKEN', 'X-Profile-Token'):
+            return json_response({'error': 'profiling needs ?profile=top|file and a valid X-Profile-Token'}, 403)
+        if not _lock.acquire(blocking=False):
+            return json_response({'error': 'another request is being profiled, retry when it is done'}, 409)
+        request.profiler = cProfile.Profile()
+        request.profile_started = time.perf_counter()
+        request.profiler.enable()
+        return None
+
+    @app.after_request
+    def stop_profiler(response):
+        profiler = getattr(request, 'profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        elapsed = time.perf_counter() - request.profile_started
+
+        if request.args['profile'] == 'file':
+            os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+            name = f"{request.endpoint or 'unmatched'}-{int(time.time() * 1000)}-{os.getpid()}.prof"
+            path = os.path.join(app.config['PROFILE_DIR'], name)
+            profiler.dump_stats(path)
+            response.headers['X-Profile-File'] = path
+            return response
+
+        sort = request.args.get('sort', 'cumulative')
+        return json_response({
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'seconds': elapsed,
+            'sort': sort if sort in SORT_KEYS else 'cumulative',
+            'functions': top_functions(profiler, sort if sort in SORT_KEYS else 'cumulative',
+                                       app.config['PROFILE_TOP'])
+        })
+
+    @app.teardown_request
+    def release_profiler(exc=None):
+        profiler = getattr(request, 'profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            request.profiler = None
+            _lock.release()
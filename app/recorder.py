@@ -0,0 +1,66 @@
+# app/recorder.py
+
+import json
+import os
+import random
+import threading
+import time
+from flask import request
+
+# per-run debugging switches that should not be replayed
+DROPPED_ARGS = ('profile', 'sort', 'timing')
+
+class RequestRecorder:
+    # appends one JSON line per sampled simulation request, the corpus format the loadtest driver replays.
+    # each line goes out in a single O_APPEND write, so gunicorn workers can share the file
+    def __init__(self, path, sample=1.0):
+        self.path = path
+        self.sample = sample
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def record(self, endpoint, path, args, body, status, seconds):
+        if self.sample < 1.0 and random.random() >= self.sample:
+            return
+        line = json.dumps({
+            'endpoint': endpoint,
+            'path': path,
+            'args': {k: v for k, v in args.items() if k not in DROPPED_ARGS},
+            'body': body,
+            'status': status,
+            'seconds': round(seconds, 6),
+            'recorded': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }, separators=(',', ':')) + '\n'
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode())
+            finally:
+                os.close(fd)
+
+def init_app(app):
+    # disabled unless REQUEST_RECORD_PATH is set. Registered before the cache so cache hits are recorded too:
+    # the corpus should reflect what clients send, not what the engines end up computing
+    if not app.config.get('REQUEST_RECORD_PATH'):
+        return None
+    recorder = RequestRecorder(app.config['REQUEST_RECORD_PATH'], app.config['REQUEST_RECORD_SAMPLE'])
+    app.extensions['recorder'] = recorder
+
+    @app.before_request
+    def start_recording():
+        request.record_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = getattr(request, 'record_start', None)
+        if start is None or request.method != 'POST' or request.endpoint is None:
+            return response
+        body = request.get_json(silent=True)
+        if body is not None:
+            recorder.record(request.endpoint, request.path, request.args.to_dict(), body, response.status_code,
+                            time.perf_counter() - start)
+        return response
+
+    return recorder
@@ -0,0 +1,16 @@
+from flask import Blueprint, request
+from app.admission import COST_MODELS, estimate, limits
+from app.serialization import json_response
+
+admission_bp = Blueprint('admission', __name__)
+
+@admission_bp.route('/estimate/<kind>', methods=['POST'])
+def estimate_cost(kind):
+    # the plan a run of this kind with this body would get, without running it; ?job=1 for the job budget
+    if kind not in COST_MODELS:
+        return json_response({'error': f"unknown simulation kind '{kind}'"}, 404)
+    job = request.args.get('job', '').lower() in ('1', 'true', 'yes')
+    try:
+        return json_response(estimate(kind, request.json, *limits(job)))
+    except (KeyError, TypeError, ValueError) as e:
+        return json_response({'kind': kind, 'mode': 'rejected', 'reason': str(e)}, 400)
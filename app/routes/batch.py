@@ -0,0 +1,116 @@
+from flask import Blueprint, request
+from app.admission import BASE_BYTES, AdmissionRejected, estimate, limits, run_planned
+from app.serialization import json_response, result_response
+from app.simulations import shocks
+from app.routes.fund_raising import fund_raising_charts
+from app.routes.jobs import JOB_RUNNERS
+from app.routes.lending import lending_batch
+from app.routes.non_stable_pool import non_stable_pool_batch
+from app.routes.stable_pool import stable_pool_batch
+
+batch_bp = Blueprint('batch', __name__)
+
+BATCH_RUNNERS = dict(JOB_RUNNERS, fund_raising_charts=fund_raising_charts)
+
+# vectorised engines, and the parameter a group of scenarios must share to go through one together (None: any
+# scenarios can). LP runs one by one: its engine already works on day blocks of CHUNK_ELEMENTS path-days, so
+# stacking scenarios would only grow the blocks, and tokenomics carries token_price from one simulation into the next
+BATCH_ENGINES = {
+    'non_stable_pool': (non_stable_pool_batch, 'paths'),
+    'stable_pool': (stable_pool_batch, 'days'),
+    'lending': (lending_batch, None)
+}
+
+def _error(e):
+    return {'error': f"{type(e).__name__}: {e}"}
+
+def _run_one(model, scenario_id, params, plan, results, errors):
+    try:
+        # every scenario draws from its own streams, as it would as a request of its own
+        shocks.seed(params.get('seed'))
+        results[scenario_id] = run_planned(BATCH_RUNNERS[model], params, plan)
+    except AdmissionRejected as e:
+        errors[scenario_id] = e.estimate
+    except Exception as e:
+        errors[scenario_id] = _error(e)
+
+def _vectorised_groups(members, shared_key, max_bytes):
+    # split members sharing a shape into groups whose stacked arrays stay inside the memory budget
+    by_shape = {}
+    for member in members:
+        by_shape.setdefault(int(member[1][shared_key]) if shared_key else None, []).append(member)
+    for shape_members in by_shape.values():
+        group, group_bytes = [], BASE_BYTES
+        for member in shape_members:
+            member_bytes = member[2]['memory_bytes'] - BASE_BYTES
+            if group and group_bytes + member_bytes > max_bytes:
+                yield group
+                group, group_bytes = [], BASE_BYTES
+            group.append(member)
+            group_bytes += member_bytes
+        yield group
+
+def _run_group(model, members, max_bytes, results, errors):
+    engine, shared_key = BATCH_ENGINES.get(model, (None, None))
+    # seeded scenarios must reproduce their single-request result, so they never share a draw
+    vectorisable = [m for m in members if engine is not None and m[2]['mode'] == 'full' and m[1].get('seed') is None]
+    vectorised_ids = {scenario_id for scenario_id, _, _ in vectorisable}
+    for member in members:
+        if member[0] not in vectorised_ids:
+            _run_one(model, *member, results, errors)
+
+    if not vectorisable:
+        return
+    for group in _vectorised_groups(vectorisable, shared_key, max_bytes):
+        try:
+            for (scenario_id, _, _), result in zip(group, engine([params for _, params, _ in group])):
+                results[scenario_id] = result
+        except Exception:
+            # retry one by one so the failure lands on the scenario that caused it
+            for member in group:
+                _run_one(model, *member, results, errors)
+
+@batch_bp.route('/batch', methods=['POST'])
+def run_batch():
+    # {"scenarios": [{"id", "model", "params"}, ...]} -> {"results": {id: result}, "errors": {id: error}}
+    scenarios = (request.json or {}).get('scenarios')
+    if not isinstance(scenarios, list):
+        return json_response({'error': "'scenarios' must be a list"}, 400)
+
+    max_bytes, max_seconds = limits()
+    groups, results, errors = {}, {}, {}
+    seen, total_seconds = set(), 0.0
+    for i, scenario in enumerate(scenarios):
+        scenario_id = str(scenario.get('id', i))
+        if scenario_id in seen:
+            return json_response({'error': f"duplicate scenario id '{scenario_id}'"}, 400)
+        seen.add(scenario_id)
+
+        model = scenario.get('model')
+        params = scenario.get('params') or {}
+        if model not in BATCH_RUNNERS:
+            errors[scenario_id] = {'error': f"unknown model '{model}'"}
+            continue
+        try:
+            plan = estimate(model, params, max_bytes, max_seconds)
+        except (KeyError, TypeError, ValueError) as e:
+            errors[scenario_id] = _error(e)
+            continue
+        if plan['mode'] == 'rejected':
+            errors[scenario_id] = plan
+            continue
+        total_seconds += plan['cpu_seconds']
+        groups.setdefault(model, []).append((scenario_id, params, plan))
+
+    # scenarios run one group after another, so the batch as a whole answers to the CPU budget
+    if total_seconds > max_seconds:
+        return json_response({
+            'error': f"estimated CPU time {total_seconds:.0f}s exceeds the {max_seconds:.0f}s budget",
+            'cpu_seconds': total_seconds,
+            'max_seconds': max_seconds
+        }, 413)
+
+    for model, members in groups.items():
+        _run_group(model, members, max_bytes, results, errors)
+
+    return result_response({'results': results, 'errors': errors})
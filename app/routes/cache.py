@@ -0,0 +1,23 @@
+from flask import Blueprint, current_app
+from app.auth import token_authorized
+from app.serialization import json_response
+from app.simulations import path_bank
+
+cache_bp = Blueprint('cache', __name__)
+
+@cache_bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    flights = current_app.extensions['single_flight']
+    stats = current_app.extensions['result_cache'].stats()
+    stats.update({'coalesced': flights.coalesced, 'in_flight': flights.in_flight})
+    if path_bank.bank() is not None:
+        stats['shared_paths'] = path_bank.bank().stats()
+    return json_response(stats)
+
+@cache_bp.route('/cache', methods=['DELETE'])
+def clear_cache():
+    if not token_authorized('CACHE_TOKEN', 'X-Cache-Token'):
+        return json_response({'error': 'clearing the cache needs a valid X-Cache-Token'}, 403)
+    cache = current_app.extensions['result_cache']
+    cache.clear()
+    return json_response(cache.stats())
@@ -1,19 +1,44 @@
 # app/routes/fund_raising.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
+from app.admission import run_admitted
+from app.serialization import result_response
 from app.models.fund_raising import FundRaising
 
 fund_raising_bp = Blueprint('fund_raising', __name__)
 
-@fund_raising_bp.route('/generate_fund_raising_charts', methods=['POST'])
-def generate_fund_raising_charts():
-    data = request.json
-    fund_raising = FundRaising(
+def _fund_raising(data):
+    return FundRaising(
         data['allocationData'],
         data['vestingData'],
         data['airdropModule'],
         float(data['initialTotalSupply']),
         float(data['publicSaleValuation'])
     )
-    
-    return jsonify(fund_raising.generate_charts())
\ No newline at end of file
+
+def fund_raising_charts(data, progress=None):
+    return _fund_raising(data).generate_charts()
+
+def fund_raising_scenarios(data, progress=None):
+    results = _fund_raising(data).run_scenario_grid(
+        data.get('publicSaleValuations', [data['publicSaleValuation']]),
+        data.get('initialTotalSupplies', [data['initialTotalSupply']]),
+        data.get('allocationPercentages')
+    )
+
+    return {
+        'dates': [d.strftime('%Y-%m-%d') for d in results['dates']],
+        'allocations': results['allocations'],
+        'token_price': results['token_price'],
+        'implied_market_cap': results['implied_market_cap'],
+        'circulating_supply': results['circulating_supply'],
+        'circulating_market_cap': results['circulating_market_cap']
+    }
+
+@fund_raising_bp.route('/generate_fund_raising_charts', methods=['POST'])
+def generate_fund_raising_charts():
+    return result_response(run_admitted('fund_raising_charts', fund_raising_charts, request.json))
+
+@fund_raising_bp.route('/run_fund_raising_scenarios', methods=['POST'])
+def run_fund_raising_scenarios():
+    return result_response(run_admitted('fund_raising_scenarios', fund_raising_scenarios, request.json))
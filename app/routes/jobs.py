@@ -0,0 +1,59 @@
+from flask import Blueprint, request, current_app
+from app.admission import admit
+from app.serialization import json_response, result_response
+from app.jobs import QueueFull
+from app.routes.fund_raising import fund_raising_scenarios
+from app.routes.lending import lending_simulation
+from app.routes.lp_sim import lp_simulation, lp_portfolio_simulation
+from app.routes.non_stable_pool import non_stable_pool_simulation
+from app.routes.stable_pool import stable_pool_simulation
+from app.routes.tokenomics import tokenomics_simulation
+
+jobs_bp = Blueprint('jobs', __name__)
+
+JOB_RUNNERS = {
+    'tokenomics': tokenomics_simulation,
+    'lp': lp_simulation,
+    'lp_portfolio': lp_portfolio_simulation,
+    'lending': lending_simulation,
+    'stable_pool': stable_pool_simulation,
+    'non_stable_pool': non_stable_pool_simulation,
+    'fund_raising_scenarios': fund_raising_scenarios
+}
+
+def _jobs():
+    return current_app.extensions['jobs']
+
+@jobs_bp.route('/jobs/<kind>', methods=['POST'])
+def submit_job(kind):
+    if kind not in JOB_RUNNERS:
+        return json_response({'error': f"unknown job kind '{kind}'"}, 404)
+    plan = admit(kind, request.json, job=True)
+    try:
+        job = _jobs().submit(kind, request.json, plan)
+    except QueueFull as e:
+        return json_response({'error': str(e)}, 429)
+    return json_response(job.to_dict(), 202)
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = _jobs().get(job_id)
+    if job is None:
+        return json_response({'error': 'job not found'}, 404)
+    return json_response(job.to_dict())
+
+@jobs_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = _jobs().get(job_id)
+    if job is None:
+        return json_response({'error': 'job not found'}, 404)
+    if job.status != 'done':
+        return json_response(job.to_dict(), 409)
+    return result_response(_jobs().result(job.id))
+
+@jobs_bp.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = _jobs().cancel(job_id)
+    if job is None:
+        return json_response({'error': 'job not found'}, 404)
+    return json_response(job.to_dict())
@@ -1,14 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
+from app.admission import run_admitted
+from app.serialization import result_response
 from app.models.lending import LendingSimulation
-from app.utils import run_boundary_analysis
+from app.utils import run_boundary_analysis, run_boundary_analysis_batch
 import numpy as np
 
 lending_bp = Blueprint('lending', __name__)
 
-@lending_bp.route('/run_lending_simulation', methods=['POST'])
-def run_lending_simulation():
-    data = request.json
-    simulation = LendingSimulation(
+def _simulation(data):
+    return LendingSimulation(
         collateral_amount=float(data['collateral_amount']),
         max_ltv=float(data['max_ltv']),
         liquidation_threshold=float(data['liquidation_threshold']),
@@ -16,6 +16,8 @@ def run_lending_simulation():
         interest_rate=float(data['interest_rate']),
         liquidation_penalty=float(data['liquidation_penalty'])
     )
+
+def _boundary_scenarios():
     price_scenarios = [
         [1.0] * 365,  # stable price
         [1.0 + 0.001*i for i in range(365)],  # gradual increase
@@ -31,6 +33,15 @@ def run_lending_simulation():
         [5000 if i % 30 == 0 else 0 for i in range(365)],  # periodic large borrows
         [0] * 365,  # no additional borrowing
     ]
+    return price_scenarios, borrow_scenarios
+
+def lending_simulation(data, progress=None):
+    return run_boundary_analysis(_simulation(data), *_boundary_scenarios(), progress=progress)
 
-    results = run_boundary_analysis(simulation, price_scenarios, borrow_scenarios)
-    return jsonify(results)
\ No newline at end of file
+def lending_batch(scenarios):
+    # every scenario runs the same boundary paths, stepped together
+    return run_boundary_analysis_batch([_simulation(data) for data in scenarios], *_boundary_scenarios())
+
+@lending_bp.route('/run_lending_simulation', methods=['POST'])
+def run_lending_simulation():
+    return result_response(run_admitted('lending', lending_simulation, request.json))
@@ -1,12 +1,16 @@
-from flask import Blueprint, request, jsonify
-from app.models.lp_sim import LPSimulation
+from flask import Blueprint, request, Response, stream_with_context
+from app.admission import admit, fits_unbatched, run_admitted
+from app.serialization import result_response
+from app.constants import STREAM_BATCH_PATHS, LP_BANDS
+from app.models.lp_sim import LPSimulation, portfolio_pools
+from app.models.supply import get_vesting_timeline
+from app.streaming import sse_bands
+from app.timing import stage
 from datetime import datetime, timedelta
 
 lp_sim_bp = Blueprint('lp_sim', __name__)
 
-@lp_sim_bp.route('/run_lp_simulation', methods=['POST'])
-def run_lp_simulation():
-    data = request.json
+def lp_simulation(data, progress=None):
     token_launch_price = float(data['tokenLaunchPrice'])
     lp_pool_allocation = float(data['lpPoolAllocation'])
     initial_total_supply = float(data['initialTotalSupply'])
@@ -20,23 +24,97 @@ def run_lp_simulation():
     avg_token_holding = float(data['avgTokenHolding'])
     avg_token_sell = float(data['avgTokenSell'])
 
+    # reuse the fund raising unlock schedule when the client sends it along
+    supply_timeline = None
+    if data.get('vestingData'):
+        supply_timeline = get_vesting_timeline(data['vestingData'], data.get('airdropModule', {}))
+
     lp_sim = LPSimulation(
         token_launch_price, lp_pool_allocation, initial_total_supply, simulation_days, mu, sigma, paths,
-        token_adoption_velocity, avg_token_utility_allocation, avg_token_holding, avg_token_sell
+        token_adoption_velocity, avg_token_utility_allocation, avg_token_holding, avg_token_sell,
+        supply_timeline=supply_timeline,
+        pool_model=data.get('poolModel', 'static'),
+        swap_fee=float(data.get('swapFee', 0.003)),
+        daily_volume=float(data.get('dailyVolume', 0.0)),
+        range_lower=float(data.get('rangeLower', 0.5)),
+        range_upper=float(data.get('rangeUpper', 2.0)),
+        pair_price=float(data.get('pairPrice', 3750)),
+        pair_mu=float(data.get('pairMu', 0.0)),
+        pair_sigma=float(data.get('pairSigma', 0.0)),
+        correlation=float(data.get('correlation', 0.0))
     )
-    results = lp_sim.simulate()
+    results = lp_sim.simulate(progress=progress)
     
-    start_date = datetime.now()
-    date_range = [(start_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(simulation_days)]
+    with stage('dates'):
+        start_date = datetime.now()
+        date_range = [(start_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(simulation_days)]
 
-    return jsonify({
+    return {
         'dates': date_range,
-        'price_percentiles': results['price_percentiles'].tolist(),
-        'tvl_percentiles': results['tvl_percentiles'].tolist(),
-        'il_percentiles': results['il_percentiles'].tolist(),
-        'median_prices': results['median_prices'].tolist(),
-        'median_tvl': results['median_tvl'].tolist(),
-        'median_il': results['median_il'].tolist(),
+        'price_percentiles': results['price_percentiles'],
+        'tvl_percentiles': results['tvl_percentiles'],
+        'il_percentiles': results['il_percentiles'],
+        'median_prices': results['median_prices'],
+        'median_tvl': results['median_tvl'],
+        'median_il': results['median_il'],
+        'circulating_supply': results['circulating_supply'],
         'initial_market_cap': results['initial_market_cap'],
         'initial_liquidity': results['initial_liquidity']
-    })
\ No newline at end of file
+    }
+
+def lp_portfolio_simulation(data, progress=None):
+    simulation_days = int(data['simulationDays'])
+
+    supply_timeline = None
+    if data.get('vestingData'):
+        supply_timeline = get_vesting_timeline(data['vestingData'], data.get('airdropModule', {}))
+
+    lp_sim = LPSimulation(
+        float(data['tokenLaunchPrice']), float(data.get('lpPoolAllocation', 0)), float(data['initialTotalSupply']),
+        simulation_days, float(data['mu']), float(data['sigma']), int(data['paths']),
+        float(data['tokenAdoptionVelocity']), float(data['avgTokenUtilityAllocation']),
+        float(data['avgTokenHolding']), float(data['avgTokenSell']),
+        supply_timeline=supply_timeline,
+        pair_price=float(data.get('pairPrice', 3750)),
+        pair_mu=float(data.get('pairMu', 0.0)),
+        pair_sigma=float(data.get('pairSigma', 0.0)),
+        correlation=float(data.get('correlation', 0.0))
+    )
+    pools = portfolio_pools(data['pools'])
+    results = lp_sim.simulate_portfolio(pools, progress=progress)
+
+    with stage('dates'):
+        start_date = datetime.now()
+        date_range = [(start_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(simulation_days)]
+
+    return {
+        'dates': date_range,
+        'price_percentiles': results['price_percentiles'],
+        'portfolio_tvl_percentiles': results['portfolio_tvl_percentiles'],
+        'pools': [{
+            'tvl_percentiles': pool['tvl_percentiles'],
+            'il_percentiles': pool['il_percentiles'],
+            'median_tvl': pool['median_tvl'],
+            'median_il': pool['median_il'],
+            'initial_liquidity': pool['initial_liquidity']
+        } for pool in results['pools']],
+        'circulating_supply': results['circulating_supply'],
+        'initial_market_cap': results['initial_market_cap']
+    }
+
+@lp_sim_bp.route('/run_lp_simulation', methods=['POST'])
+def run_lp_simulation():
+    return result_response(run_admitted('lp', lp_simulation, request.json))
+
+@lp_sim_bp.route('/run_lp_portfolio_simulation', methods=['POST'])
+def run_lp_portfolio_simulation():
+    return result_response(run_admitted('lp_portfolio', lp_portfolio_simulation, request.json))
+
+@lp_sim_bp.route('/run_lp_simulation/stream', methods=['POST'])
+def stream_lp_simulation():
+    data = request.json
+    plan = admit('lp', data, job=True, batch_paths=int(data.get('streamBatchPaths', STREAM_BATCH_PATHS)))
+    exact = (lambda: lp_simulation(data)) if fits_unbatched('lp', data, job=True) else None
+    events = sse_bands(lambda paths: lp_simulation(dict(data, paths=paths)), int(data['paths']), plan['batch_paths'],
+                       LP_BANDS, exact)
+    return Response(stream_with_context(events), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
@@ -0,0 +1,9 @@
+from flask import Blueprint, current_app
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    registry = current_app.extensions['metrics']
+    registry.flush()
+    return current_app.response_class(registry.render(), mimetype='text/plain; version=0.0.4')
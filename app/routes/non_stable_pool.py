@@ -1,14 +1,16 @@
-from flask import Blueprint, request, jsonify
-from app.simulations.gbm import geometric_brownian_motion
+from flask import Blueprint, request, Response, stream_with_context
+from app.admission import admit, fits_unbatched, run_admitted
+from app.serialization import result_response
+from app.constants import STREAM_BATCH_PATHS, NON_STABLE_POOL_BANDS
+from app.streaming import batch_sizes, sse_bands
+from app.timing import stage
+from app.simulations.gbm import geometric_brownian_motion, geometric_brownian_motion_batch
 from datetime import datetime, timedelta
-import pandas as pd
 import numpy as np 
 
 non_stable_pool_bp = Blueprint('non_stable_pool', __name__)
 
-@non_stable_pool_bp.route('/run_non_stable_pool_simulation', methods=['POST'])
-def run_non_stable_pool_simulation():
-    data = request.json
+def non_stable_pool_simulation(data, progress=None):
     S0 = float(data['initial_price'])
     mu = float(data['mu'])
     sigma = float(data['sigma'])
@@ -16,17 +18,50 @@ def run_non_stable_pool_simulation():
     T = 1  # 1 year simulation
     N = 365  # daily price points
 
-    prices = geometric_brownian_motion(S0, mu, sigma, T, N, paths)
-    
-    df = pd.DataFrame(prices.T)
+    if progress is None:
+        prices = geometric_brownian_motion(S0, mu, sigma, T, N, paths)
+    else:
+        # jobs draw in blocks of paths to report between them; consecutive blocks get the paths of a single draw
+        prices = np.empty((paths, N))
+        done = 0
+        for block in batch_sizes(paths, STREAM_BATCH_PATHS):
+            prices[done:done + block] = geometric_brownian_motion(S0, mu, sigma, T, N, block)
+            done += block
+            progress(done / paths)
+    return _non_stable_pool_result(prices)
+
+def _non_stable_pool_result(prices):
     percentiles = [5, 25, 50, 75, 95]
-    percentile_df = df.quantile(q=[p/100 for p in percentiles], axis=1).T
+    with stage('reduce'):
+        percentile_prices = np.percentile(prices, percentiles, axis=0)
 
-    start_date = datetime(2023, 1, 1)
-    date_range = [(start_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(N)]
+    with stage('dates'):
+        start_date = datetime(2023, 1, 1)
+        date_range = [(start_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(prices.shape[1])]
 
-    return jsonify({
+    return {
         'dates': date_range,
-        'percentile_prices': percentile_df.values.T.tolist(),
-        'median_prices': percentile_df[0.5].tolist()
-    })
\ No newline at end of file
+        'percentile_prices': percentile_prices,
+        'median_prices': percentile_prices[2]
+    }
+
+def non_stable_pool_batch(scenarios):
+    # scenarios with the same path count share one stacked GBM draw
+    prices = geometric_brownian_motion_batch(
+        [float(data['initial_price']) for data in scenarios], [float(data['mu']) for data in scenarios],
+        [float(data['sigma']) for data in scenarios], 1, 365, int(scenarios[0]['paths'])
+    )
+    return [_non_stable_pool_result(scenario_prices) for scenario_prices in prices]
+
+@non_stable_pool_bp.route('/run_non_stable_pool_simulation', methods=['POST'])
+def run_non_stable_pool_simulation():
+    return result_response(run_admitted('non_stable_pool', non_stable_pool_simulation, request.json))
+
+@non_stable_pool_bp.route('/run_non_stable_pool_simulation/stream', methods=['POST'])
+def stream_non_stable_pool_simulation():
+    data = request.json
+    plan = admit('non_stable_pool', data, job=True, batch_paths=int(data.get('streamBatchPaths', STREAM_BATCH_PATHS)))
+    exact = (lambda: non_stable_pool_simulation(data)) if fits_unbatched('non_stable_pool', data, job=True) else None
+    events = sse_bands(lambda paths: non_stable_pool_simulation(dict(data, paths=paths)), int(data['paths']),
+                       plan['batch_paths'], NON_STABLE_POOL_BANDS, exact)
+    return Response(stream_with_context(events), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
@@ -1,13 +1,13 @@
-from flask import Blueprint, request, jsonify
-from app.simulations.ou_process import OUParams, simulate_OU_process
+from flask import Blueprint, request
+from app.admission import run_admitted
+from app.serialization import result_response
+from app.simulations.ou_process import OUParams, simulate_OU_process, simulate_OU_processes
 import pandas as pd
 from datetime import datetime, timedelta
 
 stable_pool_bp = Blueprint('stable_pool', __name__)
 
-@stable_pool_bp.route('/run_stable_pool_simulation', methods=['POST'])
-def run_stable_pool_simulation():
-    data = request.json
+def stable_pool_simulation(data, progress=None):
     initial_price = float(data['initial_price'])
     alpha = float(data['alpha'])
     gamma = float(data['gamma'])
@@ -15,10 +15,27 @@ def run_stable_pool_simulation():
     days = int(data['days'])
 
     ou_params = OUParams(alpha=alpha, gamma=gamma, beta=beta, X_0=initial_price)
-    prices = simulate_OU_process(days, 1, ou_params)[0]
+    prices = simulate_OU_process(days, 1, ou_params, progress=progress)[0]
 
-    return jsonify({
-        'prices': prices.tolist(),
+    return {
+        'prices': prices,
         'days': list(range(days)),
         'gamma': gamma 
-    })
\ No newline at end of file
+    }
+
+def stable_pool_batch(scenarios):
+    # scenarios with the same horizon are stepped together, one OU run each
+    days = int(scenarios[0]['days'])
+    ou_params = [OUParams(alpha=float(data['alpha']), gamma=float(data['gamma']), beta=float(data['beta']),
+                          X_0=float(data['initial_price'])) for data in scenarios]
+    prices = simulate_OU_processes(days, ou_params)
+
+    return [{
+        'prices': scenario_prices,
+        'days': list(range(days)),
+        'gamma': params.gamma
+    } for scenario_prices, params in zip(prices, ou_params)]
+
+@stable_pool_bp.route('/run_stable_pool_simulation', methods=['POST'])
+def run_stable_pool_simulation():
+    return result_response(run_admitted('stable_pool', stable_pool_simulation, request.json))
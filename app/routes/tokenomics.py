@@ -1,14 +1,14 @@
 # app/routes/tokenomics.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
+from app.admission import run_admitted
+from app.serialization import result_response
 from app.models.tokenomics import TokenomicsSimulation
 import numpy as np
 
 tokenomics_bp = Blueprint('tokenomics', __name__)
 
-@tokenomics_bp.route('/run_tokenomics_simulation', methods=['POST'])
-def run_tokenomics_simulation():
-    data = request.json
+def tokenomics_simulation(data, progress=None):
     simulation = TokenomicsSimulation(
         total_token_emitted=float(data['total_token_emitted']),
         initial_tvl=float(data['initial_tvl']),
@@ -38,6 +38,8 @@ def run_tokenomics_simulation():
     num_simulations = int(data['num_simulations'])
     num_months = int(data['num_months'])
 
-    results = simulation.run_simulations(num_simulations, num_months)
+    return simulation.run_simulations(num_simulations, num_months, progress=progress)
 
-    return jsonify(results)
\ No newline at end of file
+@tokenomics_bp.route('/run_tokenomics_simulation', methods=['POST'])
+def run_tokenomics_simulation():
+    return result_response(run_admitted('tokenomics', tokenomics_simulation, request.json))
\ No newline at end of file
@@ -0,0 +1,151 @@
+# app/serialization.py
+
+import io
+import json
+import numpy as np
+from flask import current_app, request
+from werkzeug.exceptions import NotAcceptable
+from app import timing
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt, the stdlib path keeps things working without it
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is in requirements.txt, without it the format is not offered
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow is in requirements.txt, without it the format is not offered
+    pa = None
+
+ORJSON_OPTIONS = 0 if orjson is None else orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+JSON_MIMETYPE = 'application/json'
+NPZ_MIMETYPE = 'application/x-npz'
+MSGPACK_MIMETYPE = 'application/msgpack'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+def _default(obj):
+    # orjson falls through here for non-contiguous or odd-dtype arrays; the stdlib path lands here for all numpy
+    if isinstance(obj, np.ndarray):
+        if orjson is not None:
+            return np.ascontiguousarray(obj, dtype=float if obj.dtype.kind not in 'biuf' else None)
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(obj):
+    # numpy arrays are written straight from their buffers, never via nested Python lists
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(obj, default=_default).encode()
+
+def _stack(items):
+    # lists of records become records of stacked columns, recursively, so the binary formats get one array per field
+    if items and all(isinstance(item, dict) for item in items):
+        return {key: _stack([item[key] for item in items]) for key in items[0]}
+    if items and all(isinstance(item, list) and item and isinstance(item[0], dict) for item in items):
+        return _stack([_stack(item) for item in items])
+    return np.asarray(items)
+
+def flatten(obj, prefix=''):
+    # nested result dict -> flat {'a/b/c': ndarray}, the common layout of every binary format
+    if isinstance(obj, dict):
+        arrays = {}
+        for key, value in obj.items():
+            arrays.update(flatten(value, f'{prefix}{key}/'))
+        return arrays
+    try:
+        if isinstance(obj, (list, tuple)):
+            obj = _stack(list(obj))
+            if isinstance(obj, dict):
+                return flatten(obj, prefix)
+        array = np.asarray(obj)
+    except ValueError:
+        # numpy refuses ragged nested lists outright
+        array = np.asarray(None, dtype=object)
+    if array.dtype == object:
+        # ragged or mixed leaves are rare enough to ship as a JSON string
+        array = np.asarray(dumps(obj).decode())
+    return {prefix.rstrip('/'): array}
+
+def _npz(obj):
+    buffer = io.BytesIO()
+    np.savez(buffer, **flatten(obj))
+    return buffer.getvalue()
+
+def _msgpack_default(obj):
+    if isinstance(obj, np.ndarray):
+        obj = np.ascontiguousarray(obj)
+        if obj.dtype.kind == 'U':
+            return obj.tolist()
+        return {'dtype': obj.dtype.str, 'shape': list(obj.shape), 'data': obj.data}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return _default(obj)
+
+def _msgpack(obj):
+    # arrays become {'dtype', 'shape', 'data'} maps with the raw buffer as a bin field, the usual msgpack-numpy layout
+    return msgpack.packb(obj, default=_msgpack_default, strict_types=False)
+
+def arrow_batch(obj):
+    # one single-row column per flattened array: the values as a list, the shape in the field metadata
+    columns, fields = [], []
+    for name, array in flatten(obj).items():
+        values = pa.array(np.ravel(array)) if array.dtype.kind != 'U' else pa.array(np.ravel(array).tolist())
+        columns.append(pa.ListArray.from_arrays(pa.array([0, len(values)], type=pa.int32()), values))
+        fields.append(pa.field(name, columns[-1].type, metadata={'shape': json.dumps(list(array.shape))}))
+    return pa.RecordBatch.from_arrays(columns, schema=pa.schema(fields))
+
+def _arrow(obj):
+    batch = arrow_batch(obj)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+ENCODERS = {JSON_MIMETYPE: dumps, NPZ_MIMETYPE: _npz}
+if msgpack is not None:
+    ENCODERS[MSGPACK_MIMETYPE] = _msgpack
+if pa is not None:
+    ENCODERS[ARROW_MIMETYPE] = _arrow
+
+def negotiate():
+    # JSON unless the client prefers one of the binary encodings we can produce. A client that only accepts a
+    # format whose library is not installed gets a 406 rather than a body it cannot read
+    accept = request.accept_mimetypes
+    mimetype = accept.best_match(list(ENCODERS))
+    if mimetype is None:
+        missing = [m for m in (MSGPACK_MIMETYPE, ARROW_MIMETYPE) if m not in ENCODERS and accept[m]]
+        if missing:
+            raise NotAcceptable(f"{', '.join(missing)} is not available on this server; "
+                                f"accepted formats: {', '.join(ENCODERS)}")
+        mimetype = JSON_MIMETYPE
+    return mimetype
+
+def json_response(obj, status=200):
+    return current_app.response_class(dumps(obj), status=status, mimetype=JSON_MIMETYPE)
+
+def result_response(obj, status=200):
+    timer = timing.current()
+    if timer is not None and timer.debug and isinstance(obj, dict):
+        # ?timing=1: stage times up to serialization ride along in the body; the header also has serialize
+        obj = dict(obj, timing=timer.as_dict())
+    mimetype = negotiate()
+    with timing.stage('serialize'):
+        body = ENCODERS[mimetype](obj)
+    response = current_app.response_class(body, status=status, mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
+
+def init_app(app):
+    @app.errorhandler(NotAcceptable)
+    def not_acceptable(e):
+        return json_response({'error': e.description, 'accepted': list(ENCODERS)}, 406)
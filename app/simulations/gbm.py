@@ -1,11 +1,123 @@
 import numpy as np
+from app import memory
+from app.simulations import path_bank
+from app.constants import CHUNK_ELEMENTS
+from app.simulations.shocks import path_normals
+from app.timing import stage
+
+# float64s alive per (asset, path, day) element of a chunk: the shock buffer plus the caller's working copies
+CHUNK_FLOATS_PER_ELEMENT = 4
 
 def geometric_brownian_motion(S0, mu, sigma, T, N, paths):
     dt = T/N
     t = np.linspace(0, T, N)
-    W = np.random.normal(0, np.sqrt(dt), size=(paths, N))
-    W = np.cumsum(W, axis=1)
-    
-    X = (mu - 0.5 * sigma**2) * t + sigma * W
-    S = S0 * np.exp(X)
-    return S
\ No newline at end of file
+    shocks = path_normals('gbm', paths, days=N)
+
+    def draw():
+        with stage('rng'):
+            W = shocks.normals(N)
+            W *= np.sqrt(dt)
+        with stage('paths'):
+            return np.cumsum(W, axis=1, out=W)
+
+    # seeded runs share their cumulated shocks across requests and workers
+    W = path_bank.brownian(shocks, N, dt, draw)
+    with stage('paths'):
+        X = (mu - 0.5 * sigma**2) * t + sigma * W
+        S = S0 * np.exp(X)
+    return S
+
+def geometric_brownian_motion_batch(S0, mu, sigma, T, N, paths):
+    # one (paths, N) GBM per scenario from a single shock draw: S0, mu, sigma are (scenarios,) -> (scenarios, paths, N).
+    # Scenario k gets the shocks the k-th of as many geometric_brownian_motion calls would
+    S0, mu, sigma = (np.asarray(v, dtype=float)[:, None, None] for v in (S0, mu, sigma))
+    dt = T/N
+    t = np.linspace(0, T, N)
+    with stage('rng'):
+        S = path_normals('gbm', S0.shape[0] * paths, days=N).normals(N).reshape(S0.shape[0], paths, N)
+        S *= np.sqrt(dt)
+    with stage('paths'):
+        np.cumsum(S, axis=2, out=S)
+
+        S *= sigma
+        S += (mu - 0.5 * sigma**2) * t
+        np.exp(S, out=S)
+        S *= S0
+    return S
+
+def chunk_days(paths, N, chunk_elements=CHUNK_ELEMENTS):
+    return max(1, min(N, chunk_elements // max(paths, 1)))
+
+def geometric_brownian_motion_chunks(S0, mu, sigma, T, N, paths, chunk_size=None):
+    # yields (start, stop, prices) blocks of days; the block buffer is reused, so consume it before the next step
+    chunks = correlated_geometric_brownian_motion_chunks([S0], [mu], [sigma], [[1.0]], T, N, paths, chunk_size)
+    for start, stop, S in chunks:
+        yield start, stop, S[0]
+
+def correlation_factor(corr, tol=1e-12):
+    # lower-triangular L with L @ L.T == corr. Perfectly (anti-)correlated assets make corr singular, where
+    # np.linalg.cholesky fails; their rows then reuse the earlier assets' shocks through a zero pivot
+    corr = np.asarray(corr, dtype=float)
+    if not np.allclose(corr, corr.T) or not np.allclose(np.diag(corr), 1.0) or np.any(np.abs(corr) > 1):
+        raise ValueError("correlation matrix must be symmetric with a unit diagonal and entries between -1 and 1")
+    try:
+        return np.linalg.cholesky(corr)
+    except np.linalg.LinAlgError:
+        pass
+    n = corr.shape[0]
+    L = np.zeros_like(corr)
+    for j in range(n):
+        pivot = corr[j, j] - L[j, :j] @ L[j, :j]
+        if pivot > tol:
+            L[j, j] = np.sqrt(pivot)
+            L[j + 1:, j] = (corr[j + 1:, j] - L[j + 1:, :j] @ L[j, :j]) / L[j, j]
+    if not np.allclose(L @ L.T, corr, atol=1e-9):
+        raise ValueError("correlation matrix is not positive semidefinite")
+    return L
+
+def correlated_geometric_brownian_motion_chunks(S0, mu, sigma, corr, T, N, paths, chunk_size=None):
+    # joint GBM for several assets from one shock batch, yielded as (start, stop, prices[asset, path, day])
+    S0, mu, sigma = (np.asarray(v, dtype=float) for v in (S0, mu, sigma))
+    L = correlation_factor(corr)
+    assets = len(S0)
+    # an asset without volatility follows its drift alone, so its shocks are only drawn when a later asset mixes
+    # them in; skipping them leaves every other asset's draws as they were
+    drawn = [i for i in range(assets) if sigma[i] != 0 or np.any(L[i + 1:, i] != 0)]
+    dt = T/N
+    t = np.linspace(0, T, N)
+    if chunk_size is None:
+        # smaller day blocks when the request is close to its memory budget
+        chunk_size = chunk_days(paths * assets, N, memory.chunk_elements(CHUNK_ELEMENTS, CHUNK_FLOATS_PER_ELEMENT * 8))
+    # the shocks of a path do not depend on the chunking, so any chunk_size gives the same prices
+    shocks = path_normals('gbm', paths, assets, days=N)
+    W = np.zeros((assets, paths))
+    buffer = np.empty((assets, paths, chunk_size))
+
+    for start in range(0, N, chunk_size):
+        stop = min(start + chunk_size, N)
+        S = buffer[:, :, :stop - start]
+        with stage('rng'):
+            shocks.normals(stop - start, out=S, assets=drawn)
+            S *= np.sqrt(dt)
+
+        with stage('paths'):
+            # correlate in place, last asset first so each row still sees the raw shocks it mixes in
+            for i in range(assets - 1, -1, -1):
+                if i not in drawn:
+                    continue
+                if L[i, i] != 1.0:
+                    S[i] *= L[i, i]
+                for j in range(i):
+                    if L[i, j] != 0.0:
+                        S[i] += L[i, j] * S[j]
+
+            # carried in before the sum so every partial sum is the one an unchunked cumsum would give
+            S[:, :, 0] += W
+            np.cumsum(S, axis=2, out=S)
+            W[:] = S[:, :, -1]
+
+            S *= sigma[:, None, None]
+            S += (mu - 0.5 * sigma**2)[:, None, None] * t[start:stop]
+            np.exp(S, out=S)
+            S *= S0[:, None, None]
+        yield start, stop, S
\ No newline at end of file
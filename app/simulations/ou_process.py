@@ -1,4 +1,6 @@
 import numpy as np
+from app.simulations.shocks import path_normals
+from app.timing import stage
 
 class OUParams:
     def __init__(self, alpha, gamma, beta, X_0=None):
@@ -7,15 +9,43 @@ class OUParams:
         self.beta = beta
         self.X_0 = X_0
 
-def simulate_OU_process(T, runs, ou_params):
+# days stepped between progress reports
+PROGRESS_DAYS = 4096
+
+def simulate_OU_process(T, runs, ou_params, progress=None):
     dt = 1.0
     data = np.zeros((runs, T))
-    for run in range(runs):
-        X_t = ou_params.X_0 if ou_params.X_0 is not None else ou_params.gamma
-        data[run, 0] = X_t
+    # run k steps on the shocks of simulate_OU_processes' k-th parameter set
+    shocks = path_normals('ou', runs, days=T - 1).normals(T - 1) * np.sqrt(dt)
+    with stage('paths'):
+        for run in range(runs):
+            X_t = ou_params.X_0 if ou_params.X_0 is not None else ou_params.gamma
+            data[run, 0] = X_t
+            for t in range(1, T):
+                dW = shocks[run, t - 1]
+                dX = ou_params.alpha * (ou_params.gamma - X_t) * dt + ou_params.beta * dW
+                X_t += dX
+                data[run, t] = X_t
+                if progress is not None and t % PROGRESS_DAYS == 0:
+                    progress((run + t / T) / runs)
+            if progress is not None:
+                progress((run + 1) / runs)
+    return data
+
+def simulate_OU_processes(T, ou_params_list):
+    # one run per parameter set, all stepped together: (len(ou_params_list), T)
+    dt = 1.0
+    alpha = np.array([p.alpha for p in ou_params_list], dtype=float)
+    gamma = np.array([p.gamma for p in ou_params_list], dtype=float)
+    beta = np.array([p.beta for p in ou_params_list], dtype=float)
+    X_t = np.array([p.X_0 if p.X_0 is not None else p.gamma for p in ou_params_list], dtype=float)
+
+    data = np.zeros((len(ou_params_list), T))
+    data[:, 0] = X_t
+    shocks = path_normals('ou', len(ou_params_list), days=T - 1).normals(T - 1) * np.sqrt(dt)
+    with stage('paths'):
         for t in range(1, T):
-            dW = np.random.normal(0, np.sqrt(dt))
-            dX = ou_params.alpha * (ou_params.gamma - X_t) * dt + ou_params.beta * dW
-            X_t += dX
-            data[run, t] = X_t
+            dW = shocks[:, t - 1]
+            X_t = X_t + alpha * (gamma - X_t) * dt + beta * dW
+            data[:, t] = X_t
     return data
\ No newline at end of file
@@ -0,0 +1,183 @@
+# app/simulations/path_bank.py
+#
+# host-wide store for the parameter-free part of seeded GBM runs: the cumulated shocks W of a (paths, N) draw.
+# Entries are .npy files in a RAM-backed directory (/dev/shm when there is one) that every worker maps read-only,
+# so a sweep over mu / sigma with a fixed seed draws and sums its shocks once per host and the pages are held once
+# however many workers use them. Entries are keyed on what picks the shocks (seed, path range, shock bank, stream
+# version, see shocks.PathNormals.key) plus the number and size of the steps; the path range is reserved whether
+# or not the entry is there, so a hit leaves every later draw of the request as it would have been.
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from app.simulations import shocks
+
+_bank = None
+MAX_MAPPED = 32  # entries a worker keeps mapped between requests
+
+class PathBank:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # key -> (W, inode): the inode tells a mapping of the current file from one another worker evicted or replaced
+        self._mapped = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(draw_key, N, dt):
+        payload = json.dumps({'draw': draw_key, 'N': N, 'dt': dt}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.npy')
+
+    def get(self, key):
+        # a mapping of a deleted file pins its tmpfs pages, so one whose file is gone or replaced is dropped here
+        path = self._path(key)
+        try:
+            inode = os.stat(path).st_ino
+        except OSError:
+            self._forget(key)
+            return None
+        with self._lock:
+            mapped = self._mapped.get(key)
+            if mapped is not None and mapped[1] == inode:
+                self._mapped.move_to_end(key)
+        if mapped is not None and mapped[1] == inode:
+            self._touch(path)
+            return mapped[0]
+        # another worker may evict the entry between the load and the touch
+        try:
+            W = np.load(path, mmap_mode='r')
+            os.utime(path)
+        except (OSError, ValueError):
+            self._forget(key)
+            return None
+        with self._lock:
+            self._mapped[key] = (W, inode)
+            self._mapped.move_to_end(key)
+            while len(self._mapped) > MAX_MAPPED:
+                self._mapped.popitem(last=False)
+        return W
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _forget(self, key):
+        with self._lock:
+            self._mapped.pop(key, None)
+
+    def count(self, hit):
+        # brownian runs on request threads of the same worker
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, key, W):
+        # renamed into place, so a mapped entry is always complete
+        self._evict(W.nbytes)
+        # np.save appends .npy to names without it, so the temporary name keeps the extension last
+        tmp_path = f'{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp.npy'
+        np.save(tmp_path, W)
+        os.replace(tmp_path, self._path(key))
+
+    def _prune(self):
+        # drops this worker's mappings of entries other workers evicted or replaced, so their pages can go
+        with self._lock:
+            mapped = [(key, inode) for key, (_, inode) in self._mapped.items()]
+        for key, inode in mapped:
+            try:
+                current = os.stat(self._path(key)).st_ino
+            except OSError:
+                current = None
+            if current != inode:
+                with self._lock:
+                    if key in self._mapped and self._mapped[key][1] == inode:
+                        del self._mapped[key]
+
+    def _evict(self, incoming):
+        # least recently used first; a worker still mapping an evicted entry drops it on its next get or put, and
+        # arrays handed out to running requests keep their pages only until those finish
+        self._prune()
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy') and not name.endswith('.tmp.npy'):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name[:-4]))
+        total = sum(size for _, size, _ in entries) + incoming
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            with self._lock:
+                self._mapped.pop(key, None)
+            total -= size
+
+    def stats(self):
+        sizes = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy') and not name.endswith('.tmp.npy'):
+                try:
+                    sizes.append(os.path.getsize(os.path.join(self.directory, name)))
+                except OSError:
+                    continue
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {
+            'directory': self.directory,
+            'entries': len(sizes),
+            'bytes': sum(sizes),
+            'max_bytes': self.max_bytes,
+            'hits': hits,
+            'misses': misses
+        }
+
+def load(directory, max_bytes):
+    global _bank
+    _bank = PathBank(directory, max_bytes) if directory else None
+    return _bank
+
+def bank():
+    return _bank
+
+def preload(specs, N=365, T=1):
+    # 'seed:paths,...' drawn at start-up; with gunicorn --preload the master does it once for every worker
+    from app.simulations.gbm import geometric_brownian_motion
+    for spec in filter(None, specs.split(',')):
+        seed, paths = map(int, spec.split(':'))
+        shocks.seed(seed)
+        geometric_brownian_motion(1.0, 0.0, 0.0, T, N, paths)
+    shocks.release()
+
+def brownian(normals, N, dt, draw):
+    # cumulated shocks for a (paths, N) GBM drawn from normals (a shocks.PathNormals); draw() builds them when
+    # they are not shared (unseeded requests, no bank configured) or not there yet. Shared arrays are read-only
+    if _bank is None or normals.key is None:
+        return draw()
+
+    key = _bank.key(normals.key, N, dt)
+    W = _bank.get(key)
+    _bank.count(W is not None)
+    if W is not None:
+        return W
+
+    W = draw()
+    _bank.put(key, W)
+    return W
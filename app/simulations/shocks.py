@@ -0,0 +1,201 @@
+# app/simulations/shocks.py
+#
+# every random draw of the engines comes from here, never from the global np.random state. A request's seed (fresh
+# entropy when it has none) roots a SeedSequence and each consumer gets its own child stream:
+#   stream(site, index)          sequential draws, one stream per simulation or run, e.g. stream('tokenomics', sim)
+#   path_normals(site, paths)    (paths, days) shocks, each block of PATH_BLOCK paths drawn from its own stream
+# so a draw depends only on (seed, site, index or path, day), never on how paths are batched, how days are chunked
+# or which thread or process runs what: chunked and parallel runs are bit-identical to serial ones.
+#
+# with a shock bank loaded (SHOCK_BANK_PATH) the same streams read pre-generated standard normals out of a
+# memory-mapped .npy instead, and the pages are shared by every process on the host. Path blocks of a run that
+# declares its days read disjoint windows laid out from an offset derived from the request's SeedSequence, so no two
+# blocks share shocks unless the run is larger than the bank; other streams start at an offset derived from their
+# own SeedSequence. Generate a bank with python -m app.cli shocks shocks.npy
+
+import logging
+import threading
+import zlib
+import numpy as np
+
+# part of result cache keys: bump it whenever the draws for a given seed change
+STREAM_VERSION = 'pcg64-blocks-1'
+PATH_BLOCK = 64
+DEFAULT_BANK_SIZE = 2 ** 24  # 128 MiB of float64
+GENERATE_BLOCK = 2 ** 22
+# part of the bank fingerprint: bump it whenever the bank offsets a given seed reads change
+BANK_LAYOUT = 'windows-1'
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_bank = None
+
+class ShockBank:
+    def __init__(self, path):
+        self.path = path
+        self.shocks = np.load(path, mmap_mode='r')
+        if self.shocks.ndim != 1 or self.shocks.dtype != np.float64:
+            raise ValueError(f"{path} is not a 1-d float64 shock bank")
+        self.size = self.shocks.shape[0]
+        # identifies the bank's contents for result cache keys; the first draws differ between generation seeds
+        self.fingerprint = f"{self.size}:{self.shocks[:4].tobytes().hex()}:{BANK_LAYOUT}"
+
+    def read(self, start, count):
+        # a read-only view into the mapping unless the block wraps past the end of the bank
+        if start + count <= self.size:
+            return self.shocks[start:start + count]
+        return np.take(self.shocks, np.arange(start, start + count) % self.size)
+
+def _offset(seed_sequence, size):
+    return int(seed_sequence.generate_state(1, np.uint64)[0]) % size
+
+class BankStream:
+    # the Generator methods the engines use, reading consecutive bank entries from the given offset, or one the
+    # stream's SeedSequence picks
+    def __init__(self, bank, seed_sequence, offset=None):
+        self.bank = bank
+        self.cursor = (_offset(seed_sequence, bank.size) if offset is None else offset) % bank.size
+
+    def standard_normal(self, size=None):
+        count = 1 if size is None else int(np.prod(size))
+        z = self.bank.read(self.cursor, count)
+        self.cursor = (self.cursor + count) % self.bank.size
+        return float(z[0]) if size is None else z.reshape(size)
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        return loc + scale * self.standard_normal(size)
+
+def _site(site):
+    return zlib.crc32(site.encode())
+
+class Streams:
+    # every stream of one request, each spawned from the request seed under a fixed key, so no stream depends on
+    # how much of another has been drawn
+    def __init__(self, seed=None):
+        self.seed = None if seed is None else int(seed)
+        self.entropy = np.random.SeedSequence(self.seed).entropy
+        self._streams = {}
+        self._next_path = {}
+        self._lock = threading.Lock()
+
+    def spawn(self, key, offset=None):
+        # offset only places a bank stream, generator streams ignore it
+        seed_sequence = np.random.SeedSequence(self.entropy, spawn_key=key)
+        if _bank is not None:
+            return BankStream(_bank, seed_sequence, offset)
+        return np.random.Generator(np.random.PCG64(seed_sequence))
+
+    def bank_base(self, site):
+        # where the site's path block windows start in the bank
+        return _offset(np.random.SeedSequence(self.entropy, spawn_key=(_site(site), 2)), _bank.size)
+
+    def stream(self, site, index=0):
+        key = (_site(site), 0, int(index))
+        with self._lock:
+            if key not in self._streams:
+                self._streams[key] = self.spawn(key)
+            return self._streams[key]
+
+    def restart(self):
+        # forget every draw so far: the next ones repeat the request's from the start
+        with self._lock:
+            self._streams = {}
+            self._next_path = {}
+
+    def reserve(self, site, paths):
+        # consecutive reservations for a site get consecutive path ranges, as the batches of one larger run would
+        with self._lock:
+            start = self._next_path.get(site, 0)
+            self._next_path[site] = start + paths
+            return start
+
+class PathNormals:
+    # standard normals for paths [start, start + paths) of a site, handed out some days at a time. Path p of asset
+    # a is always column p % PATH_BLOCK of the stream of block p // PATH_BLOCK, read a day (one row) at a time.
+    # With a bank, a run that gives its days reads block b of asset a from window b * assets + a, days * PATH_BLOCK
+    # entries each, past the site's base: disjoint for every block of the run, however its paths are batched
+    def __init__(self, streams, site, paths, assets=1, days=None):
+        self.start = streams.reserve(site, paths)
+        self.paths = paths
+        self.assets = assets
+        self.first = self.start // PATH_BLOCK
+        last = (self.start + paths - 1) // PATH_BLOCK
+        offsets = {}
+        if _bank is not None and days is not None:
+            window = days * PATH_BLOCK
+            base = streams.bank_base(site)
+            offsets = {(asset, block): base + (block * assets + asset) * window
+                       for asset in range(assets) for block in range(self.first, last + 1)}
+            if (last + 1) * assets * window > _bank.size:
+                logger.warning("shock bank of %d draws is smaller than the %d this run reads: path blocks reuse "
+                               "each other's shocks; generate a larger bank", _bank.size, (last + 1) * assets * window)
+        self.blocks = [[streams.spawn((_site(site), 1, asset, block), offsets.get((asset, block)))
+                        for block in range(self.first, last + 1)] for asset in range(assets)]
+        # names these draws for the shared path bank; unseeded draws are never shared
+        self.key = None
+        if streams.seed is not None:
+            self.key = (streams.seed, site, self.start, paths, assets, fingerprint(), STREAM_VERSION)
+
+    def normals(self, days, out=None, assets=None):
+        # the next days of every path: (paths, days), or (assets, paths, days) for several assets; out may be either
+        # shape for a single asset. Only the listed assets are drawn, the others are zero and their streams stay put
+        if out is None:
+            out = np.empty((self.assets, self.paths, days) if self.assets > 1 else (self.paths, days))
+        view = out if out.ndim == 3 else out[None]
+        for asset, blocks in enumerate(self.blocks):
+            if assets is not None and asset not in assets:
+                view[asset] = 0.0
+                continue
+            for i, stream in enumerate(blocks):
+                block_start = (self.first + i) * PATH_BLOCK
+                lo = max(block_start, self.start)
+                hi = min(block_start + PATH_BLOCK, self.start + self.paths)
+                z = stream.standard_normal((days, PATH_BLOCK))
+                view[asset, lo - self.start:hi - self.start] = z[:, lo - block_start:hi - block_start].T
+        return out
+
+def generate(path, size=DEFAULT_BANK_SIZE, seed=0):
+    bank = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(size,))
+    rng = np.random.default_rng(seed)
+    for start in range(0, size, GENERATE_BLOCK):
+        stop = min(start + GENERATE_BLOCK, size)
+        rng.standard_normal(stop - start, out=bank[start:stop])
+    bank.flush()
+    del bank
+
+def load(path):
+    global _bank
+    _bank = ShockBank(path) if path else None
+    return _bank
+
+def bank():
+    return _bank
+
+def fingerprint():
+    return None if _bank is None else _bank.fingerprint
+
+def seed(value=None):
+    # starts the current thread's streams; unseeded requests get fresh entropy
+    _local.streams = Streams(value)
+
+def release():
+    _local.streams = None
+
+def restart():
+    current().restart()
+
+def current():
+    # the thread's streams, started unseeded on first use (scripts, jobs without a seed). Worker threads drawing
+    # on a request's behalf are handed this object rather than starting their own
+    streams = getattr(_local, 'streams', None)
+    if streams is None:
+        streams = _local.streams = Streams()
+    return streams
+
+def stream(site, index=0):
+    return current().stream(site, index)
+
+def path_normals(site, paths, assets=1, days=None):
+    # days, when the caller knows its horizon, lays the paths out in disjoint bank windows
+    return PathNormals(current(), site, paths, assets, days)
@@ -0,0 +1,130 @@
+# app/store.py
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    arrays TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    expires REAL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+class ResultStore:
+    # on-disk store shared by every worker on the host: a SQLite index (WAL, so readers never block)
+    # pointing at directories of .npy files. Entries are written to a private temp dir, renamed into
+    # place and only then indexed, so readers never see a partial entry.
+    def __init__(self, root, max_bytes=2**30, ttl=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(root, 'tmp'), exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        # one connection per thread and per process, sqlite handles must not cross a fork
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(os.path.join(self.root, 'index.sqlite'), timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def put(self, key, arrays, meta=None, ttl=None):
+        name = uuid.uuid4().hex
+        tmp_path = os.path.join(self.root, 'tmp', name)
+        path = os.path.join(self.root, 'objects', name)
+        os.makedirs(tmp_path)
+        size = 0
+        for array_name, array in arrays.items():
+            array_path = os.path.join(tmp_path, f'{array_name}.npy')
+            np.save(array_path, np.ascontiguousarray(array))
+            size += os.path.getsize(array_path)
+        os.rename(tmp_path, path)
+
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            old = db.execute('SELECT path FROM entries WHERE key = ?', (key,)).fetchone()
+            db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (
+                key, name, json.dumps(list(arrays)), json.dumps(meta or {}), size, now, now,
+                now + ttl if ttl else None
+            ))
+            stale = [old[0]] if old else []
+            stale += self._evict(db)
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        for stale_name in stale:
+            shutil.rmtree(os.path.join(self.root, 'objects', stale_name), ignore_errors=True)
+
+    def _evict(self, db):
+        # drop expired entries, then least recently used ones until the store fits its budget
+        names = [row[0] for row in db.execute('SELECT path FROM entries WHERE expires < ?', (time.time(),))]
+        db.execute('DELETE FROM entries WHERE expires < ?', (time.time(),))
+        total = db.execute('SELECT COALESCE(SUM(bytes), 0) FROM entries').fetchone()[0]
+        if total > self.max_bytes:
+            for key, name, size in db.execute('SELECT key, path, bytes FROM entries ORDER BY accessed').fetchall():
+                if total <= self.max_bytes:
+                    break
+                db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                names.append(name)
+                total -= size
+        return names
+
+    def get(self, key, mmap=True):
+        db = self._connect()
+        row = db.execute('SELECT path, arrays, meta, expires FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        name, array_names, meta, expires = row
+        if expires is not None and expires < time.time():
+            return None
+        path = os.path.join(self.root, 'objects', name)
+        try:
+            arrays = {array_name: np.load(os.path.join(path, f'{array_name}.npy'), mmap_mode='r' if mmap else None)
+                      for array_name in json.loads(array_names)}
+        except FileNotFoundError:
+            # replaced or evicted by another worker between the lookup and the read
+            return None
+        db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (time.time(), key))
+        return arrays, json.loads(meta)
+
+    def delete(self, key):
+        db = self._connect()
+        row = db.execute('SELECT path FROM entries WHERE key = ?', (key,)).fetchone()
+        db.execute('DELETE FROM entries WHERE key = ?', (key,))
+        if row:
+            shutil.rmtree(os.path.join(self.root, 'objects', row[0]), ignore_errors=True)
+
+    def clear(self):
+        db = self._connect()
+        names = [row[0] for row in db.execute('SELECT path FROM entries')]
+        db.execute('DELETE FROM entries')
+        for name in names:
+            shutil.rmtree(os.path.join(self.root, 'objects', name), ignore_errors=True)
+
+    def stats(self):
+        entries, size = self._connect().execute('SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM entries').fetchone()
+        return {'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes}
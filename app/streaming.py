@@ -0,0 +1,51 @@
+# app/streaming.py
+
+import numpy as np
+from app.constants import MIN_BATCH_PATHS
+from app.serialization import dumps
+from app.simulations import shocks
+
+def batch_sizes(total_paths, batch_paths):
+    # near-equal batches of at most batch_paths, but never one under MIN_BATCH_PATHS: the percentiles of a
+    # handful of paths are too noisy to average, so a small remainder is spread over fewer, larger batches
+    count = -(-total_paths // batch_paths)
+    count = max(1, min(count, total_paths // MIN_BATCH_PATHS))
+    size, extra = divmod(total_paths, count)
+    return [size + 1] * extra + [size] * (count - extra)
+
+def stream_percentile_bands(run_batch, total_paths, batch_paths, band_keys):
+    # runs a model in batches of paths and yields (paths_done, result) after each batch, where the band
+    # keys hold the path-weighted average of every batch's bands so far; other keys come from the last batch
+    done = 0
+    totals = {}
+    for paths in batch_sizes(total_paths, batch_paths):
+        result = run_batch(paths)
+        for key in band_keys:
+            totals[key] = totals.get(key, 0) + np.asarray(result[key], dtype=float) * paths
+        done += paths
+
+        snapshot = dict(result)
+        for key in band_keys:
+            snapshot[key] = totals[key] / done
+        yield done, snapshot
+
+def sse_event(data, event=None):
+    message = f"event: {event}\n" if event else ''
+    return message + f"data: {dumps(data).decode()}\n\n"
+
+def sse_bands(run_batch, total_paths, batch_paths, band_keys, exact=None):
+    # server-sent events for stream_percentile_bands; a client disconnect closes this generator between batches.
+    # Averaged bands only approximate the percentiles over every path, so they go out as provisional, and when the
+    # caller can afford it the last frame is exact(): one run over all paths, on the draws the batches used
+    batches = len(batch_sizes(total_paths, batch_paths))
+    rerun = batches > 1 and exact is not None
+    for done, snapshot in stream_percentile_bands(run_batch, total_paths, batch_paths, band_keys):
+        final = done == total_paths and not rerun
+        snapshot.update({'paths_done': done, 'paths': total_paths, 'provisional': not final,
+                         'exact': final and batches == 1})
+        yield sse_event(snapshot, event='bands')
+    if rerun:
+        shocks.restart()
+        result = dict(exact(), paths_done=total_paths, paths=total_paths, provisional=False, exact=True)
+        yield sse_event(result, event='bands')
+    yield sse_event({'paths_done': total_paths, 'paths': total_paths}, event='done')
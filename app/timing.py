@@ -0,0 +1,65 @@
+# app/timing.py
+
+import threading
+import time
+from contextlib import contextmanager
+from flask import request
+
+_local = threading.local()
+
+class StageTimer:
+    # wall time per named stage of one request; repeated stages (one per day block, per scenario) add up
+    def __init__(self, debug=False):
+        self.started = time.perf_counter()
+        self.debug = debug
+        self.stages = {}
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def as_dict(self):
+        timings = {name: seconds * 1000 for name, seconds in self.stages.items()}
+        timings['total'] = (time.perf_counter() - self.started) * 1000
+        return timings
+
+    def header(self):
+        return ', '.join(f'{name};dur={ms:.2f}' for name, ms in self.as_dict().items())
+
+def current():
+    return getattr(_local, 'timer', None)
+
+@contextmanager
+def stage(name):
+    # no-op outside an instrumented request, so the engines can mark stages unconditionally
+    timer = getattr(_local, 'timer', None)
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - start)
+
+def record(name, since):
+    # for stages too long to indent under a with block: since is a time.perf_counter() reading
+    timer = getattr(_local, 'timer', None)
+    if timer is not None:
+        timer.add(name, time.perf_counter() - since)
+
+def init_app(app):
+    # registered first so the cache lookup and every later hook run inside the request's timer
+    @app.before_request
+    def start_stage_timer():
+        _local.timer = StageTimer(debug=request.args.get('timing', '').lower() in ('1', 'true', 'yes'))
+
+    @app.after_request
+    def server_timing(response):
+        timer = current()
+        if timer is not None:
+            response.headers['Server-Timing'] = timer.header()
+        return response
+
+    @app.teardown_request
+    def stop_stage_timer(exc=None):
+        _local.timer = None
@@ -1,12 +1,21 @@
 import copy
+import json
+import time
+import numpy as np
+from app.timing import record
 
-def run_boundary_analysis(simulation, price_scenarios, borrow_scenarios):
+def run_boundary_analysis(simulation, price_scenarios, borrow_scenarios, progress=None):
+    simulate_start = time.perf_counter()
     results = []
+    scenarios = min(len(price_scenarios), len(borrow_scenarios))
     for price_scenario, borrow_scenario in zip(price_scenarios, borrow_scenarios):
         sim = copy.deepcopy(simulation)
-        ltv_ratios = []
-        utilization_ratios = []
-        liquidation_events = []
+        # fill arrays in place, the response layer serializes them without going through Python lists; the run
+        # stops with the shorter scenario, as zip does
+        days = min(len(price_scenario), len(borrow_scenario))
+        ltv_ratios = np.empty(days)
+        utilization_ratios = np.empty(days)
+        liquidation_events = np.zeros(days, dtype=bool)
         for day, (price, borrow_amount) in enumerate(zip(price_scenario, borrow_scenario)):
             liquidated = sim.update_price(price)
             if not liquidated:
@@ -22,7 +31,7 @@ def run_boundary_analysis(simulation, price_scenarios, borrow_scenarios):
             else:
                 ltv_ratio = float('inf') if sim.loan_amount > 0 else 0
             
-            ltv_ratios.append(float(ltv_ratio))
+            ltv_ratios[day] = ltv_ratio
             
             # Safeguard against division by zero for utilization ratio
             if sim.total_deposits > 0:
@@ -30,15 +39,98 @@ def run_boundary_analysis(simulation, price_scenarios, borrow_scenarios):
             else:
                 utilization_ratio = 1 if sim.loan_amount > 0 else 0
             
-            utilization_ratios.append(float(utilization_ratio))
-            liquidation_events.append(bool(liquidated))
+            utilization_ratios[day] = utilization_ratio
+            liquidation_events[day] = liquidated
 
         results.append({
-            'price_scenario': [float(p) for p in price_scenario],
-            'borrow_scenario': [float(b) for b in borrow_scenario],
+            'price_scenario': np.asarray(price_scenario, dtype=float),
+            'borrow_scenario': np.asarray(borrow_scenario, dtype=float),
             'final_price': float(price_scenario[-1]),
             'ltv_ratios': ltv_ratios,
             'utilization_ratios': utilization_ratios,
             'liquidation_events': liquidation_events
         })
-    return results
\ No newline at end of file
+        if progress is not None:
+            progress(len(results) / scenarios)
+    record('simulate', simulate_start)
+    return results
+
+def run_boundary_analysis_batch(simulations, price_scenarios, borrow_scenarios):
+    # run_boundary_analysis for several simulations at once: every (simulation, scenario) pair is one element of
+    # (simulations, scenarios) arrays stepped a day at a time, with the scalar code's branches as masks, so each
+    # result equals its own run_boundary_analysis. Scenarios of different lengths go one by one
+    if len({len(scenario) for scenario in list(price_scenarios) + list(borrow_scenarios)}) != 1:
+        return [run_boundary_analysis(simulation, price_scenarios, borrow_scenarios) for simulation in simulations]
+
+    simulate_start = time.perf_counter()
+    prices = np.asarray(price_scenarios, dtype=float)
+    borrows = np.asarray(borrow_scenarios, dtype=float)
+    days = prices.shape[1]
+    shape = (len(simulations), prices.shape[0])
+
+    def column(name):
+        return np.array([float(getattr(simulation, name)) for simulation in simulations])[:, None]
+
+    collateral = np.broadcast_to(column('collateral_amount'), shape).copy()
+    loan = np.broadcast_to(column('loan_amount'), shape).copy()
+    max_ltv, liquidation_threshold = column('max_ltv'), column('liquidation_threshold')
+    total_deposits, liquidation_penalty = column('total_deposits'), column('liquidation_penalty')
+    # Python's pow, as calculate_interest uses: numpy's can differ in the last bit
+    daily_growth = np.array([(1 + float(simulation.interest_rate)) ** (1 / 365) for simulation in simulations])[:, None]
+
+    ltv_ratios = np.empty(shape + (days,))
+    utilization_ratios = np.empty(shape + (days,))
+    liquidation_events = np.zeros(shape + (days,), dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for day in range(days):
+            price = np.maximum(prices[:, day], 0.000001)
+            value = collateral * price
+            liquidated = np.where(value > 0, loan / value >= liquidation_threshold, loan > 0)
+
+            # borrow when not liquidated and under the max LTV
+            borrowed = loan + borrows[:, day]
+            loan = np.where(~liquidated & (borrowed <= value * max_ltv), borrowed, loan)
+
+            # liquidate: the whole collateral when the penalised loan exceeds it, otherwise enough of it to repay
+            liquidation_amount = loan * (1 + liquidation_penalty)
+            wiped = liquidated & (liquidation_amount > value)
+            repaid = liquidated & ~wiped
+            collateral = np.where(wiped, 0.0, np.where(repaid, np.maximum(0, collateral - liquidation_amount / price),
+                                                       collateral))
+            loan = np.where(wiped, np.maximum(0, loan - value), np.where(repaid, 0.0, loan))
+
+            loan = loan + (loan * daily_growth - loan)  # daily interest
+
+            value = collateral * price
+            ltv_ratios[:, :, day] = np.where(value > 0, loan / value, np.where(loan > 0, np.inf, 0.0))
+            utilization_ratios[:, :, day] = np.where(total_deposits > 0, loan / total_deposits,
+                                                     np.where(loan > 0, 1.0, 0.0))
+            liquidation_events[:, :, day] = liquidated
+    record('simulate', simulate_start)
+
+    return [[{
+        'price_scenario': np.asarray(price_scenario, dtype=float),
+        'borrow_scenario': np.asarray(borrow_scenario, dtype=float),
+        'final_price': float(price_scenario[-1]),
+        'ltv_ratios': ltv_ratios[i, k],
+        'utilization_ratios': utilization_ratios[i, k],
+        'liquidation_events': liquidation_events[i, k]
+    } for k, (price_scenario, borrow_scenario) in enumerate(zip(price_scenarios, borrow_scenarios))]
+        for i in range(len(simulations))]
+
+def _canonical_value(value):
+    # numbers compare by value so 1 and 1.0 share a key; bools stay bools
+    if isinstance(value, dict):
+        return {str(k): _canonical_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical_value(v) for v in value]
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return str(value)
+
+def canonical_params(params):
+    return json.dumps(_canonical_value(params), sort_keys=True, separators=(',', ':'))
@@ -0,0 +1,43 @@
+# benchmarks/serialization.py
+#
+# compares the response layer against the old .tolist() + json path on simulation-sized outputs
+#   python -m benchmarks.serialization [paths] [days]
+
+import json
+import sys
+import time
+import numpy as np
+from app.serialization import dumps
+
+def _payload(paths, days):
+    rng = np.random.default_rng(0)
+    return {
+        'dates': [f'day {d}' for d in range(days)],
+        'price_percentiles': rng.random((5, days)),
+        'tvl_percentiles': rng.random((5, days)),
+        'il_percentiles': rng.random((5, days)),
+        'simulated_prices': rng.random((paths, days))
+    }
+
+def _tolist_json(payload):
+    return json.dumps({k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in payload.items()}).encode()
+
+def _timeit(func, payload, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = func(payload)
+        best = min(best, time.perf_counter() - start)
+    return best, len(body)
+
+def main(paths=1000, days=365):
+    payload = _payload(paths, days)
+    baseline, baseline_bytes = _timeit(_tolist_json, payload)
+    current, current_bytes = _timeit(dumps, payload)
+    print(f"{paths} paths x {days} days")
+    print(f"  tolist + json  {baseline * 1000:8.1f} ms  {baseline_bytes / 2**20:6.1f} MiB")
+    print(f"  dumps          {current * 1000:8.1f} ms  {current_bytes / 2**20:6.1f} MiB")
+    print(f"  speedup        {baseline / current:8.1f}x")
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,231 @@
+# benchmarks/suite.py
+#
+# engine benchmarks at realistic sizes: best / median wall time over seeded runs plus the tracemalloc peak.
+#   python -m benchmarks run [--filter gbm] [--repeat 5] [--quick] [--output results.json]
+#   python -m benchmarks baseline [--output benchmarks/baseline.json]
+#   python -m benchmarks compare [--baseline benchmarks/baseline.json] [--threshold 0.25]
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import numpy as np
+from app.simulations import shocks
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+class Benchmark:
+    # setup(**size) builds the inputs once and returns a zero-argument callable for one iteration
+    def __init__(self, name, setup, sizes):
+        self.name = name
+        self.setup = setup
+        self.sizes = sizes
+
+def _size_key(size):
+    return ','.join(f'{k}={v}' for k, v in size.items())
+
+def _ou_process(days):
+    from app.simulations.ou_process import OUParams, simulate_OU_process
+    params = OUParams(alpha=0.1, gamma=1.0, beta=0.01, X_0=1.0)
+    return lambda: simulate_OU_process(days, 1, params)
+
+def _ou_processes(scenarios, days):
+    from app.simulations.ou_process import OUParams, simulate_OU_processes
+    params = [OUParams(alpha=0.1, gamma=1.0, beta=0.01 * (i + 1), X_0=1.0) for i in range(scenarios)]
+    return lambda: simulate_OU_processes(days, params)
+
+def _gbm(paths, days):
+    from app.simulations.gbm import geometric_brownian_motion
+    return lambda: geometric_brownian_motion(1.0, 0.1, 0.5, days / 365, days, paths)
+
+def _correlated_gbm_chunks(paths, days):
+    from app.simulations.gbm import correlated_geometric_brownian_motion_chunks
+
+    def run():
+        chunks = correlated_geometric_brownian_motion_chunks([1.0, 3750.0], [0.1, 0.05], [0.5, 0.3],
+                                                             [[1.0, 0.6], [0.6, 1.0]], days / 365, days, paths)
+        for _ in chunks:
+            pass
+    return run
+
+def _boundary_analysis(days):
+    from app.models.lending import LendingSimulation
+    from app.utils import run_boundary_analysis
+    simulation = LendingSimulation(collateral_amount=1000, max_ltv=0.75, liquidation_threshold=0.8,
+                                   total_deposits=1e6, interest_rate=0.05, liquidation_penalty=0.05)
+    price_scenarios = [np.ones(days), 1 + 0.001 * np.arange(days), 1 + 0.1 * np.sin(2 * np.pi * np.arange(days) / 30)]
+    borrow_scenarios = [np.full(days, 1000.0), 1000 + 10.0 * np.arange(days), np.where(np.arange(days) % 30 == 0, 5000.0, 0)]
+    return lambda: run_boundary_analysis(simulation, price_scenarios, borrow_scenarios)
+
+TOKENOMICS_PARAMS = dict(
+    initial_tvl=266290000, initial_borrow=28680000, initial_token_circulating=40000000, initial_reserves=1000000,
+    total_token_emitted=300000000, mom_tvl_growth=0.025, mom_borrow_growth=0.05, base_monthly_emissions_rate=0.0075,
+    emissions_step_up=0.20, token_price=0.03, protocol_revenue_share=0.2, target_utilization=0.8,
+    total_team_allocation=150000000, cliff=12, vesting_months=48, base_vesting_per_month=0.0208, vesting_step_up=0.10,
+    monthly_liquidations=0.005, monthly_sequencer_fees=0.005, base_rate=0.00, multiplier=0.18, kink=0.80,
+    jump_multiplier=4.0
+)
+
+def _tokenomics(sims, months):
+    from app.models.tokenomics import TokenomicsSimulation
+    # the engine moves token_price as it runs, so every iteration starts from a fresh instance
+    return lambda: TokenomicsSimulation(**TOKENOMICS_PARAMS).run_simulations(sims, months)
+
+# allocation: (percentage, tge unlock %, cliff months, vesting months)
+ALLOCATIONS = {
+    'Strategic': (8, 0, 6, 9), 'Seed': (8.25, 0, 4, 9), 'Public Sale': (2, 20, 0.5, 3),
+    'Founders / Team': (15, 0, 12, 48), 'Advisors': (6, 0, 12, 36), 'Strategic Partners (BD)': (5, 0, 2, 24),
+    'Airdrop #1': (5, 33, 0.5, 3), 'GTM': (2, 90, 6, 6), 'Treasury': (5, 0, 6, 12), 'Incentivization': (1.5, 0, 2, 3),
+    'Emissions': (30, 0, 2, 133), 'Airdrop #2': (5, 0, 0, 48), 'Liquidity Pool': (7.25, 0, 12, 24)
+}
+
+def _fund_raising(supply=1e9):
+    from app.models.fund_raising import FundRaising
+    return FundRaising(
+        [{'allocation': k, 'percentage': v[0]} for k, v in ALLOCATIONS.items()],
+        [{'allocation': k, 'tokens': supply * v[0] / 100, 'tgeUnlock': v[1], 'cliff': v[2], 'vestingPeriod': v[3],
+          'vestingStart': '2026-10'} for k, v in ALLOCATIONS.items()],
+        {'date1': '2026-12-01', 'amount1': 30, 'date2': '2027-03-01', 'amount2': 30, 'date3': '2027-06-01', 'amount3': 40},
+        supply, 5e6
+    )
+
+def _vesting_chart(allocations):
+    from app.models.supply import _vesting_timeline
+    fund_raising = _fund_raising()
+
+    def run():
+        # cold timeline cache, otherwise every iteration after the first only measures plotly
+        _vesting_timeline.cache_clear()
+        fund_raising.generate_vesting_chart()
+    return run
+
+def _scenario_grid(valuations, supplies):
+    fund_raising = _fund_raising()
+    return lambda: fund_raising.run_scenario_grid(np.linspace(1e6, 5e7, valuations), np.linspace(1e8, 1e10, supplies))
+
+def _lp(paths, days, pool_model):
+    from app.models.lp_sim import LPSimulation
+    return lambda: LPSimulation(0.1, 1e6, 1e9, days, 0.1, 0.5, paths, 0.1, 10, 10, 10, pool_model=pool_model,
+                                daily_volume=0.05).simulate()
+
+def _serialization(paths, days):
+    from app.serialization import dumps
+    rng = np.random.default_rng(0)
+    payload = {'dates': [str(d) for d in range(days)], 'bands': rng.random((5, days)), 'paths': rng.random((paths, days))}
+    return lambda: dumps(payload)
+
+BENCHMARKS = [
+    Benchmark('ou_process', _ou_process, [{'days': 365}, {'days': 3650}]),
+    Benchmark('ou_processes', _ou_processes, [{'scenarios': 100, 'days': 365}]),
+    Benchmark('gbm', _gbm, [{'paths': 1000, 'days': 365}, {'paths': 10000, 'days': 365}]),
+    Benchmark('correlated_gbm_chunks', _correlated_gbm_chunks, [{'paths': 10000, 'days': 365},
+                                                                {'paths': 100000, 'days': 365}]),
+    Benchmark('boundary_analysis', _boundary_analysis, [{'days': 365}, {'days': 3650}]),
+    Benchmark('tokenomics', _tokenomics, [{'sims': 100, 'months': 36}, {'sims': 1000, 'months': 36}]),
+    Benchmark('vesting_chart', _vesting_chart, [{'allocations': len(ALLOCATIONS)}]),
+    Benchmark('scenario_grid', _scenario_grid, [{'valuations': 10, 'supplies': 10}]),
+    Benchmark('lp', _lp, [{'paths': 1000, 'days': 365, 'pool_model': 'static'},
+                          {'paths': 10000, 'days': 365, 'pool_model': 'static'},
+                          {'paths': 1000, 'days': 365, 'pool_model': 'constant_product'},
+                          {'paths': 1000, 'days': 365, 'pool_model': 'concentrated'}]),
+    Benchmark('serialization', _serialization, [{'paths': 2000, 'days': 365}])
+]
+
+def measure(func, repeat):
+    # one untimed warm-up for lazy imports and first-touch allocations
+    func()
+    times = []
+    for _ in range(repeat):
+        shocks.seed(0)
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    # separate run for memory, tracemalloc slows allocation-heavy code down
+    shocks.seed(0)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'best': min(times), 'median': statistics.median(times), 'peak_bytes': peak}
+
+def run(name_filter=None, repeat=5, quick=False, out=sys.stdout):
+    results = {}
+    for benchmark in BENCHMARKS:
+        if name_filter and name_filter not in benchmark.name:
+            continue
+        for size in benchmark.sizes[:1] if quick else benchmark.sizes:
+            key = f'{benchmark.name}[{_size_key(size)}]'
+            results[key] = measure(benchmark.setup(**size), repeat)
+            r = results[key]
+            print(f"{key:<62} {r['best'] * 1000:10.1f} ms  {r['median'] * 1000:10.1f} ms  "
+                  f"{r['peak_bytes'] / 2**20:8.1f} MiB", file=out)
+    return results
+
+def environment():
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+            'processor': platform.processor(), 'created': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+def compare(results, baseline, threshold=0.25, memory_threshold=0.25, out=sys.stdout):
+    # best-of-N time and peak memory against the baseline; returns the regressed keys
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<62} new", file=out)
+            continue
+        time_ratio = result['best'] / base['best']
+        memory_ratio = result['peak_bytes'] / max(base['peak_bytes'], 1)
+        status = 'ok'
+        if time_ratio > 1 + threshold or memory_ratio > 1 + memory_threshold:
+            status = 'REGRESSION'
+            regressions.append(key)
+        elif time_ratio < 1 - threshold:
+            status = 'faster'
+        print(f"{key:<62} time x{time_ratio:5.2f}  memory x{memory_ratio:5.2f}  {status}", file=out)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('command', choices=['run', 'baseline', 'compare'])
+    parser.add_argument('--filter', help='only benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--quick', action='store_true', help='smallest size of each benchmark only')
+    parser.add_argument('--output', help='write results (run) or the baseline (baseline) here')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative slowdown')
+    parser.add_argument('--memory-threshold', type=float, default=0.25, help='allowed relative peak memory growth')
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, args.repeat, args.quick)
+    if args.command == 'run':
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        return 0
+
+    if args.command == 'baseline':
+        path = args.output or args.baseline
+        # keep entries that were filtered out of this run
+        existing = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                existing = json.load(f)['results']
+        with open(path, 'w') as f:
+            json.dump({'environment': environment(), 'results': dict(existing, **results)}, f, indent=2, sort_keys=True)
+        print(f"baseline written to {path}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print(f"\ncompared with baseline from {baseline['environment']['created']} "
+          f"(python {baseline['environment']['python']}, numpy {baseline['environment']['numpy']})")
+    regressions = compare(results, baseline['results'], args.threshold, args.memory_threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
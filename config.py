@@ -1,2 +1,62 @@
+import os
+import tempfile
+
 class Config:
-    DEBUG = True
\ No newline at end of file
+    DEBUG = True
+
+    # background jobs: JOB_WORKERS processes per web worker run them, their state and results live in JOB_DIR,
+    # shared by every worker on the host; at most JOB_QUEUE_SIZE jobs wait host-wide
+    JOB_DIR = os.environ.get('JOB_DIR', os.path.join(tempfile.gettempdir(), 'uzl-jobs'))
+    JOB_WORKERS = 2
+    JOB_QUEUE_SIZE = 16
+
+    # admission control: estimated peak memory per simulation, CPU time for synchronous requests and for jobs
+    ADMISSION_MAX_BYTES = 512 * 2**20
+    ADMISSION_MAX_SECONDS = 60
+    ADMISSION_MAX_JOB_SECONDS = 30 * 60
+
+    # in-process result cache shared by every simulation blueprint
+    RESULT_CACHE_MAX_ENTRIES = 256
+    RESULT_CACHE_MAX_BYTES = 256 * 2**20
+    RESULT_CACHE_TTL = 3600
+    # DELETE /cache is disabled unless a token is set, sent as X-Cache-Token
+    CACHE_TOKEN = os.environ.get('CACHE_TOKEN', '')
+    # identical concurrent requests wait this long on the in-flight one before computing themselves
+    RESULT_COALESCE_TIMEOUT = 300
+
+    # on-disk store behind the cache, shared by all gunicorn workers on the host; empty disables it
+    RESULT_STORE_DIR = os.environ.get('RESULT_STORE_DIR', os.path.join(tempfile.gettempdir(), 'uzl-result-store'))
+    RESULT_STORE_MAX_BYTES = int(os.environ.get('RESULT_STORE_MAX_BYTES', 2**30))
+
+    # Prometheus counters; every worker snapshots into this directory so /metrics on any of them sums the host.
+    # snapshots of exited workers keep counting until the server restarts, which clears the directory
+    METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'uzl-metrics'))
+    METRICS_FLUSH_INTERVAL = 1.0
+
+    # ?profile=top|file runs a request under cProfile; disabled unless a token is set, sent as X-Profile-Token
+    PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'uzl-profiles'))
+    PROFILE_TOP = 30
+
+    # per-request peak memory, logged with the request parameters: 'rss' (sampled), 'tracemalloc' (exact with one
+    # request per worker, slower) or empty to disable. Batchable engines switch to path batches and chunked engines
+    # shrink their blocks when a request nears its budget or the worker nears its RSS limit (0 = no limit)
+    MEMORY_TRACKING = os.environ.get('MEMORY_TRACKING', 'rss')
+    MEMORY_SAMPLE_INTERVAL = 0.01
+    MEMORY_REQUEST_BUDGET = int(os.environ.get('MEMORY_REQUEST_BUDGET', ADMISSION_MAX_BYTES))
+    MEMORY_WORKER_LIMIT = int(os.environ.get('MEMORY_WORKER_LIMIT', 0))
+
+    # memory-mapped .npy of standard normal shocks (python -m app.cli shocks <path>); when set,
+    # every random stream reads its draws from it at an offset given by the request seed. Empty draws from PCG64
+    SHOCK_BANK_PATH = os.environ.get('SHOCK_BANK_PATH', '')
+
+    # host-wide store of the cumulated shocks of seeded GBM runs, mapped read-only by every worker; a RAM-backed
+    # directory keeps it off disk, empty disables it. SHARED_PATHS_PRELOAD is 'seed:paths,...' drawn at start-up
+    SHARED_PATHS_DIR = os.environ.get('SHARED_PATHS_DIR', os.path.join(
+        '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'uzl-paths'))
+    SHARED_PATHS_MAX_BYTES = int(os.environ.get('SHARED_PATHS_MAX_BYTES', 2**30))
+    SHARED_PATHS_PRELOAD = os.environ.get('SHARED_PATHS_PRELOAD', '')
+
+    # replay corpus for the loadtest driver: sampled POST bodies appended as JSON lines; empty disables recording
+    REQUEST_RECORD_PATH = os.environ.get('REQUEST_RECORD_PATH', '')
+    REQUEST_RECORD_SAMPLE = float(os.environ.get('REQUEST_RECORD_SAMPLE', 1.0))
\ No newline at end of file
@@ -0,0 +1,8 @@
+# gunicorn.conf.py, read by gunicorn from the working directory
+
+from app.metrics import clear
+from config import Config
+
+def on_starting(server):
+    # runs once in the master before any worker: the workers' metric snapshots from the previous run go
+    clear(Config.METRICS_DIR)
@@ -0,0 +1,4 @@
+import sys
+from loadtest.driver import main
+
+sys.exit(main())
@@ -0,0 +1,252 @@
+# loadtest/driver.py
+#
+# replays a weighted mix of recorded request bodies at a fixed concurrency and reports per-endpoint throughput,
+# latency percentiles, the largest per-request peak the server reported (X-Memory-Peak) and the peak RSS seen while
+# that endpoint had requests in flight.
+#   python -m loadtest                                   # in-process app, mix weighted by corpus frequency
+#   python -m loadtest --url http://127.0.0.1:8000 --concurrency 16 --duration 60
+#   python -m loadtest --mix lending.run_lending_simulation=3,tokenomics.run_tokenomics_simulation=1
+# record a corpus from a running server with REQUEST_RECORD_PATH=loadtest/corpus.jsonl
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+import numpy as np
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'corpus.jsonl')
+
+def load_corpus(path):
+    corpus = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                corpus.setdefault(entry['endpoint'], []).append(entry)
+    return corpus
+
+def parse_mix(mix, corpus):
+    # endpoint=weight pairs; without --mix every endpoint is weighted by how often it was recorded
+    if not mix:
+        return {endpoint: float(len(entries)) for endpoint, entries in corpus.items()}
+    weights = {}
+    for item in mix.split(','):
+        endpoint, _, weight = item.partition('=')
+        if endpoint not in corpus:
+            raise SystemExit(f"no recorded requests for {endpoint}; corpus has {', '.join(sorted(corpus))}")
+        weights[endpoint] = float(weight or 1)
+    return weights
+
+class InProcessClient:
+    # one Flask test client per driver thread, so the app runs in this process like a gthread worker
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def post(self, url, body, headers):
+        response = self.client.post(url, json=body, headers=headers)
+        return response.status_code, len(response.get_data()), int(response.headers.get('X-Memory-Peak', 0))
+
+    def get(self, url):
+        return self.client.get(url).get_data(as_text=True)
+
+class HTTPClient:
+    # keep-alive connection per driver thread
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=600)
+
+    def post(self, url, body, headers):
+        try:
+            self.connection.request('POST', url, json.dumps(body), dict(headers, **{'Content-Type': 'application/json'}))
+            response = self.connection.getresponse()
+            return response.status, len(response.read()), int(response.getheader('X-Memory-Peak', 0))
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=600)
+            raise
+
+    def get(self, url):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            connection.request('GET', url)
+            return connection.getresponse().read().decode()
+        finally:
+            connection.close()
+
+def server_rss(client, in_process):
+    # in-process this is our own RSS; against gunicorn, the summed uzl_worker_rss_bytes of /metrics
+    if in_process:
+        from app.memory import rss
+        return rss()
+    total = 0
+    for line in client.get('/metrics').splitlines():
+        if line.startswith('uzl_worker_rss_bytes{'):
+            total += float(line.rsplit(' ', 1)[1])
+    return int(total)
+
+class Stats:
+    def __init__(self, endpoints):
+        self.latencies = {endpoint: [] for endpoint in endpoints}
+        self.errors = dict.fromkeys(endpoints, 0)
+        self.bytes = dict.fromkeys(endpoints, 0)
+        self.in_flight = dict.fromkeys(endpoints, 0)
+        self.peak_rss = dict.fromkeys(endpoints, 0)
+        self.peak_request = dict.fromkeys(endpoints, 0)
+        self.overall_peak_rss = 0
+        self.lock = threading.Lock()
+
+    def begin(self, endpoint):
+        with self.lock:
+            self.in_flight[endpoint] += 1
+
+    def end(self, endpoint, seconds, status, size, peak):
+        with self.lock:
+            self.in_flight[endpoint] -= 1
+            self.latencies[endpoint].append(seconds)
+            self.bytes[endpoint] += size
+            self.peak_request[endpoint] = max(self.peak_request[endpoint], peak)
+            if not 200 <= status < 300:
+                self.errors[endpoint] += 1
+
+    def sample(self, rss):
+        # a sample counts towards every endpoint with a request in flight; exact per endpoint at --concurrency 1
+        with self.lock:
+            self.overall_peak_rss = max(self.overall_peak_rss, rss)
+            for endpoint, count in self.in_flight.items():
+                if count:
+                    self.peak_rss[endpoint] = max(self.peak_rss[endpoint], rss)
+
+def _worker(make_client, corpus, weights, stats, headers, deadline, remaining, seed):
+    rng = random.Random(seed)
+    client = make_client()
+    endpoints, cumulative = list(weights), np.cumsum(list(weights.values()))
+    while time.perf_counter() < deadline:
+        if remaining is not None:
+            with stats.lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+        endpoint = endpoints[int(np.searchsorted(cumulative, rng.random() * cumulative[-1], side='right'))]
+        entry = rng.choice(corpus[endpoint])
+        url = entry['path'] + (f"?{urlencode(entry['args'])}" if entry.get('args') else '')
+        stats.begin(endpoint)
+        start = time.perf_counter()
+        try:
+            status, size, peak = client.post(url, entry['body'], headers)
+        except (OSError, http.client.HTTPException):
+            status, size, peak = 599, 0, 0
+        stats.end(endpoint, time.perf_counter() - start, status, size, peak)
+
+def _sampler(client, in_process, stats, interval, stop):
+    while not stop.wait(interval):
+        try:
+            stats.sample(server_rss(client, in_process))
+        except (OSError, http.client.HTTPException, ValueError):
+            continue
+
+def run(corpus, weights, url=None, concurrency=4, duration=30.0, requests=None, cache=False, sample_interval=None,
+        seed=0):
+    in_process = url is None
+    if in_process:
+        from app import create_app
+        app = create_app()
+        # the per-request memory log lines would drown the report; over-budget warnings still show
+        app.logger.setLevel(logging.WARNING)
+        make_client = lambda: InProcessClient(app)
+    else:
+        make_client = lambda: HTTPClient(url)
+    # replaying a small corpus would otherwise mostly measure cache hits
+    headers = {} if cache else {'Cache-Control': 'no-cache'}
+
+    stats = Stats(weights)
+    stop = threading.Event()
+    sampler = threading.Thread(target=_sampler, daemon=True,
+                               args=(make_client(), in_process, stats, sample_interval or (0.05 if in_process else 0.5),
+                                     stop))
+    deadline = time.perf_counter() + (duration if requests is None else float('inf'))
+    remaining = None if requests is None else [requests]
+    workers = [threading.Thread(target=_worker, daemon=True,
+                                args=(make_client, corpus, weights, stats, headers, deadline, remaining, seed + i))
+               for i in range(concurrency)]
+
+    started = time.perf_counter()
+    sampler.start()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    sampler.join()
+    return report(stats, elapsed, concurrency)
+
+def report(stats, elapsed, concurrency):
+    endpoints = {}
+    for endpoint, latencies in stats.latencies.items():
+        if not latencies:
+            continue
+        p50, p99 = np.percentile(latencies, [50, 99])
+        endpoints[endpoint] = {
+            'requests': len(latencies),
+            'errors': stats.errors[endpoint],
+            'throughput': len(latencies) / elapsed,
+            'mean': float(np.mean(latencies)),
+            'p50': float(p50),
+            'p99': float(p99),
+            'bytes': stats.bytes[endpoint],
+            'peak_request_bytes': stats.peak_request[endpoint],
+            'peak_rss_bytes': stats.peak_rss[endpoint]
+        }
+    all_latencies = [latency for latencies in stats.latencies.values() for latency in latencies]
+    total = {
+        'requests': len(all_latencies),
+        'errors': sum(stats.errors.values()),
+        'throughput': len(all_latencies) / elapsed,
+        'p50': float(np.percentile(all_latencies, 50)) if all_latencies else None,
+        'p99': float(np.percentile(all_latencies, 99)) if all_latencies else None,
+        'peak_request_bytes': max(stats.peak_request.values(), default=0),
+        'peak_rss_bytes': stats.overall_peak_rss
+    }
+    return {'seconds': elapsed, 'concurrency': concurrency, 'endpoints': endpoints, 'total': total}
+
+def print_report(result, out=sys.stdout):
+    print(f"{'endpoint':<50} {'reqs':>6} {'err':>4} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'req MiB':>8} {'rss MiB':>8}", file=out)
+    rows = list(result['endpoints'].items()) + [('total', result['total'])]
+    for endpoint, r in rows:
+        p50 = f"{r['p50'] * 1000:9.1f}" if r['p50'] is not None else f"{'-':>9}"
+        p99 = f"{r['p99'] * 1000:9.1f}" if r['p99'] is not None else f"{'-':>9}"
+        print(f"{endpoint:<50} {r['requests']:>6} {r['errors']:>4} {r['throughput']:8.2f} {p50} {p99} "
+              f"{r['peak_request_bytes'] / 2**20:8.1f} {r['peak_rss_bytes'] / 2**20:8.1f}", file=out)
+    print(f"\n{result['seconds']:.1f}s at concurrency {result['concurrency']}", file=out)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m loadtest')
+    parser.add_argument('--corpus', default=CORPUS_PATH)
+    parser.add_argument('--url', help='base URL of a running server; without it the app runs in-process')
+    parser.add_argument('--mix', help='endpoint=weight,... (default: weighted by corpus frequency)')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds to run')
+    parser.add_argument('--requests', type=int, help='stop after this many requests instead of --duration')
+    parser.add_argument('--cache', action='store_true', help='let the result cache answer repeated bodies')
+    parser.add_argument('--sample-interval', type=float, help='seconds between RSS samples')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    weights = parse_mix(args.mix, corpus)
+    result = run(corpus, weights, args.url, args.concurrency, args.duration, args.requests, args.cache,
+                 args.sample_interval, args.seed)
+    result['mix'] = weights
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 1 if result['total']['errors'] else 0
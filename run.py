@@ -1,6 +1,8 @@
 from app import create_app
+from app.metrics import clear
 
 app = create_app()
 
 if __name__ == '__main__':
+    clear(app.config['METRICS_DIR'])
     app.run()
\ No newline at end of file
@@ -0,0 +1,33 @@
+# tests/conftest.py
+
+import pytest
+from config import Config
+from app import create_app
+from app.simulations import path_bank, shocks
+
+@pytest.fixture
+def app(tmp_path):
+    # every on-disk store in a fresh directory, so tests never see each other's results
+    class TestConfig(Config):
+        DEBUG = False
+        JOB_DIR = str(tmp_path / 'jobs')
+        RESULT_STORE_DIR = str(tmp_path / 'store')
+        METRICS_DIR = str(tmp_path / 'metrics')
+        PROFILE_DIR = str(tmp_path / 'profiles')
+        SHARED_PATHS_DIR = str(tmp_path / 'paths')
+        SHARED_PATHS_PRELOAD = ''
+        SHOCK_BANK_PATH = ''
+        REQUEST_RECORD_PATH = ''
+
+    yield create_app(TestConfig)
+    path_bank.load('', 0)
+    shocks.load('')
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture(autouse=True)
+def fresh_streams():
+    yield
+    shocks.release()
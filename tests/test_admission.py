@@ -0,0 +1,95 @@
+# tests/test_admission.py
+
+import pytest
+from app import memory
+from app.admission import AdmissionRejected, estimate, fit_headroom
+from app.constants import MIN_BATCH_PATHS
+from app.streaming import batch_sizes
+
+MiB = 2**20
+GBM = dict(initial_price=1, mu=0.1, sigma=0.5)
+
+class Meter:
+    def __init__(self, available):
+        self.available = available
+
+    def headroom(self):
+        return self.available
+
+@pytest.fixture
+def meter():
+    # stands in for the request's memory meter
+    yield lambda available: setattr(memory._local, 'meter', Meter(available))
+    memory._local.meter = None
+
+def test_small_run_is_full():
+    plan = estimate('non_stable_pool', dict(GBM, paths=1000), 1024 * MiB, 60)
+    assert plan['mode'] == 'full' and plan['batch_paths'] is None and plan['reason'] is None
+
+def test_over_budget_run_is_batched_within_the_budget():
+    plan = estimate('non_stable_pool', dict(GBM, paths=10000), 64 * MiB, 60)
+    assert plan['mode'] == 'batched' and plan['batch_paths'] == 5000
+    assert plan['memory_bytes'] <= 64 * MiB
+
+def test_unbatchable_or_slow_runs_are_rejected():
+    plan = estimate('lending', {}, 16 * MiB, 60)
+    assert plan['mode'] == 'rejected' and 'memory' in plan['reason']
+    plan = estimate('non_stable_pool', dict(GBM, paths=1000), 1024 * MiB, 1e-3)
+    assert plan['mode'] == 'rejected' and 'CPU time' in plan['reason']
+
+def test_batches_never_go_under_min_batch_paths():
+    # 1500 paths would fit as two halves of 750, but bands averaged over so few paths are not trusted, and a
+    # 1000 + 500 split would leave a small remainder, so the smallest batching is the whole 1500
+    plan = estimate('non_stable_pool', dict(GBM, paths=1500), 20 * MiB, 60)
+    assert plan['mode'] == 'rejected' and 'even in batches of 1500 paths' in plan['reason']
+    plan = estimate('non_stable_pool', dict(GBM, paths=800), 20 * MiB, 60)
+    assert plan['mode'] == 'rejected' and 'batches' not in plan['reason']
+    for total in (1000, 1500, 2999, 10001):
+        assert min(batch_sizes(total, 400)) >= MIN_BATCH_PATHS and sum(batch_sizes(total, 400)) == total
+
+def test_invalid_parameters_are_a_bad_request(client):
+    response = client.post('/run_non_stable_pool_simulation', json=dict(GBM, paths=0))
+    assert response.status_code == 400 and "'paths' must be at least 1" in response.get_json()['reason']
+
+def test_oversized_request_is_rejected_with_413(client):
+    response = client.post('/run_non_stable_pool_simulation', json=dict(GBM, paths=10**9))
+    assert response.status_code == 413 and response.get_json()['mode'] == 'rejected'
+
+def test_headroom_drops_to_smaller_batches(app, meter):
+    plan = estimate('non_stable_pool', dict(GBM, paths=10000), 1024 * MiB, 60)
+    with app.test_request_context():
+        meter(None)
+        assert fit_headroom(plan, dict(GBM, paths=10000)) is plan
+        meter(64 * MiB)
+        fitted = fit_headroom(plan, dict(GBM, paths=10000))
+    assert fitted['mode'] == 'batched' and fitted['batch_paths'] == 5000
+    assert (fitted['max_bytes'], fitted['max_seconds']) == (1024 * MiB, 60)
+
+def test_headroom_too_low_is_503(app, meter):
+    plan = estimate('non_stable_pool', dict(GBM, paths=10000), 1024 * MiB, 60)
+    with app.test_request_context():
+        meter(8 * MiB)
+        with pytest.raises(AdmissionRejected) as rejected:
+            fit_headroom(plan, dict(GBM, paths=10000))
+    assert rejected.value.status == 503 and 'headroom' in rejected.value.estimate['reason']
+
+def test_unbatchable_plan_ignores_headroom(app, meter):
+    plan = estimate('lending', {}, 1024 * MiB, 60)
+    with app.test_request_context():
+        meter(1)
+        assert fit_headroom(plan, {}) is plan
+
+def test_chunk_elements_shrink_with_headroom(meter):
+    assert memory.chunk_elements(2**20, 32) == 2**20
+    meter(32 * 1000)
+    assert memory.chunk_elements(2**20, 32) == 1000
+    meter(0)
+    assert memory.chunk_elements(2**20, 32) == 1
+
+def test_meter_headroom_is_budget_capped_by_the_worker_limit(monkeypatch):
+    rss = iter([100, 130, 130, 130])
+    monkeypatch.setattr(memory, 'rss', lambda: next(rss))
+    meter = memory.MemoryMeter('rss', budget=50, worker_limit=1000)
+    assert meter.headroom() == 20
+    meter.worker_limit = 140
+    assert meter.headroom() == 10
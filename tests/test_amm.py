@@ -0,0 +1,19 @@
+# tests/test_amm.py
+
+import numpy as np
+from app.models.amm import ConstantProductPool
+from app.models.lp_sim import calculate_il
+from app.simulations import shocks
+from app.simulations.gbm import geometric_brownian_motion
+
+def test_fee_less_pool_loss_matches_calculate_il():
+    shocks.seed(0)
+    prices = geometric_brownian_motion(1.0, 0.1, 0.5, 1, 365, 256)
+    pool = ConstantProductPool(1000.0, 1000.0, 256, fee=0.0)
+    tvl, il = pool.run(prices)
+    np.testing.assert_allclose(il, calculate_il(prices), atol=1e-12)
+
+def test_calculate_il_in_place_matches_allocating():
+    ratio = np.linspace(0.1, 10, 101)
+    out = ratio.copy()
+    np.testing.assert_array_equal(calculate_il(out, out=out), calculate_il(ratio))
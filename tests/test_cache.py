@@ -0,0 +1,51 @@
+# tests/test_cache.py
+
+import time
+from app.cache import ResultCache
+
+LENDING = dict(collateral_amount=10000, max_ltv=0.7, liquidation_threshold=0.8, total_deposits=1e6,
+               interest_rate=0.05, liquidation_penalty=0.1)
+
+def test_key_ignores_number_types_and_bypass_fields():
+    assert ResultCache.key('e', {'a': 1, 'b': [2]}) == ResultCache.key('e', {'b': [2.0], 'a': 1.0, 'noCache': True})
+    assert ResultCache.key('e', {'a': 1}) != ResultCache.key('e', {'a': 1, 'seed': 1})
+    assert ResultCache.key('e', {'a': 1}, 'application/json') != ResultCache.key('e', {'a': 1}, 'application/x-npz')
+
+def test_lru_evicts_by_count_and_bytes():
+    cache = ResultCache(max_entries=2, max_bytes=10)
+    cache.put('a', b'1234', 'x')
+    cache.put('b', b'1234', 'x')
+    cache.get('a')
+    cache.put('c', b'1234', 'x')
+    assert cache.get('b') is None and cache.get('a') is not None
+    cache.put('d', b'123456789', 'x')
+    assert cache.get('a') is None and cache.get('c') is None
+    assert cache.get('d') == (b'123456789', 'x')
+
+def test_entries_expire():
+    cache = ResultCache(ttl=0.01)
+    cache.put('a', b'1', 'x')
+    time.sleep(0.02)
+    assert cache.get('a') is None
+
+def test_repeated_request_is_a_hit(client):
+    first = client.post('/run_lending_simulation', json=LENDING)
+    second = client.post('/run_lending_simulation', json=LENDING)
+    assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('MISS', 'HIT')
+    assert first.data == second.data
+
+def test_no_cache_bypasses(client):
+    client.post('/run_lending_simulation', json=LENDING)
+    response = client.post('/run_lending_simulation', json=dict(LENDING, noCache=True))
+    assert response.headers['X-Cache'] == 'BYPASS'
+
+def test_clearing_needs_the_cache_token(app):
+    client = app.test_client()
+    client.post('/run_lending_simulation', json=LENDING)
+    assert client.delete('/cache').status_code == 403
+    app.config['CACHE_TOKEN'] = 'secret'
+    assert client.delete('/cache', headers={'X-Cache-Token': 'wrong'}).status_code == 403
+    assert client.post('/run_lending_simulation', json=LENDING).headers['X-Cache'] == 'HIT'
+
+    assert client.delete('/cache', headers={'X-Cache-Token': 'secret'}).status_code == 200
+    assert client.post('/run_lending_simulation', json=LENDING).headers['X-Cache'] == 'MISS'
@@ -0,0 +1,49 @@
+# tests/test_cli.py
+
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+from app.routes.batch import BATCH_RUNNERS
+from app.serialization import flatten
+from app.simulations import shocks
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = [
+    {'id': 'lending', 'model': 'lending',
+     'params': dict(collateral_amount=10000, max_ltv=0.7, liquidation_threshold=0.8, total_deposits=1e6,
+                    interest_rate=0.05, liquidation_penalty=0.1)},
+    {'id': 'gbm/seeded', 'model': 'non_stable_pool', 'params': dict(initial_price=1, mu=0.1, sigma=0.5, paths=300, seed=3)},
+    {'id': 'broken', 'model': 'nope', 'params': {}},
+]
+
+def cli(*args):
+    env = dict(os.environ, SHOCK_BANK_PATH='')
+    return subprocess.run([sys.executable, '-m', 'app.cli', *args], cwd=REPO, env=env, capture_output=True, text=True,
+                          timeout=300)
+
+def test_run_writes_results_and_resumes(tmp_path):
+    scenarios = tmp_path / 'scenarios.jsonl'
+    scenarios.write_text(''.join(json.dumps(scenario) + '\n' for scenario in SCENARIOS))
+    output = tmp_path / 'out'
+
+    first = cli('run', str(scenarios), str(output), '--workers', '1')
+    assert first.returncode == 1, first.stderr
+    manifest = {entry['id']: entry for entry in map(json.loads, (output / 'manifest.jsonl').read_text().splitlines())}
+    assert manifest['broken']['status'] == 'error' and "unknown model 'nope'" in manifest['broken']['error']
+
+    for scenario in SCENARIOS[:2]:
+        entry = manifest[scenario['id']]
+        assert entry['status'] == 'ok'
+        shocks.seed(scenario['params'].get('seed'))
+        expected = flatten(BATCH_RUNNERS[scenario['model']](scenario['params']))
+        with np.load(output / entry['file']) as written:
+            assert sorted(written.files) == sorted(expected)
+            for name, array in expected.items():
+                np.testing.assert_array_equal(written[name], array)
+
+    # a rerun only retries the failure
+    second = cli('run', str(scenarios), str(output), '--workers', '1')
+    assert '3 scenarios, 2 already done, 1 to run' in second.stderr
+    assert len((output / 'manifest.jsonl').read_text().splitlines()) == 4
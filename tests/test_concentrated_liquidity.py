@@ -0,0 +1,41 @@
+# tests/test_concentrated_liquidity.py
+
+import numpy as np
+import pytest
+from app.models.concentrated_liquidity import ConcentratedLiquidityPositions, TickIndex, tick_to_sqrt_price
+from app.models.lp_sim import calculate_il
+
+LP = dict(tokenLaunchPrice=0.1, lpPoolAllocation=1e6, initialTotalSupply=1e9, simulationDays=30, mu=0.1, sigma=0.5,
+          tokenAdoptionVelocity=0.1, avgTokenUtilityAllocation=10, avgTokenHolding=10, avgTokenSell=10, paths=100)
+
+def prices(paths=20, days=30, seed=0):
+    return np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.05, (paths, days)), axis=1))
+
+def test_range_includes_its_lower_tick_and_excludes_its_upper():
+    index = TickIndex(np.array([-60, 0]), np.array([60, 120]))
+    lower, middle, upper = tick_to_sqrt_price([-60, 0, 60])
+    below = np.nextafter(lower, 0)
+    in_range = index.in_range(np.array([below, lower, middle, np.nextafter(upper, 0), upper]))
+    np.testing.assert_array_equal(in_range, [[False, False], [True, False], [True, True], [True, True], [False, True]])
+
+def test_wide_range_loss_matches_calculate_il():
+    # a range this wide holds almost exactly the full-range position
+    p = prices()
+    positions = ConcentratedLiquidityPositions(1e-8, 1e8, 1000.0, 1.0, tick_spacing=1)
+    np.testing.assert_allclose(positions.impermanent_loss(p)[..., 0], calculate_il(p), atol=1e-4)
+
+@pytest.mark.parametrize('split', [1, 11, 29])
+def test_fees_carry_across_day_blocks(split):
+    p = prices()
+    whole = ConcentratedLiquidityPositions([0.8, 0.5], [1.25, 2.0], 1000.0, 1.0).run(p, 0.1)
+    blocks = ConcentratedLiquidityPositions([0.8, 0.5], [1.25, 2.0], 1000.0, 1.0)
+    first, second = blocks.run(p[:, :split], 0.1), blocks.run(p[:, split:], 0.1)
+    np.testing.assert_allclose(np.concatenate([first['fees'], second['fees']], axis=1), whole['fees'], rtol=1e-12)
+    assert np.all(np.diff(whole['fees'], axis=1) >= 0)
+
+def test_unknown_pool_model_is_a_bad_request(client):
+    single = client.post('/run_lp_simulation', json=dict(LP, poolModel='foo'))
+    portfolio = client.post('/run_lp_portfolio_simulation', json=dict(LP, pools=[{'poolModel': 'foo'}]))
+    for response in (single, portfolio):
+        assert response.status_code == 400
+        assert "unknown pool model 'foo'" in response.get_json()['reason']
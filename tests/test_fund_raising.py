@@ -0,0 +1,50 @@
+# tests/test_fund_raising.py
+
+import numpy as np
+
+ALLOCATIONS = [('Seed', 10), ('Public Sale', 5), ('Airdrop #2', 5), ('Treasury', 80)]
+BODY = {
+    'allocationData': [{'allocation': name, 'percentage': pct} for name, pct in ALLOCATIONS],
+    'vestingData': [
+        {'allocation': 'Seed', 'cliff': 4, 'tgeUnlock': 0, 'tokens': 1e8, 'vestingPeriod': 9, 'vestingStart': '2026-10'},
+        {'allocation': 'Public Sale', 'cliff': 0.5, 'tgeUnlock': 20, 'tokens': 5e7, 'vestingPeriod': 3,
+         'vestingStart': '2026-10'},
+        {'allocation': 'Airdrop #2', 'cliff': 1, 'tgeUnlock': 10, 'tokens': 5e7, 'vestingPeriod': 12,
+         'vestingStart': '2026-10'},
+        {'allocation': 'Treasury', 'cliff': 0, 'tgeUnlock': 5, 'tokens': 8e8, 'vestingPeriod': 36,
+         'vestingStart': '2026-11'},
+    ],
+    'airdropModule': {'amount1': 30, 'amount2': 30, 'amount3': 40, 'date1': '2026-12-01', 'date2': '2027-03-01',
+                      'date3': '2027-06-01', 'percentage': 5, 'tokens': 5e7},
+    'initialTotalSupply': 1e9,
+    'publicSaleValuation': 1e7,
+    'noCache': True
+}
+VALUATIONS = [5e6, 1e7, 4e7]
+SUPPLIES = [5e8, 1e9]
+PERCENTAGES = [[10, 5, 5, 80], [20, 2, 8, 70]]
+
+def test_grid_cells_equal_single_scenarios(client):
+    grid = client.post('/run_fund_raising_scenarios', json=dict(
+        BODY, publicSaleValuations=VALUATIONS, initialTotalSupplies=SUPPLIES, allocationPercentages=PERCENTAGES
+    )).get_json()
+    assert np.shape(grid['circulating_market_cap'])[:3] == (3, 2, 2)
+    for v, valuation in enumerate(VALUATIONS):
+        for s, supply in enumerate(SUPPLIES):
+            for a, percentages in enumerate(PERCENTAGES):
+                single = client.post('/run_fund_raising_scenarios', json=dict(
+                    BODY, publicSaleValuation=valuation, initialTotalSupply=supply, allocationPercentages=[percentages]
+                )).get_json()
+                assert single['dates'] == grid['dates']
+                assert grid['token_price'][v][s][a] == single['token_price'][0][0][0]
+                assert grid['token_price'][v][s][a] == valuation / (supply * percentages[1] / 100)
+                assert grid['implied_market_cap'][v][s][a] == single['implied_market_cap'][0][0][0]
+                assert grid['circulating_supply'][s][a] == single['circulating_supply'][0][0]
+                assert grid['circulating_market_cap'][v][s][a] == single['circulating_market_cap'][0][0][0]
+
+def test_oversized_grid_is_rejected(client):
+    response = client.post('/run_fund_raising_scenarios', json=dict(
+        BODY, publicSaleValuations=list(np.linspace(1e6, 1e8, 500)), initialTotalSupplies=list(np.linspace(1e8, 1e10, 500))
+    ))
+    assert response.status_code == 413
+    assert 'memory' in response.get_json()['reason']
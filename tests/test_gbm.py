@@ -0,0 +1,47 @@
+# tests/test_gbm.py
+
+import numpy as np
+import pytest
+from app.simulations import shocks
+from app.simulations.gbm import correlated_geometric_brownian_motion_chunks, correlation_factor
+
+LP = dict(tokenLaunchPrice=0.1, lpPoolAllocation=1e6, initialTotalSupply=1e9, simulationDays=30, mu=0.1, sigma=0.5,
+          tokenAdoptionVelocity=0.1, avgTokenUtilityAllocation=10, avgTokenHolding=10, avgTokenSell=10, paths=100,
+          pairSigma=0.4)
+
+def joint(sigma, correlation, seed=3):
+    shocks.seed(seed)
+    blocks = correlated_geometric_brownian_motion_chunks([1, 2], [0.1, 0.2], sigma, [[1, correlation], [correlation, 1]],
+                                                        1, 40, 80, 16)
+    return np.concatenate([S.copy() for _, _, S in blocks], axis=2)
+
+@pytest.mark.parametrize('correlation', [1.0, -1.0])
+def test_perfect_correlation_shares_the_shocks(correlation):
+    token, pair = joint([0.5, 0.5], correlation)
+    t = np.linspace(0, 1, 40)
+    # log returns net of drift are the same shocks, sign flipped when anti-correlated
+    z_token = np.log(token) - (0.1 - 0.125) * t
+    z_pair = np.log(pair / 2) - (0.2 - 0.125) * t
+    np.testing.assert_allclose(z_pair, correlation * z_token, atol=1e-12)
+
+def test_correlation_factor_reproduces_singular_matrices():
+    corr = np.array([[1, 1, 0.5], [1, 1, 0.5], [0.5, 0.5, 1]])
+    L = correlation_factor(corr)
+    assert np.allclose(L, np.tril(L)) and np.allclose(L @ L.T, corr)
+    with pytest.raises(ValueError):
+        correlation_factor([[1, 1.5], [1.5, 1]])
+
+def test_flat_pair_leaves_the_token_draws_alone():
+    token, pair = joint([0.5, 0.0], 0.6)
+    np.testing.assert_array_equal(token, joint([0.5, 0.3], 0.6)[0])
+    np.testing.assert_allclose(pair, np.broadcast_to(2 * np.exp(0.2 * np.linspace(0, 1, 40)), pair.shape))
+
+@pytest.mark.parametrize('correlation', [1.5, -1.01, float('nan')])
+def test_out_of_range_correlation_is_a_bad_request(client, correlation):
+    for path, body in (('/run_lp_simulation', LP), ('/run_lp_portfolio_simulation', dict(LP, pools=[{}]))):
+        response = client.post(path, json=dict(body, correlation=correlation))
+        assert response.status_code == 400
+        assert 'correlation' in response.get_json()['reason']
+
+def test_perfectly_correlated_request_runs(client):
+    assert client.post('/run_lp_simulation', json=dict(LP, correlation=1.0)).status_code == 200
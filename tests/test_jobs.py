@@ -0,0 +1,45 @@
+# tests/test_jobs.py
+
+import time
+import pytest
+from app.routes.lending import lending_simulation
+from app.routes.non_stable_pool import non_stable_pool_simulation
+from app.routes.stable_pool import stable_pool_simulation
+from app.serialization import dumps
+from app.simulations import shocks
+
+LENDING = dict(collateral_amount=10000, max_ltv=0.7, liquidation_threshold=0.8, total_deposits=1e6,
+               interest_rate=0.05, liquidation_penalty=0.1)
+
+def wait(client, job_id, until, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f'/jobs/{job_id}').get_json()
+        if until(status):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f'job never got there: {status}')
+
+@pytest.mark.parametrize('runner, params', [
+    (non_stable_pool_simulation, dict(initial_price=1, mu=0.1, sigma=0.5, paths=2500, seed=4)),
+    (stable_pool_simulation, dict(initial_price=1, alpha=0.1, gamma=1, beta=0.01, days=20000, seed=4)),
+    (lending_simulation, LENDING),
+])
+def test_runners_report_progress_and_keep_their_result(runner, params):
+    reported = []
+    shocks.seed(params.get('seed'))
+    result = runner(params, progress=reported.append)
+    assert len(reported) > 1 and reported == sorted(reported) and reported[-1] == 1
+    shocks.seed(params.get('seed'))
+    assert dumps(result) == dumps(runner(params))
+
+def test_running_job_reports_progress_and_cancels(client):
+    params = dict(initial_price=1, alpha=0.1, gamma=1, beta=0.01, days=5_000_000)
+    job = client.post('/jobs/stable_pool', json=params).get_json()
+    running = wait(client, job['job_id'], lambda status: status['status'] == 'running' and status['progress'] > 0)
+    assert 0 < running['progress'] < 1
+
+    assert client.delete(f"/jobs/{job['job_id']}").status_code == 200
+    status = wait(client, job['job_id'], lambda status: status['status'] in ('done', 'failed', 'cancelled'))
+    assert status['status'] == 'cancelled'
+    assert client.get(f"/jobs/{job['job_id']}/result").status_code == 409
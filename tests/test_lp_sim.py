@@ -0,0 +1,47 @@
+# tests/test_lp_sim.py
+
+import numpy as np
+from app.models.lp_sim import PERCENTILES, LPSimulation, calculate_il
+from app.simulations import shocks
+from app.simulations.gbm import correlated_geometric_brownian_motion_chunks
+
+def simulation(days=90, paths=400):
+    return LPSimulation(0.1, 1e6, 1e9, days, 0.1, 0.6, paths, 0.1, 10, 10, 20, pair_price=3000, pair_mu=0.05,
+                        pair_sigma=0.4, correlation=0.3)
+
+def unfused(sim, allocations):
+    # the whole (paths, days) matrices at once, as simulate computed them before the single chunked pass
+    days = sim.simulation_days
+    token, pair = next(correlated_geometric_brownian_motion_chunks(
+        [sim.token_launch_price, sim.lp_pairing_token2_price], [sim.mu, sim.pair_mu], [sim.sigma, sim.pair_sigma],
+        [[1.0, sim.correlation], [sim.correlation, 1.0]], days/365, days, sim.paths, chunk_size=days))[2]
+    prices = np.percentile(token * sim.price_factor(), PERCENTILES, axis=0)
+    il = calculate_il((token / sim.token_launch_price) / (pair / sim.lp_pairing_token2_price))
+    tvl = [token * (allocation / sim.token_launch_price) + pair * allocation for allocation in allocations]
+    return prices, [np.percentile(t, PERCENTILES, axis=0) for t in tvl], np.percentile(il, PERCENTILES, axis=0), \
+        np.percentile(sum(tvl), PERCENTILES, axis=0)
+
+def test_fused_static_portfolio_equals_unfused_formula(monkeypatch):
+    allocations = [1e6, 2.5e5]
+    sim = simulation()
+    # small day blocks, so the fused pass really runs block by block
+    monkeypatch.setattr('app.simulations.gbm.CHUNK_ELEMENTS', 400 * 2 * 7)
+    shocks.seed(21)
+    fused = sim.simulate_portfolio([{'lp_pool_allocation': a} for a in allocations])
+    shocks.seed(21)
+    prices, tvl, il, total = unfused(sim, allocations)
+
+    np.testing.assert_allclose(fused['price_percentiles'], prices, rtol=1e-12)
+    np.testing.assert_allclose(fused['portfolio_tvl_percentiles'], total, rtol=1e-12)
+    for pool, expected in zip(fused['pools'], tvl):
+        np.testing.assert_allclose(pool['tvl_percentiles'], expected, rtol=1e-12)
+        np.testing.assert_allclose(pool['il_percentiles'], il, rtol=1e-12, atol=1e-15)
+
+def test_single_pool_simulate_is_the_one_pool_portfolio():
+    sim = simulation()
+    shocks.seed(4)
+    single = sim.simulate()
+    shocks.seed(4)
+    portfolio = sim.simulate_portfolio([{}])
+    np.testing.assert_array_equal(single['tvl_percentiles'], portfolio['pools'][0]['tvl_percentiles'])
+    np.testing.assert_array_equal(single['median_prices'], portfolio['price_percentiles'][2])
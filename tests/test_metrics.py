@@ -0,0 +1,47 @@
+# tests/test_metrics.py
+
+import json
+import os
+from app.metrics import LATENCY_BUCKETS, Metrics, clear
+
+def other_worker(directory, pid, requests, duration):
+    # the snapshot a worker with this pid would have flushed
+    worker = Metrics()
+    worker.inc('uzl_requests_total', {'endpoint': 'lp', 'method': 'POST', 'status': '200'}, requests)
+    worker.observe('uzl_request_duration_seconds', {'endpoint': 'lp'}, duration)
+    snapshot = dict(worker.snapshot(), pid=pid, rss=123)
+    with open(os.path.join(directory, f'{pid}.json'), 'w') as f:
+        json.dump(snapshot, f)
+
+def test_collect_sums_the_snapshots_of_every_worker(tmp_path):
+    metrics = Metrics(str(tmp_path))
+    metrics.inc('uzl_requests_total', {'endpoint': 'lp', 'method': 'POST', 'status': '200'}, 2)
+    metrics.observe('uzl_request_duration_seconds', {'endpoint': 'lp'}, 0.003)
+    # a pid that cannot be running: its counts stay in the totals, its RSS does not
+    other_worker(str(tmp_path), 2**22 + 1, 3, 0.2)
+    (tmp_path / 'stray.tmp').write_text('{')
+
+    counters, histograms, rss = metrics.collect()
+    assert counters[('uzl_requests_total', (('endpoint', 'lp'), ('method', 'POST'), ('status', '200')))] == 5
+    merged = histograms[('uzl_request_duration_seconds', (('endpoint', 'lp'),))]
+    assert merged[LATENCY_BUCKETS.index(0.005)] == 1 and merged[LATENCY_BUCKETS.index(0.25)] == 1
+    assert merged[-2] == 0.203 and merged[-1] == 2
+    assert list(rss) == [os.getpid()]
+
+    text = metrics.render()
+    assert 'uzl_requests_total{endpoint="lp",method="POST",status="200"} 5' in text
+    assert 'uzl_request_duration_seconds_bucket{endpoint="lp",le="+Inf"} 2' in text
+    assert 'uzl_request_duration_seconds_count{endpoint="lp"} 2' in text
+
+def test_label_values_are_escaped():
+    metrics = Metrics()
+    metrics.inc('uzl_cache_requests_total', {'endpoint': 'a"b\\c\nd', 'status': 'HIT'})
+    assert 'uzl_cache_requests_total{endpoint="a\\"b\\\\c\\nd",status="HIT"} 1' in metrics.render()
+
+def test_clear_drops_every_snapshot(tmp_path):
+    other_worker(str(tmp_path), 2**22 + 1, 1, 0.1)
+    (tmp_path / '1.json.5.tmp').write_text('{')
+    (tmp_path / 'keep.txt').write_text('')
+    clear(str(tmp_path))
+    assert os.listdir(tmp_path) == ['keep.txt']
+    clear(str(tmp_path / 'missing'))
@@ -0,0 +1,69 @@
+# tests/test_path_bank.py
+
+import os
+import subprocess
+import sys
+import numpy as np
+from app.simulations import path_bank
+from app.simulations.path_bank import PathBank
+
+EVICT = """
+import sys
+import numpy as np
+from app.simulations.path_bank import PathBank
+bank = PathBank(sys.argv[1], int(sys.argv[2]))
+bank.put('other', np.ones((64, 64)))
+"""
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _evict_from_another_process(directory, max_bytes):
+    # a second worker filling the bank past its budget
+    subprocess.run([sys.executable, '-c', EVICT, directory, str(max_bytes)], cwd=REPO, check=True)
+
+def test_round_trip_and_counts(tmp_path):
+    bank = PathBank(str(tmp_path), 2**20)
+    W = np.arange(12.0).reshape(3, 4)
+    assert bank.get('k') is None
+    bank.put('k', W)
+    np.testing.assert_array_equal(bank.get('k'), W)
+    bank.count(True)
+    bank.count(False)
+    stats = bank.stats()
+    assert (stats['entries'], stats['hits'], stats['misses']) == (1, 1, 1)
+
+def test_entry_evicted_by_another_process_is_unmapped(tmp_path):
+    entry = np.zeros((64, 64))
+    budget = entry.nbytes + 1024  # room for one entry
+    bank = PathBank(str(tmp_path), budget)
+    bank.put('mine', entry)
+    assert bank.get('mine') is not None and 'mine' in bank._mapped
+
+    _evict_from_another_process(str(tmp_path), budget)
+    assert not os.path.exists(bank._path('mine'))
+    assert bank.get('mine') is None
+    assert 'mine' not in bank._mapped
+
+def test_put_drops_mappings_of_entries_gone_elsewhere(tmp_path):
+    bank = PathBank(str(tmp_path), 2**20)
+    for key in ('a', 'b'):
+        bank.put(key, np.zeros(8))
+        bank.get(key)
+    os.remove(bank._path('a'))
+    bank.put('c', np.zeros(8))
+    assert 'a' not in bank._mapped and 'b' in bank._mapped
+
+def test_replaced_entry_is_remapped(tmp_path):
+    bank = PathBank(str(tmp_path), 2**20)
+    bank.put('k', np.zeros(4))
+    bank.get('k')
+    PathBank(str(tmp_path), 2**20).put('k', np.ones(4))
+    np.testing.assert_array_equal(bank.get('k'), np.ones(4))
+
+def test_local_mappings_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(path_bank, 'MAX_MAPPED', 3)
+    bank = PathBank(str(tmp_path), 2**20)
+    for i in range(5):
+        bank.put(str(i), np.zeros(4))
+        bank.get(str(i))
+    assert list(bank._mapped) == ['2', '3', '4']
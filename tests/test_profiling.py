@@ -0,0 +1,35 @@
+# tests/test_profiling.py
+
+import pytest
+from app import profiling
+
+LENDING = dict(collateral_amount=10000, max_ltv=0.7, liquidation_threshold=0.8, total_deposits=1e6,
+               interest_rate=0.05, liquidation_penalty=0.1)
+URL = '/run_lending_simulation?profile=top'
+
+@pytest.fixture
+def profiled(app):
+    app.config['PROFILE_TOKEN'] = 'secret'
+    return app.test_client()
+
+def test_profiling_is_off_without_a_configured_token(client):
+    assert client.post(URL, headers={'X-Profile-Token': ''}, json=LENDING).status_code == 403
+
+@pytest.mark.parametrize('headers', [{}, {'X-Profile-Token': 'secreT'}, {'X-Profile-Token': 'secret-'}])
+def test_wrong_token_is_forbidden(profiled, headers):
+    assert profiled.post(URL, headers=headers, json=LENDING).status_code == 403
+
+def test_valid_token_profiles_and_frees_the_profiler(profiled):
+    for _ in range(2):
+        response = profiled.post(URL, headers={'X-Profile-Token': 'secret'}, json=LENDING)
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['endpoint'] == 'lending.run_lending_simulation' and body['functions']
+    assert not profiling._lock.locked()
+
+def test_concurrent_profile_is_a_conflict(profiled):
+    with profiling._lock:
+        response = profiled.post(URL, headers={'X-Profile-Token': 'secret'}, json=LENDING)
+    assert response.status_code == 409
+    # unprofiled requests are not held up
+    assert profiled.post('/run_lending_simulation', json=LENDING).status_code == 200
@@ -0,0 +1,66 @@
+# tests/test_serialization.py
+
+import io
+import json
+import numpy as np
+import pytest
+from app import serialization
+from app.serialization import ARROW_MIMETYPE, MSGPACK_MIMETYPE, NPZ_MIMETYPE, flatten
+
+LENDING = dict(collateral_amount=10000, max_ltv=0.7, liquidation_threshold=0.8, total_deposits=1e6,
+               interest_rate=0.05, liquidation_penalty=0.1)
+RESULT = {
+    'bands': np.arange(12.0).reshape(3, 4),
+    'counts': np.arange(5),
+    'dates': ['2026-01-01', '2026-01-02'],
+    'pools': [{'tvl': np.ones(3), 'share': 0.5}, {'tvl': np.zeros(3), 'share': 0.25}],
+    'ragged': [[1, 2], [3]]
+}
+
+def assert_same(decoded, expected):
+    assert list(decoded) == list(expected)
+    for name, array in expected.items():
+        np.testing.assert_array_equal(decoded[name], array)
+        assert decoded[name].shape == array.shape
+
+def test_npz_round_trip(app):
+    with app.test_request_context():
+        body = serialization.ENCODERS[NPZ_MIMETYPE](RESULT)
+    with np.load(io.BytesIO(body)) as npz:
+        assert_same(dict(npz), flatten(RESULT))
+
+def test_msgpack_round_trip(app):
+    msgpack = pytest.importorskip('msgpack')
+
+    def decode(obj):
+        if set(obj) == {'dtype', 'shape', 'data'}:
+            return np.frombuffer(obj['data'], dtype=obj['dtype']).reshape(obj['shape'])
+        return obj
+    with app.test_request_context():
+        body = serialization.ENCODERS[MSGPACK_MIMETYPE](RESULT)
+    decoded = msgpack.unpackb(body, object_hook=decode)
+    np.testing.assert_array_equal(decoded['bands'], RESULT['bands'])
+    np.testing.assert_array_equal(decoded['counts'], RESULT['counts'])
+    assert decoded['dates'] == RESULT['dates'] and decoded['ragged'] == RESULT['ragged']
+    assert [pool['share'] for pool in decoded['pools']] == [0.5, 0.25]
+
+def test_arrow_round_trip(app):
+    pa = pytest.importorskip('pyarrow')
+    with app.test_request_context():
+        body = serialization.ENCODERS[ARROW_MIMETYPE](RESULT)
+    batch = pa.ipc.open_stream(body).read_next_batch()
+    decoded = {}
+    for field, column in zip(batch.schema, batch.columns):
+        shape = json.loads(field.metadata[b'shape'])
+        decoded[field.name] = np.asarray(column[0].as_py()).reshape(shape)
+    assert_same(decoded, flatten(RESULT))
+
+def test_missing_binary_format_is_not_acceptable(client, monkeypatch):
+    monkeypatch.delitem(serialization.ENCODERS, MSGPACK_MIMETYPE, raising=False)
+    response = client.post('/run_lending_simulation', headers={'Accept': MSGPACK_MIMETYPE}, json=LENDING)
+    assert response.status_code == 406
+    assert MSGPACK_MIMETYPE not in response.get_json()['accepted']
+    # clients that also take JSON still get it
+    response = client.post('/run_lending_simulation', headers={'Accept': f'{MSGPACK_MIMETYPE}, application/json;q=0.5'},
+                           json=LENDING)
+    assert response.status_code == 200 and response.mimetype == 'application/json'
@@ -0,0 +1,131 @@
+# tests/test_shocks.py
+
+import time
+import numpy as np
+import pytest
+from app.simulations import gbm, shocks
+from app.simulations.gbm import (correlated_geometric_brownian_motion_chunks, geometric_brownian_motion,
+                                 geometric_brownian_motion_batch, geometric_brownian_motion_chunks)
+from app.simulations.ou_process import OUParams, simulate_OU_process, simulate_OU_processes
+
+LP = dict(tokenLaunchPrice=0.1, lpPoolAllocation=1e6, initialTotalSupply=1e9, simulationDays=200, mu=0.1, sigma=0.5,
+          tokenAdoptionVelocity=0.1, avgTokenUtilityAllocation=10, avgTokenHolding=10, avgTokenSell=10, paths=500,
+          seed=9, poolModel='constant_product', dailyVolume=0.05, pairSigma=0.4, correlation=0.5)
+TOKENOMICS = dict(base_monthly_emissions_rate=0.0075, base_rate=0.0, base_vesting_per_month=0.0208, cliff=12,
+                  emissions_step_up=0.2, initial_borrow=28680000, initial_reserves=1000000,
+                  initial_token_circulating=40000000, initial_tvl=266290000, jump_multiplier=4.0, kink=0.8,
+                  mom_borrow_growth=0.05, mom_tvl_growth=0.025, monthly_liquidations=0.005,
+                  monthly_sequencer_fees=0.005, multiplier=0.18, num_months=12, num_simulations=10,
+                  protocol_revenue_share=0.2, target_utilization=0.8, token_price=0.044,
+                  total_team_allocation=150000000, total_token_emitted=300000000, vesting_months=48,
+                  vesting_step_up=0.1, seed=11)
+NO_CACHE = {'Cache-Control': 'no-cache'}
+
+def chunked(chunk_size, seed=7, paths=300, days=100):
+    shocks.seed(seed)
+    blocks = geometric_brownian_motion_chunks(1, 0.1, 0.5, 1, days, paths, chunk_size)
+    return np.concatenate([S.copy() for _, _, S in blocks], axis=1)
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 33, 100])
+def test_chunked_gbm_equals_unchunked(chunk_size):
+    shocks.seed(7)
+    full = geometric_brownian_motion(1, 0.1, 0.5, 1, 100, 300)
+    assert np.array_equal(chunked(chunk_size), full)
+
+def test_path_batches_equal_one_draw():
+    shocks.seed(7)
+    full = geometric_brownian_motion(1, 0.1, 0.5, 1, 100, 300)
+    shocks.seed(7)
+    parts = [geometric_brownian_motion(1, 0.1, 0.5, 1, 100, paths) for paths in (130, 170)]
+    assert np.array_equal(np.vstack(parts), full)
+    shocks.seed(7)
+    stacked = geometric_brownian_motion_batch([1, 1], [0.1, 0.1], [0.5, 0.5], 1, 100, 150)
+    assert np.array_equal(stacked.reshape(300, 100), full)
+
+def test_correlated_chunks_are_chunk_independent():
+    def run(chunk_size):
+        shocks.seed(3)
+        blocks = correlated_geometric_brownian_motion_chunks([1, 2], [0.1, 0.2], [0.5, 0.3], [[1, 0.6], [0.6, 1]],
+                                                            1, 50, 90, chunk_size)
+        return np.concatenate([S.copy() for _, _, S in blocks], axis=2)
+    reference = run(50)
+    for chunk_size in (1, 9, 17):
+        assert np.array_equal(run(chunk_size), reference)
+
+def test_vectorised_ou_equals_serial():
+    params = OUParams(0.1, 1, 0.01, 1)
+    shocks.seed(5)
+    serial = simulate_OU_process(40, 3, params)
+    shocks.seed(5)
+    assert np.allclose(serial, simulate_OU_processes(40, [params] * 3))
+
+def test_unseeded_runs_differ():
+    shocks.seed()
+    first = geometric_brownian_motion(1, 0.1, 0.5, 1, 10, 5)
+    shocks.seed()
+    assert not np.array_equal(first, geometric_brownian_motion(1, 0.1, 0.5, 1, 10, 5))
+
+def test_shock_bank_is_chunk_independent(tmp_path):
+    path = str(tmp_path / 'shocks.npy')
+    shocks.generate(path, size=2**16)
+    shocks.load(path)
+    try:
+        banked = chunked(100)
+        assert np.array_equal(chunked(13), banked)
+        shocks.seed(7)
+        assert np.array_equal(geometric_brownian_motion(1, 0.1, 0.5, 1, 100, 300), banked)
+    finally:
+        shocks.load('')
+    assert not np.array_equal(banked, chunked(100))
+
+def test_bank_windows_of_a_run_are_disjoint(tmp_path, caplog):
+    # a bank of distinct values shows which entries each path block read
+    path = str(tmp_path / 'ids.npy')
+    np.save(path, np.arange(2**16, dtype=np.float64))
+    shocks.load(path)
+    try:
+        shocks.seed(7)
+        normals = shocks.path_normals('gbm', 300, assets=2, days=40)
+        drawn = np.concatenate([normals.normals(15).ravel(), normals.normals(25).ravel()])
+        # 5 blocks of 64 paths x 2 assets x 40 days, so whole blocks are read even for the 300 paths kept
+        assert len(np.unique(drawn)) == drawn.size == 2 * 300 * 40
+        assert not caplog.records
+
+        shocks.seed(7)
+        shocks.path_normals('gbm', 3000, days=400)
+        assert 'smaller than' in caplog.text
+    finally:
+        shocks.load('')
+
+def test_lp_result_does_not_depend_on_block_size(client, monkeypatch):
+    reference = client.post('/run_lp_simulation', headers=NO_CACHE, json=LP).data
+    for chunk_elements in (1000, 12345):
+        monkeypatch.setattr(gbm, 'CHUNK_ELEMENTS', chunk_elements)
+        assert client.post('/run_lp_simulation', headers=NO_CACHE, json=LP).data == reference
+
+def test_job_equals_synchronous_run(client):
+    reference = client.post('/run_lp_simulation', headers=NO_CACHE, json=LP).get_json()
+    job = client.post('/jobs/lp', json=LP).get_json()
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        status = client.get(f"/jobs/{job['job_id']}").get_json()
+        if status['status'] in ('done', 'failed', 'cancelled'):
+            break
+        time.sleep(0.05)
+    assert status['status'] == 'done', status
+    assert client.get(f"/jobs/{job['job_id']}/result").get_json() == reference
+
+@pytest.mark.parametrize('path, model, params', [
+    ('/run_non_stable_pool_simulation', 'non_stable_pool', dict(initial_price=1, mu=0.1, sigma=0.5, paths=300, seed=4)),
+    ('/run_tokenomics_simulation', 'tokenomics', TOKENOMICS),
+    ('/run_lending_simulation', 'lending', dict(collateral_amount=10000, max_ltv=0.7, liquidation_threshold=0.8,
+                                                total_deposits=1e6, interest_rate=0.05, liquidation_penalty=0.1)),
+])
+def test_batch_scenario_equals_single_request(client, path, model, params):
+    single = client.post(path, headers=NO_CACHE, json=params).get_json()
+    batch = client.post('/batch', headers=NO_CACHE, json={'scenarios': [
+        {'id': 'a', 'model': model, 'params': params},
+        {'id': 'b', 'model': model, 'params': params}
+    ]}).get_json()
+    assert batch['errors'] == {}
+    assert batch['results']['a'] == single and batch['results']['b'] == single
@@ -0,0 +1,51 @@
+# tests/test_single_flight.py
+
+import threading
+import time
+from app.cache import SingleFlight
+from app.routes import lending
+
+LENDING = dict(collateral_amount=10000, max_ltv=0.7, liquidation_threshold=0.8, total_deposits=1e6,
+               interest_rate=0.05, liquidation_penalty=0.1)
+
+def test_followers_get_the_leaders_result():
+    flights = SingleFlight()
+    flight, leader = flights.join('k')
+    follower, is_leader = flights.join('k')
+    assert leader and not is_leader and follower is flight
+    flights.finish('k', (b'body', 'x'))
+    assert follower.done.is_set() and follower.result == (b'body', 'x')
+    assert flights.in_flight == 0 and flights.coalesced == 1
+    # a finished key starts a new flight
+    assert flights.join('k')[1]
+
+def test_failed_leader_releases_followers_empty_handed():
+    flights = SingleFlight()
+    flights.join('k')
+    follower, _ = flights.join('k')
+    flights.finish('k')
+    assert follower.done.is_set() and follower.result is None
+
+def test_identical_concurrent_requests_compute_once(app, monkeypatch):
+    calls = []
+    run = lending.run_boundary_analysis
+
+    def slow(*args, **kwargs):
+        calls.append(1)
+        time.sleep(0.3)
+        return run(*args, **kwargs)
+    monkeypatch.setattr(lending, 'run_boundary_analysis', slow)
+
+    responses = [None] * 4
+    def post(i):
+        responses[i] = app.test_client().post('/run_lending_simulation', json=LENDING)
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(r.headers['X-Cache'] for r in responses) == ['COALESCED'] * 3 + ['MISS']
+    assert len({r.data for r in responses}) == 1
@@ -0,0 +1,49 @@
+# tests/test_store.py
+
+import time
+import numpy as np
+from app.cache import ResultCache
+from app.store import ResultStore
+
+def test_round_trip(tmp_path):
+    store = ResultStore(str(tmp_path))
+    arrays = {'a': np.arange(10.0), 'b': np.eye(3, dtype=np.int32)}
+    store.put('k', arrays, {'mimetype': 'x'})
+    loaded, meta = store.get('k')
+    assert meta == {'mimetype': 'x'}
+    for name, array in arrays.items():
+        np.testing.assert_array_equal(loaded[name], array)
+        assert loaded[name].dtype == array.dtype
+
+def test_replace_and_delete(tmp_path):
+    store = ResultStore(str(tmp_path))
+    store.put('k', {'a': np.zeros(3)})
+    store.put('k', {'a': np.ones(3)})
+    np.testing.assert_array_equal(store.get('k')[0]['a'], np.ones(3))
+    assert store.stats()['entries'] == 1
+    store.delete('k')
+    assert store.get('k') is None
+
+def test_least_recently_used_goes_first(tmp_path):
+    store = ResultStore(str(tmp_path), max_bytes=2000)
+    store.put('a', {'x': np.zeros(100)})
+    store.put('b', {'x': np.zeros(100)})
+    time.sleep(0.01)
+    store.get('a')
+    store.put('c', {'x': np.zeros(100)})
+    assert store.get('b') is None
+    assert store.get('a') is not None and store.get('c') is not None
+
+def test_expired_entries_are_gone(tmp_path):
+    store = ResultStore(str(tmp_path), ttl=0.01)
+    store.put('k', {'a': np.zeros(1)})
+    time.sleep(0.02)
+    assert store.get('k') is None
+
+def test_store_shares_results_between_caches(tmp_path):
+    # two workers: separate in-memory LRUs over one store
+    first = ResultCache(store=ResultStore(str(tmp_path)))
+    second = ResultCache(store=ResultStore(str(tmp_path)))
+    first.put('k', b'body', 'application/json')
+    assert second.get('k') == (b'body', 'application/json')
+    assert second.store_hits == 1
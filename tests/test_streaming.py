@@ -0,0 +1,39 @@
+# tests/test_streaming.py
+
+import json
+from app.routes import non_stable_pool
+
+PARAMS = dict(initial_price=1, mu=0.1, sigma=0.5, paths=3000, seed=5, streamBatchPaths=1000)
+NO_CACHE = {'Cache-Control': 'no-cache'}
+
+def bands(response):
+    assert response.mimetype == 'text/event-stream'
+    events = [event.split('\n') for event in response.get_data(as_text=True).split('\n\n') if event]
+    return [json.loads(lines[1][len('data: '):]) for lines in events if lines[0] == 'event: bands']
+
+def test_last_frame_is_the_exact_result(client):
+    frames = bands(client.post('/run_non_stable_pool_simulation/stream', headers=NO_CACHE, json=PARAMS))
+    assert [frame['paths_done'] for frame in frames] == [1000, 2000, 3000, 3000]
+    assert [frame['provisional'] for frame in frames] == [True, True, True, False]
+    assert frames[-1]['exact']
+
+    single = client.post('/run_non_stable_pool_simulation', headers=NO_CACHE, json=PARAMS).get_json()
+    assert frames[-1]['percentile_prices'] == single['percentile_prices']
+    # the averaged bands are close to, but not, the percentiles over every path
+    assert frames[-2]['percentile_prices'] != single['percentile_prices']
+
+def test_single_batch_is_exact_without_a_rerun(client):
+    frames = bands(client.post('/run_non_stable_pool_simulation/stream', headers=NO_CACHE,
+                               json=dict(PARAMS, streamBatchPaths=5000)))
+    assert len(frames) == 1 and frames[0]['exact'] and not frames[0]['provisional']
+
+def test_averaged_last_frame_is_labelled(client, monkeypatch):
+    monkeypatch.setattr(non_stable_pool, 'fits_unbatched', lambda *args, **kwargs: False)
+    frames = bands(client.post('/run_non_stable_pool_simulation/stream', headers=NO_CACHE, json=PARAMS))
+    assert len(frames) == 3
+    assert not frames[-1]['provisional'] and not frames[-1]['exact']
+
+def test_rejected_stream_answers_with_json(client):
+    response = client.post('/run_non_stable_pool_simulation/stream', json=dict(PARAMS, paths=0))
+    assert response.status_code == 400 and response.mimetype == 'application/json'
+    assert 'paths' in response.get_json()['reason']
@@ -0,0 +1,35 @@
+# tests/test_timing.py
+
+import re
+from app.timing import StageTimer
+
+LENDING = dict(collateral_amount=10000, max_ltv=0.7, liquidation_threshold=0.8, total_deposits=1e6,
+               interest_rate=0.05, liquidation_penalty=0.1)
+# W3C Server-Timing metrics: name;dur=milliseconds, comma separated
+SERVER_TIMING = re.compile(r'^[A-Za-z_]+;dur=\d+\.\d{2}(, [A-Za-z_]+;dur=\d+\.\d{2})*$')
+
+def parse(header):
+    return {name: float(dur[len('dur='):]) for name, dur in (metric.split(';') for metric in header.split(', '))}
+
+def test_stages_add_up_in_the_header():
+    timer = StageTimer()
+    timer.add('paths', 0.001)
+    timer.add('paths', 0.0025)
+    timer.add('reduce', 0.0004)
+    header = timer.header()
+    assert SERVER_TIMING.match(header)
+    assert header.startswith('paths;dur=3.50, reduce;dur=0.40, total;dur=')
+
+def test_responses_carry_server_timing(client):
+    response = client.post('/run_lending_simulation', headers={'Cache-Control': 'no-cache'}, json=LENDING)
+    header = response.headers['Server-Timing']
+    assert SERVER_TIMING.match(header)
+    stages = parse(header)
+    assert {'simulate', 'serialize', 'total'} <= set(stages)
+    assert stages['total'] >= stages['simulate']
+
+def test_timing_query_adds_stages_to_the_body(client):
+    params = dict(initial_price=1, mu=0.1, sigma=0.5, paths=200)
+    assert 'timing' not in client.post('/run_non_stable_pool_simulation', json=params).get_json()
+    body = client.post('/run_non_stable_pool_simulation?timing=1', json=params).get_json()
+    assert {'rng', 'paths', 'reduce', 'total'} <= set(body['timing'])